@@ -6,14 +6,15 @@ Pure business logic - depends on interfaces, not implementations.
 import logging
 import zipfile
 import os
+import shutil
 import tempfile
-import aiofiles
-from typing import AsyncGenerator, Optional, Tuple, List
+import time
+from typing import AsyncGenerator, Optional, Tuple, List, Union
 from fastapi import UploadFile
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
 
-from app.domain.entities import File
+from app.core.config import settings
+from app.domain.entities import ActivityDetails, File
 from app.domain.interfaces import (
     IFileRepository,
     ICryptoService,
@@ -22,11 +23,89 @@ from app.domain.interfaces import (
     IActivityLogger,
     IFolderRepository,
 )
-from app.utils.validators import validate_file_type, validate_file_size
+from app.utils.validators import etag_matches, parse_range_header, validate_file_type, validate_file_size
 from app.application.virus_scan_service import VirusScanService
 
 logger = logging.getLogger(__name__)
 
+# MIME types whose payload is already compressed (media codecs, archives and
+# zip-based office formats). Deflating them again burns CPU for no size gain,
+# so archive entries of these types are stored as-is.
+_INCOMPRESSIBLE_MIMES = frozenset({
+    "image/jpeg",
+    "image/png",
+    "image/gif",
+    "image/webp",
+    "application/epub+zip",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    "application/vnd.oasis.opendocument.text",
+    "application/zip",
+    "application/gzip",
+    "application/x-7z-compressed",
+    "application/vnd.rar",
+    "application/x-rar-compressed",
+    "audio/mpeg",
+    "audio/ogg",
+    "audio/webm",
+    "video/mp4",
+    "video/webm",
+    "video/quicktime",
+    "video/x-msvideo",
+})
+
+# Uploads are read in GridFS-chunk-sized pieces so each encrypted write fills
+# exactly one stored chunk
+UPLOAD_READ_SIZE = settings.gridfs_chunk_size
+
+# Deflate level for compressible entries; level 1 keeps most of the size win
+# at a fraction of the default (6) CPU cost. zipfile hands both DEFLATE and
+# CRC-32 to zlib in C, so the per-byte work already runs natively off the
+# event loop (see asyncio.to_thread in the archive methods).
+ZIP_COMPRESSLEVEL = 1
+
+# Files buffered in memory while building an archive: reading, queued, or
+# being written by the zip writer thread (bounds memory per archive request)
+ARCHIVE_PREFETCH_FILES = 2
+
+
+
+def _zip_entry(zip_entry_path: str, content_type: Optional[str]) -> Union[str, zipfile.ZipInfo]:
+    """
+    Build the zip entry for a file, storing already-compressed formats uncompressed.
+    
+    Args:
+        zip_entry_path: Path of the entry inside the archive
+        content_type: MIME type of the file
+        
+    Returns:
+        ZipInfo with ZIP_STORED for incompressible types, otherwise the plain
+        path (inherits the archive's deflate settings)
+    """
+    if content_type not in _INCOMPRESSIBLE_MIMES:
+        return zip_entry_path
+    zinfo = zipfile.ZipInfo(zip_entry_path, date_time=time.localtime()[:6])
+    zinfo.compress_type = zipfile.ZIP_STORED
+    return zinfo
+
+
+def remove_archive(zip_path: str) -> None:
+    """
+    Delete a temporary archive produced by FolderService and its temp directory.
+    
+    Args:
+        zip_path: Path returned by archive_folder / archive_folder_public
+    """
+    try:
+        if os.path.exists(zip_path):
+            os.remove(zip_path)
+        temp_dir = os.path.dirname(zip_path)
+        if os.path.exists(temp_dir):
+            os.rmdir(temp_dir)
+    except Exception as cleanup_error:
+        logger.warning(f"Failed to cleanup temp files: {cleanup_error}")
+
 
 class FileService:
     """
@@ -173,12 +252,12 @@ class FileService:
                 await self.activity_logger.log_activity(
                     user_id,
                     "FILE_UPLOAD",
-                    {
-                        "file_id": file_id,
-                        "filename": filename,
-                        "size": len(file_content),
-                        "content_type": content_type,
-                    },
+                    ActivityDetails(
+                        file_id=file_id,
+                        filename=filename,
+                        size=len(file_content),
+                        content_type=content_type,
+                    ),
                     ip_address,
                 )
 
@@ -231,7 +310,7 @@ class FileService:
 
             # 3. Stream for scanning and hashing
             original_size = 0
-            chunk_size = 64 * 1024
+            chunk_size = UPLOAD_READ_SIZE
 
             async def scan_and_hash_stream():
                 """Read chunks, hash them, and pass through"""
@@ -247,7 +326,6 @@ class FileService:
             file_hash, scan_status, is_infected, threat_name = await self.virus_scanner.scan_and_hash_stream(
                 scan_and_hash_stream(),
                 filename,
-                chunk_size=chunk_size
             )
 
             # 5. Check if infected
@@ -259,14 +337,16 @@ class FileService:
                     await self.activity_logger.log_activity(
                         user_id,
                         "FILE_UPLOAD_INFECTED",
-                        {
-                            "filename": filename,
-                            "size": original_size,
-                            "content_type": file.content_type,
-                            "threat": threat_name,
-                            "scan_status": "infected",
-                            "hash": file_hash[:16] + "..." if file_hash else None,
-                        },
+                        ActivityDetails(
+                            filename=filename,
+                            size=original_size,
+                            content_type=file.content_type,
+                            extra={
+                                "threat": threat_name,
+                                "scan_status": "infected",
+                                "hash": file_hash[:16] + "..." if file_hash else None,
+                            },
+                        ),
                         ip_address,
                     )
                 
@@ -327,15 +407,17 @@ class FileService:
                 await self.activity_logger.log_activity(
                     user_id,
                     "FILE_UPLOAD",
-                    {
-                        "file_id": file_id,
-                        "filename": file.filename,
-                        "size": original_size,
-                        "content_type": file.content_type,
-                        "encrypted": True,
-                        "scan_status": scan_status,
-                        "hash": file_hash[:16] + "..." if file_hash else None,
-                    },
+                    ActivityDetails(
+                        file_id=file_id,
+                        filename=file.filename,
+                        size=original_size,
+                        content_type=file.content_type,
+                        extra={
+                            "encrypted": True,
+                            "scan_status": scan_status,
+                            "hash": file_hash[:16] + "..." if file_hash else None,
+                        },
+                    ),
                     ip_address,
                 )
 
@@ -351,7 +433,7 @@ class FileService:
 
     async def _uploadfile_to_async_gen(self, upload_file: UploadFile) -> AsyncGenerator:
         """Convert UploadFile to async generator"""
-        chunk_size = 64 * 1024
+        chunk_size = UPLOAD_READ_SIZE
         while True:
             chunk = await upload_file.read(chunk_size)
             if not chunk:
@@ -371,7 +453,7 @@ class FileService:
             Original file size
         """
         original_size = 0
-        chunk_size = 64 * 1024
+        chunk_size = UPLOAD_READ_SIZE
 
         async def size_tracking_stream():
             nonlocal original_size
@@ -403,6 +485,8 @@ class FileService:
         file_id: str,
         requester_user_id: str,
         allow_shared: bool = False,
+        if_none_match: Optional[str] = None,
+        range_header: Optional[str] = None,
     ) -> Tuple[bool, Optional[AsyncGenerator], Optional[dict], Optional[str]]:
         """
         Download and decrypt file if encrypted.
@@ -410,6 +494,13 @@ class FileService:
         Args:
             file_id: File to download
             requester_user_id: User requesting (for ownership check)
+            allow_shared: Allow access by a user the file is shared with
+            if_none_match: Optional If-None-Match header; when it matches the
+                file's ETag no stream is opened and metadata["not_modified"]
+                is True
+            range_header: Optional HTTP Range header; a single satisfiable
+                range streams only those bytes and sets metadata["range"]
+                to (start, end)
             
         Returns:
             Tuple of (success, file_stream, metadata, error_message)
@@ -424,29 +515,58 @@ class FileService:
             if requester_user_id != "public_link" and file.owner_id != requester_user_id and not allow_shared:
                 return False, None, None, "Access denied"
 
-            # 3. Get file stream
-            file, stream = await self.repo.get_file_stream(file_id)
+            # Conditional request: the client's copy is current, so skip the
+            # GridFS read and the decrypt pipeline entirely
+            etag = file.etag()
+            if etag_matches(if_none_match, etag):
+                return True, None, {
+                    "filename": file.filename,
+                    "content_type": file.content_type,
+                    "size": file.size,
+                    "etag": etag,
+                    "not_modified": True,
+                }, None
+
+            try:
+                byte_range = parse_range_header(range_header, file.size)
+            except ValueError:
+                return False, None, {"size": file.size}, "Range not satisfiable"
+
+            # 3. Get file stream (only the requested bytes for a range)
+            if byte_range:
+                file, stream = await self.repo.get_file_range(file_id, *byte_range)
+            else:
+                file, stream = await self.repo.get_file_stream(file_id)
             if not stream:
                 return False, None, None, "Cannot open file"
 
-            # 4. Decrypt if necessary
+            # 4. Decrypt if necessary (CTR decrypts a range without the bytes before it)
             if file.encrypted:
                 try:
                     file_key = self.crypto.unwrap_key(bytes.fromhex(file.encrypted_key))
                     nonce = bytes.fromhex(file.nonce)
-                    stream = self.crypto.decrypt_stream(stream, file_key, nonce)
+                    stream = self.crypto.decrypt_stream(
+                        stream,
+                        file_key,
+                        nonce,
+                        chunk_size=settings.gridfs_chunk_size,
+                        offset=byte_range[0] if byte_range else 0,
+                    )
                 except Exception as e:
                     logger.error(f"Decryption setup failed: {e}")
                     return False, None, None, "Decryption error"
 
-            # 5. Publish download event
-            await self.publisher.publish_download(requester_user_id, file_id)
+            # 5. Publish download event (once per download, not per range request)
+            if not byte_range or byte_range[0] == 0:
+                await self.publisher.publish_download(requester_user_id, file_id)
 
             # 6. Prepare metadata
             metadata = {
                 "filename": file.filename,
                 "content_type": file.content_type,
                 "size": file.size,
+                "etag": etag,
+                "range": byte_range,
             }
 
             logger.info(f"✓ Started download for file {file_id}")
@@ -508,12 +628,12 @@ class FileService:
                 await self.activity_logger.log_activity(
                     requester_user_id,
                     "FILE_DELETE",
-                    {
-                        "file_id": file_id,
-                        "filename": file.filename,
-                        "size": file.size,
-                        "deletion_type": "soft_delete",
-                    },
+                    ActivityDetails(
+                        file_id=file_id,
+                        filename=file.filename,
+                        size=file.size,
+                        extra={"deletion_type": "soft_delete"},
+                    ),
                     ip_address,
                 )
 
@@ -570,10 +690,7 @@ class FileService:
                 await self.activity_logger.log_activity(
                     requester_user_id,
                     "FILE_RESTORE",
-                    {
-                        "file_id": file_id,
-                        "filename": file.filename,
-                    },
+                    ActivityDetails(file_id=file_id, filename=file.filename),
                     ip_address,
                 )
 
@@ -653,31 +770,20 @@ class FileService:
             Tuple of (success, files_list, error_message)
         """
         try:
-            files = await self.repo.list_by_owner(user_id, folder_id=folder_id)
-            
-            logger.debug(f"[list_user_files] Retrieved {len(files)} files from repo (folder_id={folder_id})")
-            for f in files:
-                logger.debug(f"[list_user_files] File: '{f.filename}' | folder_id={repr(f.folder_id)} | type={type(f.folder_id)}")
-            
-            # Explicitly filter by folder_id to ensure proper scoping
-            filtered_files = []
-            for f in files:
-                # If requesting root (None), ensure file has no folder_id
+            # Build the response rows as the repository streams files, without
+            # materializing an intermediate list of entities
+            files_list = []
+            async for f in self.repo.iter_by_owner(user_id, folder_id=folder_id):
+                # Explicitly filter by folder_id to ensure proper scoping:
+                # root (None) requires no folder_id, otherwise IDs must match
                 if folder_id is None:
-                    if not f.folder_id:
-                        filtered_files.append(f)
-                        logger.debug(f"[list_user_files] Including (root): '{f.filename}'")
-                    else:
+                    if f.folder_id:
                         logger.debug(f"[list_user_files] Filtering out (has folder): '{f.filename}' with folder_id={f.folder_id}")
-                # If requesting specific folder, ensure IDs match
-                else:
-                    if str(f.folder_id) == str(folder_id):
-                        filtered_files.append(f)
-            
-            logger.debug(f"[list_user_files] Filtered to {len(filtered_files)} files (folder_id={folder_id})")
-            
-            files_list = [
-                {
+                        continue
+                elif str(f.folder_id) != str(folder_id):
+                    continue
+
+                files_list.append({
                     "file_id": f.id,
                     "filename": f.filename,
                     "size": f.size,
@@ -686,9 +792,9 @@ class FileService:
                     "encrypted": f.encrypted,
                     "folder_id": f.folder_id,
                     "metadata": f.metadata,
-                }
-                for f in filtered_files
-            ]
+                })
+
+            logger.debug(f"[list_user_files] Listed {len(files_list)} files (folder_id={folder_id})")
             return True, files_list, None
 
         except Exception as e:
@@ -952,17 +1058,9 @@ class FolderService:
             if not folder:
                 return False, "Folder not found or not owned by user"
 
-            # [FIX #1] Calculate TOTAL tree size (all files in folder + subfolders)
-            # Use the new get_folder_tree_size method for accurate calculation
-            total_tree_size = 0
-            if hasattr(self.folder_repo, 'get_folder_tree_size'):
-                total_tree_size = await self.folder_repo.get_folder_tree_size(folder_id)
-            
-            # Use repository's recursive delete
-            success = await self.folder_repo.delete_folder_recursive(folder_id, user_id)
-            
-            if not success:
-                return False, "Failed to delete folder"
+            # Bulk-delete the whole subtree; bytes_freed is the TOTAL tree size
+            files_deleted, total_tree_size = await self.folder_repo.tree_delete(folder_id, user_id)
+            logger.info(f"✓ Deleted {files_deleted} files under folder {folder_id}")
 
             # [FIX #1 & #2] After successful deletion, clean up orphaned records
             if hasattr(self.folder_repo, 'db'):
@@ -1103,8 +1201,6 @@ class FolderService:
                 # Shared access: don't filter by owner - list all files in the folder
                 owner_filter = None
             
-            files = await self.file_repo.list_files_in_folder(folder_id, owner_id=owner_filter)
-            
             files_list = [
                 {
                     "file_id": f.id,
@@ -1117,7 +1213,7 @@ class FolderService:
                     "content_type": f.content_type,
                     "metadata": f.metadata,
                 }
-                for f in files
+                async for f in self.file_repo.iter_files_in_folder(folder_id, owner_id=owner_filter)
             ]
 
             # Get direct subfolders only
@@ -1186,8 +1282,6 @@ class FolderService:
             Tuple of (success, folders_list, error_message)
         """
         try:
-            folders = await self.folder_repo.list_folders(user_id, parent_id)
-
             folders_list = [
                 {
                     "folder_id": f.id,
@@ -1196,7 +1290,7 @@ class FolderService:
                     "created_at": f.created_at,
                     "updated_at": f.updated_at,
                 }
-                for f in folders
+                async for f in self.folder_repo.iter_folders(user_id, parent_id)
             ]
             
             return True, folders_list, None
@@ -1308,8 +1402,8 @@ class FolderService:
         """
         Build breadcrumb path from root to current folder.
         
-        Optimized: Uses MongoDB $graphLookup to fetch entire ancestry chain in single query
-        instead of iterative lookups (N+1 prevention).
+        The ancestor ids come from the folder's materialized path and are
+        loaded with one batched lookup (no query per level).
         
         Args:
             folder_id: Current folder ID (None = root)
@@ -1324,70 +1418,43 @@ class FolderService:
         if not folder_id:
             return breadcrumbs
         
+        folder = None
         try:
-            # Use MongoDB $graphLookup to fetch entire ancestry chain in one query
-            # This is much more efficient than the old while loop that made N queries
-            from bson import ObjectId
-            
-            folder_oid = self.folder_repo._to_object_id(folder_id)
-            if folder_oid is None:
+            folder = await self.folder_repo.get_folder(folder_id, owner_id)
+            if not folder:
                 return breadcrumbs
-            
-            pipeline = [
-                {"$match": {"_id": folder_oid, "owner_id": owner_id}},
-                {
-                    "$graphLookup": {
-                        "from": "folders",
-                        "startWith": "$parent_id",
-                        "connectFromField": "parent_id",
-                        "connectToField": "_id",
-                        "as": "ancestors",
-                        "maxDepth": 100,
-                    }
-                },
-                {
-                    "$project": {
-                        "name": 1,
-                        "_id": 1,
-                        "ancestors": {
-                            "_id": 1,
-                            "name": 1,
-                        }
-                    }
-                }
-            ]
-            
-            result = await self.folder_repo.collection.aggregate(pipeline).to_list(1)
-            
-            if result:
-                folder_data = result[0]
-                # Add ancestors from root to parent (reverse order)
-                if folder_data.get("ancestors"):
-                    ancestors = folder_data["ancestors"]
-                    # ancestors are already in order from immediate parent up to root
-                    # reverse them to get from root down
-                    for ancestor in reversed(ancestors):
-                        breadcrumbs.append({
-                            "folder_id": str(ancestor.get("_id", "")),
-                            "name": ancestor.get("name", "")
-                        })
-                # Add current folder at the end
-                breadcrumbs.append({
-                    "folder_id": str(folder_data.get("_id", "")),
-                    "name": folder_data.get("name", "")
-                })
-            
+
+            # tree_path is "/root_id/.../folder_id"; everything before the
+            # folder itself is its ancestry, root first
+            ancestor_ids = [part for part in folder.tree_path.split("/") if part][:-1]
+            if ancestor_ids:
+                ancestors = await self.folder_repo.get_folders_by_ids(ancestor_ids, owner_id)
+                for ancestor_id in ancestor_ids:
+                    ancestor = ancestors.get(ancestor_id)
+                    if ancestor:
+                        breadcrumbs.append({"folder_id": ancestor.id, "name": ancestor.name})
+            elif folder.parent_id:
+                # Folder predates materialized paths: walk up one level at a time
+                chain = []
+                parent_id, seen = folder.parent_id, {folder.id}
+                while parent_id and parent_id not in seen and len(chain) < 100:
+                    seen.add(parent_id)
+                    parent = await self.folder_repo.get_folder(parent_id, owner_id)
+                    if not parent:
+                        break
+                    chain.append({"folder_id": parent.id, "name": parent.name})
+                    parent_id = parent.parent_id
+                breadcrumbs.extend(reversed(chain))
+
+            breadcrumbs.append({"folder_id": folder.id, "name": folder.name})
             return breadcrumbs
             
         except Exception as e:
             logger.error(f"Failed to get breadcrumbs for {folder_id}: {e}")
             # Fallback to simple path without parents
-            try:
-                folder = await self.folder_repo.get_folder(folder_id, owner_id)
-                if folder:
-                    breadcrumbs.append({"folder_id": folder.id, "name": folder.name})
-            except:
-                pass
+            breadcrumbs = breadcrumbs[:1]
+            if folder:
+                breadcrumbs.append({"folder_id": folder.id, "name": folder.name})
             return breadcrumbs
 
     async def is_folder_descendant(
@@ -1481,11 +1548,215 @@ class FolderService:
     # Zip Archive Operations
     # ========================================================================
 
+    async def _prepare_archive_entry(
+        self,
+        file_entity: File,
+        zip_entry_path: str,
+    ) -> Optional[Tuple[File, str, List[bytes]]]:
+        """
+        Read (and decrypt, if needed) one file into memory for the zip writer.
+        
+        Args:
+            file_entity: File to include
+            zip_entry_path: Path of the entry inside the archive
+            
+        Returns:
+            Tuple of (file_entity, zip_entry_path, chunks), or None if the file is skipped
+        """
+        _, stream = await self.file_repo.get_file_stream(file_entity.id)
+        if not stream:
+            return None
+
+        # Handle Decryption for encrypted files
+        if file_entity.encrypted and self.crypto:
+            try:
+                file_key = self.crypto.unwrap_key(bytes.fromhex(file_entity.encrypted_key))
+                nonce = bytes.fromhex(file_entity.nonce)
+                stream = self.crypto.decrypt_stream(stream, file_key, nonce, chunk_size=settings.gridfs_chunk_size)
+                logger.info(f"Decrypting file {file_entity.filename} for archive")
+            except Exception as decrypt_error:
+                logger.error(f"Failed to decrypt {file_entity.filename} for zip: {decrypt_error}")
+                logger.warning(f"Skipping encrypted file {file_entity.filename} - decryption failed")
+                return None
+
+        # Collect chunks from stream into memory (buffered)
+        chunks = []
+        async for chunk in stream:
+            chunks.append(chunk)
+        return file_entity, zip_entry_path, chunks
+
+    async def _write_zip_archive(
+        self,
+        files_to_zip: List[Tuple[File, str]],
+        zip_path: str,
+    ) -> bool:
+        """
+        Write files into a zip archive at zip_path.
+        
+        Files are read (and decrypted) on the event loop and handed to the
+        blocking zip writer thread through a queue. At most
+        ARCHIVE_PREFETCH_FILES files are in memory at once, counting from the
+        start of a file's read until the writer has written it, so reads
+        overlap the writes only within that budget. Entries are written in
+        the order their reads complete.
+        
+        Args:
+            files_to_zip: List of (file_entity, "path/inside/zip")
+            zip_path: Destination path of the archive
+            
+        Returns:
+            True if the archive was written, False otherwise
+        """
+        loop = asyncio.get_running_loop()
+        # Never holds more than ARCHIVE_PREFETCH_FILES files plus the end marker
+        pending: asyncio.Queue = asyncio.Queue()
+        budget = asyncio.Semaphore(ARCHIVE_PREFETCH_FILES)
+
+        async def prepare(file_entity: File, zip_entry_path: str):
+            # The budget slot is released by the writer thread once the file
+            # is written (or here if the file never reaches the queue)
+            await budget.acquire()
+            try:
+                prepared = await self._prepare_archive_entry(file_entity, zip_entry_path)
+            except BaseException as e:
+                budget.release()
+                if not isinstance(e, Exception):
+                    raise
+                logger.warning(f"Failed to prepare file {file_entity.filename} for zip: {e}")
+                return
+            if prepared is None:
+                budget.release()
+            else:
+                pending.put_nowait(prepared)
+
+        async def produce():
+            """Prepare files concurrently; None marks the end of the archive."""
+            tasks = [asyncio.create_task(prepare(fe, path)) for fe, path in files_to_zip]
+            try:
+                for finished in asyncio.as_completed(tasks):
+                    await finished
+            except asyncio.CancelledError:
+                for task in tasks:
+                    task.cancel()
+                raise
+            except Exception as e:
+                logger.error(f"Failed to prepare zip creation: {e}")
+            await pending.put(None)
+
+        def next_prepared():
+            return asyncio.run_coroutine_threadsafe(pending.get(), loop).result()
+
+        def create_zip_in_thread():
+            """Blocking operation - run in thread to avoid freezing event loop"""
+            try:
+                with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=ZIP_COMPRESSLEVEL) as zipf:
+                    for file_entity, zip_entry_path, chunks in iter(next_prepared, None):
+                        try:
+                            entry = _zip_entry(zip_entry_path, file_entity.content_type)
+                            with zipf.open(entry, 'w') as zf_entry:
+                                for chunk in chunks:
+                                    zf_entry.write(chunk)
+                        except Exception as chunk_error:
+                            logger.warning(f"Failed to write {file_entity.filename} to zip: {chunk_error}")
+                        finally:
+                            # Drop the buffered file before letting the next read start
+                            del chunks
+                            loop.call_soon_threadsafe(budget.release)
+                return True
+            except Exception as e:
+                logger.error(f"Failed to create zip file in thread: {e}")
+                return False
+
+        producer = asyncio.create_task(produce())
+        try:
+            # Execute blocking operation on the loop's shared default executor
+            return await asyncio.to_thread(create_zip_in_thread)
+        finally:
+            # The writer stopped early (error) or we were cancelled: stop the
+            # producer and hand the writer thread its end marker, otherwise it
+            # would wait on the queue forever and pin an executor thread
+            # (put_nowait cannot block: the queue is unbounded)
+            if not producer.done():
+                producer.cancel()
+            while not pending.empty():
+                pending.get_nowait()
+            pending.put_nowait(None)
+
+    async def _collect_archive_files(
+        self,
+        folder_id: str,
+        folder_name: str,
+    ) -> List[Tuple[File, str]]:
+        """
+        Collect every non-infected file below a folder for archiving.
+        
+        Args:
+            folder_id: Root folder of the archive
+            folder_name: Name of the top-level directory inside the archive
+            
+        Returns:
+            List of (file_entity, "path/inside/zip")
+        """
+        files_to_zip = []
+
+        async def recurse_folder(current_fid, current_path):
+            """Recursively collect files and folders for archiving."""
+            # Get files in this folder (no owner filter for internal traversal)
+            async for f in self.file_repo.iter_files_in_folder(current_fid, owner_id=None):
+                # Only zip non-infected files
+                if not f.is_infected:
+                    files_to_zip.append((f, f"{current_path}/{f.filename}"))
+
+            # Get subfolders
+            subs = await self.folder_repo.list_subfolders(current_fid, owner_id=None)
+            for sub in subs:
+                await recurse_folder(sub.id, f"{current_path}/{sub.name}")
+
+        await recurse_folder(folder_id, folder_name)
+        return files_to_zip
+
+    async def _build_archive(
+        self,
+        folder_name: str,
+        files_to_zip: List[Tuple[File, str]],
+    ) -> Tuple[bool, Optional[str], Optional[str], Optional[str]]:
+        """
+        Write collected files into a zip inside a fresh temp directory.
+        The temp directory is removed on any failure, cancellation included.
+        
+        Args:
+            folder_name: Archive name (without the .zip extension)
+            files_to_zip: List of (file_entity, "path/inside/zip")
+            
+        Returns:
+            Tuple of (success, zip_path, filename, error_message)
+        """
+        # Temp file for memory safety; the blocking zip writes run in a thread
+        temp_dir = tempfile.mkdtemp()
+        zip_filename = f"{folder_name}.zip"
+        zip_path = os.path.join(temp_dir, zip_filename)
+
+        try:
+            # Pipeline file reads/decryption into the zip writer thread
+            zip_success = await self._write_zip_archive(files_to_zip, zip_path)
+        except BaseException as e:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            if not isinstance(e, Exception):
+                raise
+            logger.error(f"Failed to prepare zip creation: {e}")
+            return False, None, None, f"Failed to create zip: {str(e)}"
+
+        if not zip_success:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            return False, None, None, "Failed to create zip file"
+
+        return True, zip_path, zip_filename, None
+
     async def archive_folder(
         self,
         folder_id: str,
         user_id: str,
-    ) -> Tuple[bool, Optional[AsyncGenerator], Optional[str], Optional[str]]:
+    ) -> Tuple[bool, Optional[str], Optional[str], Optional[str]]:
         """
         Create a ZIP archive of the folder and its contents.
         Works for both owned and shared folders.
@@ -1495,7 +1766,8 @@ class FolderService:
             user_id: The current user (for verification)
             
         Returns:
-            Tuple of (success, file_stream, filename, error_message)
+            Tuple of (success, zip_path, filename, error_message); the caller
+            must release zip_path with remove_archive() once it is sent
         """
         try:
             # 1. Verify access - try owned first, then check shared
@@ -1508,127 +1780,21 @@ class FolderService:
                 # Note: Actual sharing permission was already checked at endpoint level
 
             # 2. Collect all files to zip
-            # Format: [(file_entity, "path/inside/zip")]
-            files_to_zip = []
-            
-            async def recurse_folder(current_fid, current_path):
-                """Recursively collect files and folders for archiving."""
-                # Get files in this folder (no owner filter for internal traversal)
-                files = await self.file_repo.list_files_in_folder(current_fid, owner_id=None)
-                for f in files:
-                    # Only zip non-infected files
-                    if not f.is_infected:
-                        files_to_zip.append((f, f"{current_path}/{f.filename}"))
-                
-                # Get subfolders
-                subs = await self.folder_repo.list_subfolders(current_fid, owner_id=None)
-                for sub in subs:
-                    await recurse_folder(sub.id, f"{current_path}/{sub.name}")
-
-            # Start recursion from the root folder
             folder_name = folder.get('name', 'archive') if isinstance(folder, dict) else folder.name
-            await recurse_folder(folder_id, folder_name)
+            files_to_zip = await self._collect_archive_files(folder_id, folder_name)
 
             if not files_to_zip:
                 return False, None, None, "Folder is empty"
 
-            # 3. Create Zip (using temp file for memory safety)
-            # [FIX: Async Blocking Issue] Move blocking zip operations to thread pool to avoid freezing event loop
-            temp_dir = tempfile.mkdtemp()
-            zip_filename = f"{folder_name}.zip"
-            zip_path = os.path.join(temp_dir, zip_filename)
-
-            try:
-                # First collect all file streams asynchronously
-                files_with_streams = []
-                for file_entity, zip_entry_path in files_to_zip:
-                    try:
-                        _, stream = await self.file_repo.get_file_stream(file_entity.id)
-                        if stream:
-                            # Handle Decryption for encrypted files
-                            if file_entity.encrypted and self.crypto:
-                                try:
-                                    file_key = self.crypto.unwrap_key(bytes.fromhex(file_entity.encrypted_key))
-                                    nonce = bytes.fromhex(file_entity.nonce)
-                                    stream = self.crypto.decrypt_stream(stream, file_key, nonce)
-                                    logger.info(f"Decrypting file {file_entity.filename} for archive")
-                                except Exception as decrypt_error:
-                                    logger.error(f"Failed to decrypt {file_entity.filename} for zip: {decrypt_error}")
-                                    logger.warning(f"Skipping encrypted file {file_entity.filename} - decryption failed")
-                                    continue
-                            
-                            # Collect chunks from stream into memory (buffered)
-                            chunks = []
-                            async for chunk in stream:
-                                chunks.append(chunk)
-                            files_with_streams.append((file_entity, zip_entry_path, chunks))
-                    except Exception as e:
-                        logger.warning(f"Failed to prepare file {file_entity.filename} for zip: {e}")
-                        continue
-                
-                # Now run the blocking zip operation in a thread pool
-                # This prevents the entire event loop from freezing during zip creation
-                loop = asyncio.get_event_loop()
-                executor = ThreadPoolExecutor(max_workers=1)
-                
-                def create_zip_in_thread():
-                    """Blocking operation - run in thread to avoid freezing event loop"""
-                    try:
-                        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                            for file_entity, zip_entry_path, chunks in files_with_streams:
-                                try:
-                                    with zipf.open(zip_entry_path, 'w') as zf_entry:
-                                        for chunk in chunks:
-                                            zf_entry.write(chunk)
-                                except Exception as chunk_error:
-                                    logger.warning(f"Failed to write {file_entity.filename} to zip: {chunk_error}")
-                                    continue
-                        return True
-                    except Exception as e:
-                        logger.error(f"Failed to create zip file in thread: {e}")
-                        return False
-                
-                # Execute blocking operation in thread pool
-                zip_success = await loop.run_in_executor(executor, create_zip_in_thread)
-                executor.shutdown(wait=False)
-                
-                if not zip_success:
-                    if os.path.exists(zip_path):
-                        os.remove(zip_path)
-                    if os.path.exists(temp_dir):
-                        os.rmdir(temp_dir)
-                    return False, None, None, "Failed to create zip file"
-                    
-            except Exception as e:
-                logger.error(f"Failed to prepare zip creation: {e}")
-                if os.path.exists(zip_path):
-                    os.remove(zip_path)
-                if os.path.exists(temp_dir):
-                    os.rmdir(temp_dir)
-                return False, None, None, f"Failed to create zip: {str(e)}"
-
-            # 4. Create async generator to stream the zip file back
-            async def file_sender():
-                """Stream zip file to client in chunks."""
-                try:
-                    async with aiofiles.open(zip_path, 'rb') as f:
-                        while True:
-                            chunk = await f.read(64 * 1024)  # 64KB chunks
-                            if not chunk:
-                                break
-                            yield chunk
-                finally:
-                    # Cleanup temp files
-                    try:
-                        if os.path.exists(zip_path):
-                            os.remove(zip_path)
-                        if os.path.exists(temp_dir):
-                            os.rmdir(temp_dir)
-                    except Exception as cleanup_error:
-                        logger.warning(f"Failed to cleanup temp files: {cleanup_error}")
+            # 3. Create Zip
+            success, zip_path, zip_filename, error = await self._build_archive(folder_name, files_to_zip)
+            if not success:
+                return False, None, None, error
 
+            # 4. Hand the finished archive back; the caller streams it with
+            # sendfile and removes it afterwards via remove_archive()
             logger.info(f"✓ Created zip archive for folder {folder_id}")
-            return True, file_sender(), zip_filename, None
+            return True, zip_path, zip_filename, None
 
         except Exception as e:
             logger.error(f"Archive folder failed: {e}")
@@ -1637,7 +1803,7 @@ class FolderService:
     async def archive_folder_public(
         self,
         folder_id: str,
-    ) -> Tuple[bool, Optional[AsyncGenerator], Optional[str], Optional[str]]:
+    ) -> Tuple[bool, Optional[str], Optional[str], Optional[str]]:
         """
         Create a ZIP archive of a public folder (no user ownership required).
         Used for public share links.
@@ -1646,7 +1812,8 @@ class FolderService:
             folder_id: The folder to archive
             
         Returns:
-            Tuple of (success, file_stream, filename, error_message)
+            Tuple of (success, zip_path, filename, error_message); the caller
+            must release zip_path with remove_archive() once it is sent
         """
         try:
             # 1. Verify folder exists (no ownership check for public)
@@ -1655,120 +1822,21 @@ class FolderService:
                 return False, None, None, "Folder not found"
 
             # 2. Collect all files to zip
-            files_to_zip = []
-            
-            async def recurse_folder(current_fid, current_path):
-                """Recursively collect files and folders for archiving."""
-                files = await self.file_repo.list_files_in_folder(current_fid, owner_id=None)
-                for f in files:
-                    if not f.is_infected:
-                        files_to_zip.append((f, f"{current_path}/{f.filename}"))
-                
-                subs = await self.folder_repo.list_subfolders(current_fid, owner_id=None)
-                for sub in subs:
-                    await recurse_folder(sub.id, f"{current_path}/{sub.name}")
-
             folder_name = folder.get('name', 'archive') if isinstance(folder, dict) else folder.name
-            await recurse_folder(folder_id, folder_name)
+            files_to_zip = await self._collect_archive_files(folder_id, folder_name)
 
             if not files_to_zip:
                 return False, None, None, "Folder is empty"
 
-            # 3. Create Zip using temp file
-            # [FIX: Async Blocking Issue] Move blocking zip operations to thread pool to avoid freezing event loop
-            temp_dir = tempfile.mkdtemp()
-            zip_filename = f"{folder_name}.zip"
-            zip_path = os.path.join(temp_dir, zip_filename)
-
-            try:
-                # First collect all file streams asynchronously
-                files_with_streams = []
-                for file_entity, zip_entry_path in files_to_zip:
-                    try:
-                        _, stream = await self.file_repo.get_file_stream(file_entity.id)
-                        if stream:
-                            # Handle Decryption for encrypted files
-                            if file_entity.encrypted and self.crypto:
-                                try:
-                                    file_key = self.crypto.unwrap_key(bytes.fromhex(file_entity.encrypted_key))
-                                    nonce = bytes.fromhex(file_entity.nonce)
-                                    stream = self.crypto.decrypt_stream(stream, file_key, nonce)
-                                    logger.info(f"Decrypting file {file_entity.filename} for public archive")
-                                except Exception as decrypt_error:
-                                    logger.error(f"Failed to decrypt {file_entity.filename} for zip: {decrypt_error}")
-                                    logger.warning(f"Skipping encrypted file {file_entity.filename} - decryption failed")
-                                    continue
-                            
-                            # Collect chunks from stream into memory (buffered)
-                            chunks = []
-                            async for chunk in stream:
-                                chunks.append(chunk)
-                            files_with_streams.append((file_entity, zip_entry_path, chunks))
-                    except Exception as e:
-                        logger.warning(f"Failed to prepare file {file_entity.filename} for zip: {e}")
-                        continue
-                
-                # Now run the blocking zip operation in a thread pool
-                # This prevents the entire event loop from freezing during zip creation
-                loop = asyncio.get_event_loop()
-                executor = ThreadPoolExecutor(max_workers=1)
-                
-                def create_zip_in_thread():
-                    """Blocking operation - run in thread to avoid freezing event loop"""
-                    try:
-                        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                            for file_entity, zip_entry_path, chunks in files_with_streams:
-                                try:
-                                    with zipf.open(zip_entry_path, 'w') as zf_entry:
-                                        for chunk in chunks:
-                                            zf_entry.write(chunk)
-                                except Exception as chunk_error:
-                                    logger.warning(f"Failed to write {file_entity.filename} to zip: {chunk_error}")
-                                    continue
-                        return True
-                    except Exception as e:
-                        logger.error(f"Failed to create zip file in thread: {e}")
-                        return False
-                
-                # Execute blocking operation in thread pool
-                zip_success = await loop.run_in_executor(executor, create_zip_in_thread)
-                executor.shutdown(wait=False)
-                
-                if not zip_success:
-                    if os.path.exists(zip_path):
-                        os.remove(zip_path)
-                    if os.path.exists(temp_dir):
-                        os.rmdir(temp_dir)
-                    return False, None, None, "Failed to create zip file"
-                    
-            except Exception as e:
-                logger.error(f"Failed to prepare zip creation: {e}")
-                if os.path.exists(zip_path):
-                    os.remove(zip_path)
-                if os.path.exists(temp_dir):
-                    os.rmdir(temp_dir)
-                return False, None, None, f"Failed to create zip: {str(e)}"
-
-            # 4. Create async generator to stream
-            async def file_sender():
-                try:
-                    async with aiofiles.open(zip_path, 'rb') as f:
-                        while True:
-                            chunk = await f.read(64 * 1024)
-                            if not chunk:
-                                break
-                            yield chunk
-                finally:
-                    try:
-                        if os.path.exists(zip_path):
-                            os.remove(zip_path)
-                        if os.path.exists(temp_dir):
-                            os.rmdir(temp_dir)
-                    except Exception as cleanup_error:
-                        logger.warning(f"Failed to cleanup temp files: {cleanup_error}")
+            # 3. Create Zip
+            success, zip_path, zip_filename, error = await self._build_archive(folder_name, files_to_zip)
+            if not success:
+                return False, None, None, error
 
+            # 4. Hand the finished archive back; the caller streams it with
+            # sendfile and removes it afterwards via remove_archive()
             logger.info(f"✓ Created public zip archive for folder {folder_id}")
-            return True, file_sender(), zip_filename, None
+            return True, zip_path, zip_filename, None
 
         except Exception as e:
             logger.error(f"Archive public folder failed: {e}")
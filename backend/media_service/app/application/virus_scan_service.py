@@ -3,17 +3,176 @@ Virus scanning service for stream-based malware detection.
 Uses ClamAV engine for real-time scanning during file upload.
 """
 
+import asyncio
 import logging
 import hashlib
 import io
+import os
+import socket
+import struct
+import threading
+import time
 import clamd
 import tempfile
 import aiofiles
-from typing import AsyncGenerator, Tuple, Optional
+from typing import AsyncGenerator, Dict, Tuple, Optional
 from fastapi import HTTPException
 
 logger = logging.getLogger(__name__)
 
+CLAMD_PING_INTERVAL = 30.0  # Seconds a successful ping stays valid
+INSTREAM_FRAME_SIZE = 128 * 1024  # 128KB INSTREAM frames (must stay < clamd StreamMaxLength)
+
+
+class _ClamdEndpoint:
+    """
+    Process-wide liveness state for one ClamAV host/port.
+    
+    Every INSTREAM scan opens its own socket, so there is nothing to pool;
+    what is worth sharing across the per-request VirusScanService instances
+    is the ping: a successful PING is trusted for CLAMD_PING_INTERVAL
+    seconds, sparing every upload its own probe round trip. A failed scan
+    forces a fresh check on next use.
+    """
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        # Holds no socket: only the address/timeout and the PING command
+        self.client = clamd.ClamdNetworkSocket(host=host, port=port)
+        self._last_ok = 0.0
+
+    def check(self) -> None:
+        """
+        Ensure ClamAV is reachable, pinging only when the last success is stale.
+        
+        Raises:
+            clamd.ConnectionError: If the daemon cannot be reached
+        """
+        if time.monotonic() - self._last_ok < CLAMD_PING_INTERVAL:
+            return
+        self.client.ping()
+        self._last_ok = time.monotonic()
+
+    def instream(self, buff) -> dict:
+        """
+        Scan a file-like object (see _instream). Blocks on socket I/O: call
+        it through asyncio.to_thread from async code.
+        
+        Raises:
+            Same as _instream; any failure also invalidates the last ping
+        """
+        try:
+            return _instream(self.client, buff)
+        except Exception:
+            self._last_ok = 0.0
+            raise
+
+    def instream_file(self, path: str) -> dict:
+        """Scan a file on disk (blocking, like instream)."""
+        with open(path, "rb") as file_handle:
+            return self.instream(file_handle)
+
+
+def _instream(conn: clamd.ClamdNetworkSocket, buff, frame_size: int = INSTREAM_FRAME_SIZE) -> dict:
+    """
+    Scan a file-like object with ClamAV's INSTREAM command.
+    
+    Speaks the wire protocol directly so data is sent in `frame_size` frames
+    (the clamd library hard-codes 1KB frames, i.e. one syscall and length
+    header per KB).
+    
+    Args:
+        conn: Client handle providing host, port and timeout
+        buff: Object with a read(n) method
+        frame_size: Payload bytes per length-prefixed frame
+        
+    Returns:
+        Same shape as clamd's instream(): {"stream": (status, threat)}
+        
+    Raises:
+        clamd.ConnectionError: On socket errors
+        clamd.BufferTooLongError: If the stream exceeds clamd's size limit
+        clamd.ResponseError: On an unparseable reply
+    """
+    try:
+        with socket.create_connection((conn.host, conn.port), timeout=conn.timeout) as sock:
+            sock.sendall(b"zINSTREAM\0")
+            chunk = buff.read(frame_size)
+            while chunk:
+                sock.sendall(struct.pack("!L", len(chunk)) + chunk)
+                chunk = buff.read(frame_size)
+            sock.sendall(struct.pack("!L", 0))
+
+            reply = bytearray()
+            while not reply.endswith(b"\0"):
+                data = sock.recv(4096)
+                if not data:
+                    break
+                reply += data
+    except OSError as e:
+        raise clamd.ConnectionError(f"Error scanning via {conn.host}:{conn.port}: {e}")
+
+    result = reply.rstrip(b"\0").decode("utf-8").strip()
+    if result == "INSTREAM size limit exceeded. ERROR":
+        raise clamd.BufferTooLongError(result)
+    match = clamd.scan_response.match(result)
+    if match is None:
+        raise clamd.ResponseError(result.rsplit("ERROR", 1)[0])
+    return {match.group("path"): (match.group("status"), match.group("virus"))}
+
+
+_endpoints: Dict[Tuple[str, int], _ClamdEndpoint] = {}
+_endpoints_lock = threading.Lock()
+
+
+def _get_endpoint(host: str, port: int) -> _ClamdEndpoint:
+    """Return the shared liveness state for a ClamAV host/port."""
+    key = (host, port)
+    endpoint = _endpoints.get(key)
+    if endpoint is None:
+        with _endpoints_lock:
+            endpoint = _endpoints.get(key)
+            if endpoint is None:
+                endpoint = _endpoints[key] = _ClamdEndpoint(host, port)
+    return endpoint
+
+
+class _ChunkReader:
+    """
+    Minimal read()-only file-like view over a list of byte chunks.
+    
+    clamd's instream() only ever calls read(n), so already-buffered chunks can
+    be served directly without joining them into one contiguous copy.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._view = memoryview(b"")
+        self._offset = 0
+
+    def read(self, size: int = -1) -> bytes:
+        """Return up to `size` bytes (all remaining bytes if size < 0)."""
+        parts = []
+        remaining = size
+        while remaining != 0:
+            available = len(self._view) - self._offset
+            if available == 0:
+                nxt = next(self._chunks, None)
+                if nxt is None:
+                    break
+                self._view = memoryview(nxt)
+                self._offset = 0
+                continue
+            take = available if remaining < 0 else min(available, remaining)
+            parts.append(self._view[self._offset:self._offset + take])
+            self._offset += take
+            if remaining > 0:
+                remaining -= take
+        if len(parts) == 1:
+            return parts[0].tobytes()
+        return b"".join(parts)
+
 
 class VirusScanService:
     """
@@ -31,30 +190,24 @@ class VirusScanService:
         """
         self.clamav_host = clamav_host
         self.clamav_port = clamav_port
-        self.clamd_connection = None
+        self.clamd_connection: Optional[_ClamdEndpoint] = None
         self._initialize_connection()
 
     def _initialize_connection(self):
-        """Initialize connection to ClamAV server."""
+        """Attach to the shared ClamAV endpoint if the daemon is reachable."""
         try:
-            self.clamd_connection = clamd.ClamdNetworkSocket(
-                host=self.clamav_host,
-                port=self.clamav_port
-            )
-            # Test connection
-            if self.clamd_connection.ping():
-                logger.debug(f"✓ ClamAV connected at {self.clamav_host}:{self.clamav_port}")
-            else:
-                logger.warning("ClamAV connection test failed, will retry on use")
+            endpoint = _get_endpoint(self.clamav_host, self.clamav_port)
+            endpoint.check()
+            self.clamd_connection = endpoint
+            logger.debug("✓ ClamAV connected at %s:%s", self.clamav_host, self.clamav_port)
         except Exception as e:
-            logger.warning(f"ClamAV initialization deferred: {e}")
+            logger.warning("ClamAV initialization deferred: %s", e)
             self.clamd_connection = None
 
     async def scan_and_hash_stream(
         self,
         file_stream: AsyncGenerator,
         filename: str,
-        chunk_size: int = 1024 * 1024  # 1MB chunks
     ) -> Tuple[str, str, bool, Optional[str]]:
         """
         Scan file stream for viruses and calculate SHA-256 hash simultaneously.
@@ -69,7 +222,6 @@ class VirusScanService:
         Args:
             file_stream: Async generator yielding file chunks
             filename: Original filename (for logging/reporting)
-            chunk_size: Size of chunks to process (default 1MB)
             
         Returns:
             Tuple of (file_hash, scan_status, is_infected, threat_name)
@@ -120,22 +272,17 @@ class VirusScanService:
 
             # Now scan the temporary file using ClamAV
             try:
-                logger.debug(f"[scan] Scanning {filename}: {total_bytes} bytes via ClamAV from temp file")
+                logger.debug("[scan] Scanning %s: %d bytes via ClamAV from temp file", filename, total_bytes)
                 
                 # ClamAV can scan a file by path (more efficient than instream for large files)
                 # or we can use instream with the file handle
-                with open(temp_path, 'rb') as file_handle:
-                    scan_result = self.clamd_connection.instream(file_handle)
+                # Socket and file reads block: keep them off the event loop
+                scan_result = await asyncio.to_thread(self.clamd_connection.instream_file, temp_path)
                 
             except Exception as scan_error:
-                logger.error(f"ClamAV instream error for {filename}: {scan_error}")
+                logger.error("ClamAV instream error for %s: %s", filename, scan_error)
                 file_hash = sha256_hash.hexdigest()
-                # Clean up temp file on error
-                try:
-                    import os
-                    os.unlink(temp_path)
-                except:
-                    pass
+                # Temp file is removed by the finally block below
                 return file_hash, "error", False, str(scan_error)
 
             # Process ClamAV response
@@ -146,22 +293,22 @@ class VirusScanService:
                 if status == 'OK':
                     scan_status = 'clean'
                     file_hash = sha256_hash.hexdigest()
-                    logger.info(f"[virus_scan] ✓ CLEAN: {filename} ({total_bytes} bytes, hash={file_hash[:16]}...)")
+                    logger.info("[virus_scan] ✓ CLEAN: %s (%d bytes, hash=%.16s...)", filename, total_bytes, file_hash)
 
                 elif status == 'FOUND':
                     is_infected = True
                     threat_name = threat
                     scan_status = 'infected'
                     file_hash = sha256_hash.hexdigest()
-                    logger.warning(f"[virus_scan] 🚨 INFECTED: {filename}, threat='{threat}', hash={file_hash[:16]}...")
+                    logger.warning("[virus_scan] 🚨 INFECTED: %s, threat='%s', hash=%.16s...", filename, threat, file_hash)
 
                 else:
-                    logger.warning(f"[virus_scan] Unexpected ClamAV status for {filename}: {status}")
+                    logger.warning("[virus_scan] Unexpected ClamAV status for %s: %s", filename, status)
                     scan_status = 'error'
                     file_hash = sha256_hash.hexdigest()
 
             else:
-                logger.warning(f"[virus_scan] No scan result received from ClamAV for {filename}")
+                logger.warning("[virus_scan] No scan result received from ClamAV for %s", filename)
                 scan_status = 'error'
                 file_hash = sha256_hash.hexdigest()
 
@@ -169,7 +316,7 @@ class VirusScanService:
 
         except Exception as e:
             file_hash = sha256_hash.hexdigest()
-            logger.error(f"[virus_scan] ERROR scanning {filename}: {str(e)}, hash={file_hash[:16]}...")
+            logger.error("[virus_scan] ERROR scanning %s: %s, hash=%.16s...", filename, e, file_hash)
             # Still calculate hash even if scan fails
             return file_hash, "error", False, str(e)
         
@@ -177,29 +324,27 @@ class VirusScanService:
             # Always clean up temporary file
             if temp_file is not None:
                 try:
-                    import os
                     os.unlink(temp_path)
-                    logger.debug(f"[scan] Cleaned up temporary file: {temp_path}")
+                    logger.debug("[scan] Cleaned up temporary file: %s", temp_path)
                 except Exception as e:
-                    logger.warning(f"[scan] Failed to clean up temp file {temp_path}: {e}")
+                    logger.warning("[scan] Failed to clean up temp file %s: %s", temp_path, e)
 
     async def scan_and_hash_with_stream_passthrough(
         self,
         file_stream: AsyncGenerator,
         filename: str,
-        chunk_size: int = 1024 * 1024
     ) -> Tuple[AsyncGenerator, str, str, bool, Optional[str]]:
         """
         Scan stream AND pass through chunks simultaneously.
         
         This allows you to scan while still processing (e.g., encrypting) the data.
-        Uses temporary file to avoid RAM buildup.
+        Chunks are buffered in memory for the passthrough, so ClamAV reads them
+        directly instead of going through a temporary file.
         Returns both the passthrough stream and scan results.
         
         Args:
             file_stream: Async generator yielding file chunks
             filename: Original filename
-            chunk_size: Size of chunks to process
             
         Returns:
             Tuple of (passthrough_stream, file_hash, scan_status, is_infected, threat_name)
@@ -209,32 +354,24 @@ class VirusScanService:
         threat_name = None
         scan_status = "clean"
         accumulated_chunks = []
-        temp_file = None
 
-        # Consume entire stream first to scan (buffer to disk, not RAM)
+        # Consume entire stream first to scan; chunks are kept in RAM for the passthrough
         try:
             if not self.clamd_connection:
                 self._initialize_connection()
 
-            if self.clamd_connection:
-                # Create temporary file for streaming chunks
-                temp_file = tempfile.NamedTemporaryFile(delete=False, prefix=f"scan_{filename}_")
-                temp_path = temp_file.name
-                temp_file.close()
-                
-                # Stream to temp file and accumulate for passthrough
-                async with aiofiles.open(temp_path, mode='wb') as f:
-                    async for chunk in file_stream:
-                        if not chunk:
-                            break
-                        sha256_hash.update(chunk)
-                        accumulated_chunks.append(chunk)
-                        await f.write(chunk)
+            async for chunk in file_stream:
+                if not chunk:
+                    break
+                sha256_hash.update(chunk)
+                accumulated_chunks.append(chunk)
 
-                # Scan the temporary file
+            if self.clamd_connection:
+                # Scan straight from the buffered chunks (no temp file, no joined copy)
                 try:
-                    with open(temp_path, 'rb') as file_handle:
-                        scan_result = self.clamd_connection.instream(file_handle)
+                    scan_result = await asyncio.to_thread(
+                        self.clamd_connection.instream, _ChunkReader(accumulated_chunks)
+                    )
 
                     if scan_result and 'stream' in scan_result:
                         status, threat = scan_result['stream']
@@ -245,27 +382,12 @@ class VirusScanService:
                             threat_name = threat
                             scan_status = 'infected'
                 except Exception as scan_error:
-                    logger.error(f"ClamAV scan error for passthrough: {scan_error}")
+                    logger.error("ClamAV scan error for passthrough: %s", scan_error)
                     scan_status = "error"
-            else:
-                # ClamAV unavailable, just accumulate chunks
-                async for chunk in file_stream:
-                    if chunk:
-                        sha256_hash.update(chunk)
-                        accumulated_chunks.append(chunk)
 
         except Exception as e:
-            logger.error(f"Passthrough scan error: {e}")
+            logger.error("Passthrough scan error: %s", e)
             scan_status = "error"
-        
-        finally:
-            # Clean up temporary file
-            if temp_file is not None:
-                try:
-                    import os
-                    os.unlink(temp_path)
-                except Exception as e:
-                    logger.warning(f"Failed to clean up temp file: {e}")
 
         # Create passthrough generator from accumulated chunks
         async def passthrough_generator():
@@ -2,51 +2,182 @@
 Database connections for both MongoDB (GridFS) and PostgreSQL (Sharing data)
 """
 
+import asyncio
 import logging
 import os
-from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorGridFSBucket
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from functools import lru_cache
+from typing import TYPE_CHECKING
 from app.core.config import settings
+from app.domain.entities import _utcnow
+
+if TYPE_CHECKING:
+    from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorGridFSBucket
 
 logger = logging.getLogger(__name__)
 
 # ============================================================================
 # MongoDB Configuration (for GridFS file storage)
 # ============================================================================
-mongo_client: AsyncIOMotorClient = None
+mongo_client: "AsyncIOMotorClient" = None
 db = None
-fs: AsyncIOMotorGridFSBucket = None
+fs: "AsyncIOMotorGridFSBucket" = None
 
 
 async def connect_to_mongo():
-    """Connect to MongoDB on startup"""
+    """Connect to MongoDB on startup (no-op if this process is already connected)"""
     global mongo_client, db, fs
+    from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorGridFSBucket
+    
+    if mongo_client is not None:
+        return
     
     try:
-        mongo_client = AsyncIOMotorClient(settings.mongo_url)
+        mongo_client = AsyncIOMotorClient(
+            settings.mongo_url,
+            maxPoolSize=settings.mongo_max_pool_size,
+            minPoolSize=settings.mongo_min_pool_size,
+            maxIdleTimeMS=settings.mongo_max_idle_time_ms,
+            compressors=settings.mongo_compressors,
+            retryWrites=True,
+        )
         db = mongo_client[settings.mongo_db_name]
-        fs = AsyncIOMotorGridFSBucket(db)
+        fs = AsyncIOMotorGridFSBucket(db, chunk_size_bytes=settings.gridfs_chunk_size)
         
         # Test connection
         await db.command("ping")
         logger.info(f"✓ Connected to MongoDB: {settings.mongo_db_name}")
+
+        # Warm the pool: concurrent pings force min_pool_size sockets to open (TLS/auth
+        # handshakes happen now instead of on the first requests)
+        await asyncio.gather(*(db.command("ping") for _ in range(settings.mongo_min_pool_size)))
+
+        await _ensure_indexes(db)
+        await _apply_migrations(db)
         
     except Exception as e:
         logger.error(f"✗ Failed to connect to MongoDB: {e}")
+        # Don't leave a half-initialized client (and its pool) behind for the next attempt
+        await close_mongo_connection()
         raise
 
 
+async def _ensure_indexes(database):
+    """Create the indexes behind the hot listing queries (no-op if they already exist)"""
+    # Listing queries hint() these key patterns, so they are defined once
+    from app.infrastructure.database.mongo_repository import (
+        FILE_FOLDER_INDEX,
+        FILE_LISTING_INDEX,
+        FOLDER_LISTING_INDEX,
+        FOLDER_TREE_INDEX,
+    )
+
+    fs_files = database["fs.files"]
+    folders = database["folders"]
+
+    # Hinted indexes are required: MongoDB fails any query whose hint names a
+    # missing index, so failing to create one must abort startup
+
+    # Owner listings by folder excluding trash, newest first (prefix also
+    # serves owner-only and owner+folder queries)
+    await fs_files.create_index(FILE_LISTING_INDEX)
+    await fs_files.create_index(FILE_FOLDER_INDEX)
+    # Folder listings by owner + parent, newest first
+    await folders.create_index(FOLDER_LISTING_INDEX)
+    # Subtree walks (children of a level, optionally one owner's) as a
+    # covered index scan
+    await folders.create_index(FOLDER_TREE_INDEX)
+
+    try:
+        # Trash listing / empty trash: owner + is_deleted, newest first
+        await fs_files.create_index(
+            [("metadata.owner", 1), ("metadata.is_deleted", 1), ("uploadDate", -1)]
+        )
+        # Superseded by the is_deleted-aware listing index above
+        await _drop_index_if_exists(fs_files, "metadata.owner_1_metadata.folder_id_1_uploadDate_-1")
+        # GridFS's own indexes; uploads bypass GridIn (which would create them)
+        await fs_files.create_index([("filename", 1), ("uploadDate", 1)])
+        await database["fs.chunks"].create_index([("files_id", 1), ("n", 1)], unique=True)
+
+        # Superseded by the created_at-aware listing index above
+        await _drop_index_if_exists(folders, "owner_id_1_parent_id_1")
+        # Prefix of the tree index above
+        await _drop_index_if_exists(folders, "parent_id_1")
+        # Subtree queries: anchored prefix match on the materialized path
+        await folders.create_index([("owner_id", 1), ("path", 1)])
+        logger.info("✓ MongoDB indexes ensured")
+
+    except Exception as e:
+        # The remaining indexes only cost query speed; don't block startup on them
+        logger.warning(f"Could not ensure MongoDB indexes: {e}")
+
+
+async def _apply_migrations(database):
+    """Run the one-time data migrations not yet recorded in the migrations collection"""
+    applied = database["migrations"]
+    for name, migrate in _MIGRATIONS:
+        try:
+            if await applied.find_one({"_id": name}, {"_id": 1}):
+                continue
+            # Migrations are idempotent: workers starting together may both run one
+            await migrate(database)
+            await applied.update_one(
+                {"_id": name},
+                {"$setOnInsert": {"applied_at": _utcnow()}},
+                upsert=True,
+            )
+            logger.info(f"✓ Applied migration {name}")
+        except Exception as e:
+            # Retried on the next startup; later migrations may depend on this one
+            logger.warning(f"Migration {name} failed: {e}")
+            break
+
+
+async def _default_file_is_deleted(database):
+    """Store is_deleted=False on files written before it was always set"""
+    await database["fs.files"].update_many(
+        {"metadata.is_deleted": {"$exists": False}},
+        {"$set": {"metadata.is_deleted": False}},
+    )
+
+
+async def _normalize_root_folder_id(database):
+    """Store folder_id=None on root files saved with an empty or missing folder_id"""
+    await database["fs.files"].update_many(
+        {"$or": [{"metadata.folder_id": ""}, {"metadata.folder_id": {"$exists": False}}]},
+        {"$set": {"metadata.folder_id": None}},
+    )
+
+
+# (name, coroutine function) in the order they must run; never rename or
+# reorder applied entries
+_MIGRATIONS = [
+    ("fs_files_is_deleted_default", _default_file_is_deleted),
+    ("fs_files_root_folder_id_null", _normalize_root_folder_id),
+]
+
+
+async def _drop_index_if_exists(collection, name: str):
+    """Drop an obsolete index by name (ignored if it is already gone)"""
+    try:
+        await collection.drop_index(name)
+        logger.info(f"✓ Dropped obsolete index {name}")
+    except Exception:
+        pass
+
+
 async def close_mongo_connection():
     """Close MongoDB connection on shutdown"""
-    global mongo_client
+    global mongo_client, db, fs
     
     if mongo_client:
         mongo_client.close()
         logger.info("✓ Closed MongoDB connection")
+    mongo_client = None
+    db = None
+    fs = None
 
 
-def get_fs() -> AsyncIOMotorGridFSBucket:
+def get_fs() -> "AsyncIOMotorGridFSBucket":
     """Get GridFS bucket instance"""
     if fs is None:
         raise RuntimeError("GridFS not initialized. Did you call connect_to_mongo()?")
@@ -63,19 +194,75 @@ def get_mongo_db():
 # ============================================================================
 # PostgreSQL Configuration (for sharing permissions, sessions, etc.)
 # ============================================================================
-DATABASE_URL = (
-    f"postgresql://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}"
-    f"@{os.getenv('POSTGRES_HOST')}:{os.getenv('POSTGRES_PORT')}/{os.getenv('POSTGRES_DB')}"
-)
+# Nothing here runs at import: the URL is read from the environment and the
+# engine/pool is created on first use. Module attributes (DATABASE_URL, engine,
+# SessionLocal, Base) resolve through PEP 562 __getattr__; values assigned
+# directly on the module (e.g. by tests) take precedence.
+_SQL_ATTRS = {
+    "DATABASE_URL": "_get_database_url",
+    "engine": "_get_engine",
+    "SessionLocal": "_get_session_factory",
+    "Base": "_get_base",
+}
+
+
+def _get_database_url() -> str:
+    """Assemble the PostgreSQL URL from the POSTGRES_* environment variables."""
+    return (
+        f"postgresql://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}"
+        f"@{os.getenv('POSTGRES_HOST')}:{os.getenv('POSTGRES_PORT')}/{os.getenv('POSTGRES_DB')}"
+    )
+
+
+@lru_cache(maxsize=1)
+def _get_engine():
+    """Create the process-wide SQLAlchemy engine on first use."""
+    from sqlalchemy import create_engine
+
+    return create_engine(
+        _get_database_url(),
+        future=True,
+        pool_pre_ping=True,
+        pool_size=settings.postgres_pool_size,
+    )
+
 
-engine = create_engine(DATABASE_URL, future=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
+@lru_cache(maxsize=1)
+def _get_session_factory():
+    """Create the session factory bound to the engine on first use."""
+    from sqlalchemy.orm import sessionmaker
+
+    return sessionmaker(autocommit=False, autoflush=False, bind=_sql("engine"))
+
+
+@lru_cache(maxsize=1)
+def _get_base():
+    """Create the declarative base (does not touch the engine)."""
+    from sqlalchemy.orm import DeclarativeBase
+
+    class Base(DeclarativeBase):
+        pass
+
+    return Base
+
+
+def _sql(name: str):
+    """Return a module-level override if one was assigned, else the lazy default."""
+    value = globals().get(name)
+    if value is None:
+        value = globals()[_SQL_ATTRS[name]]()
+    return value
+
+
+def __getattr__(name: str):
+    if name in _SQL_ATTRS:
+        return _sql(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def get_db():
     """FastAPI dependency for PostgreSQL database session"""
-    db_session = SessionLocal()
+    db_session = _sql("SessionLocal")()
     try:
         yield db_session
     finally:
@@ -84,5 +271,4 @@ def get_db():
 
 def init_db():
     """Create all PostgreSQL tables"""
-    Base.metadata.create_all(bind=engine)
-
+    _sql("Base").metadata.create_all(bind=_sql("engine"))
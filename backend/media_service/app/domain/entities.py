@@ -3,12 +3,18 @@ Domain entities for the media service.
 Pure Python objects independent of technology choices (MongoDB, GridFS, encryption libs).
 """
 
-from dataclasses import dataclass, field
-from datetime import datetime
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timezone
+from operator import attrgetter
 from typing import Optional, Dict, Any, List
 
 
-@dataclass
+def _utcnow() -> datetime:
+    """Current UTC time as a naive datetime (matches what PyMongo returns on read)."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+@dataclass(slots=True)
 class File:
     """
     Pure domain entity representing a file in the system.
@@ -40,29 +46,28 @@ class File:
     def __post_init__(self):
         """Initialize datetime if not provided"""
         if self.upload_date is None:
-            self.upload_date = datetime.utcnow()
+            self.upload_date = _utcnow()
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert entity to dictionary"""
-        return {
-            "id": self.id,
-            "filename": self.filename,
-            "content_type": self.content_type,
-            "size": self.size,
-            "owner_id": self.owner_id,
-            "folder_id": self.folder_id,
-            "upload_date": self.upload_date,
-            "encrypted": self.encrypted,
-            "nonce": self.nonce,
-            "encrypted_key": self.encrypted_key,
-            "is_infected": self.is_infected,
-            "is_deleted": self.is_deleted,
-            "deleted_at": self.deleted_at,
-            "metadata": self.metadata,
-        }
+        return dict(zip(_FILE_FIELDS, _get_file_values(self)))
+
+    def etag(self) -> str:
+        """
+        Strong HTTP entity tag for the file content.
+        Stored content never changes for a given id, so id, size and upload
+        time identify it.
+        """
+        uploaded = int(self.upload_date.timestamp()) if self.upload_date else 0
+        return f'"{self.id}-{self.size:x}-{uploaded:x}"'
+
 
+# Field names and a C-level getter, computed once for File.to_dict
+_FILE_FIELDS = tuple(f.name for f in fields(File))
+_get_file_values = attrgetter(*_FILE_FIELDS)
 
-@dataclass
+
+@dataclass(slots=True)
 class Folder:
     """
     Pure domain entity representing a folder in the file system.
@@ -75,28 +80,57 @@ class Folder:
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
     path: List[Dict[str, str]] = field(default_factory=list)  # Breadcrumb: [{"id": "...", "name": "..."}]
+    tree_path: str = ""  # Materialized path: "/root_id/.../self_id" (set by the repository)
     metadata: Dict[str, Any] = field(default_factory=dict)
 
     def __post_init__(self):
         """Initialize timestamps if not provided"""
-        if self.created_at is None:
-            self.created_at = datetime.utcnow()
-        if self.updated_at is None:
-            self.updated_at = datetime.utcnow()
+        if self.created_at is None or self.updated_at is None:
+            now = _utcnow()
+            if self.created_at is None:
+                self.created_at = now
+            if self.updated_at is None:
+                self.updated_at = now
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert entity to dictionary"""
-        return {
-            "id": self.id,
-            "name": self.name,
-            "owner_id": self.owner_id,
-            "parent_id": self.parent_id,
-            "created_at": self.created_at,
-            "updated_at": self.updated_at,
-            "path": self.path,
-            "metadata": self.metadata,
-        }
+        return dict(zip(_FOLDER_FIELDS, _get_folder_values(self)))
 
     def is_root(self) -> bool:
         """Check if this is a root folder"""
         return self.parent_id is None
+
+
+# Field names and a C-level getter, computed once for Folder.to_dict
+_FOLDER_FIELDS = tuple(f.name for f in fields(Folder))
+_get_folder_values = attrgetter(*_FOLDER_FIELDS)
+
+
+@dataclass(slots=True)
+class ActivityDetails:
+    """
+    Typed details for the common file activity events.
+    Unset (None) core fields are left out of the serialized payload;
+    event-specific values go in extra.
+    """
+    file_id: Optional[str] = None
+    filename: Optional[str] = None
+    size: Optional[int] = None
+    content_type: Optional[str] = None
+    folder_id: Optional[str] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert details to the activity log payload dictionary"""
+        details = {
+            name: value
+            for name, value in zip(_ACTIVITY_CORE_FIELDS, _get_activity_core_values(self))
+            if value is not None
+        }
+        details.update(self.extra)
+        return details
+
+
+# Core field names and a C-level getter, computed once for ActivityDetails.to_dict
+_ACTIVITY_CORE_FIELDS = tuple(f.name for f in fields(ActivityDetails) if f.name != "extra")
+_get_activity_core_values = attrgetter(*_ACTIVITY_CORE_FIELDS)
@@ -4,9 +4,11 @@ Define WHAT needs to happen without specifying HOW.
 Implementations are in the infrastructure layer.
 """
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import AsyncGenerator, Optional, Tuple, List, Dict, Any
-from app.domain.entities import File, Folder
+from concurrent.futures import Executor
+from typing import AsyncIterable, AsyncIterator, Optional, Tuple, List, Dict, Any, Union
+from app.domain.entities import ActivityDetails, File, Folder
 
 
 class IFileRepository(ABC):
@@ -19,14 +21,21 @@ class IFileRepository(ABC):
     async def save_file_stream(
         self,
         file: File,
-        stream: AsyncGenerator,
+        stream: AsyncIterable[bytes],
+        *,
+        prefetch: Optional[int] = None,
     ) -> str:
         """
         Save a file and its metadata to storage.
         
         Args:
             file: Domain entity with file metadata
-            stream: Async generator yielding file chunks
+            stream: Async iterable yielding file chunks, ideally sized to the
+                storage chunk size (settings.gridfs_chunk_size) so each write
+                maps to one stored chunk
+            prefetch: Chunks to pull from stream ahead of the storage writes,
+                so producing (read + encrypt) overlaps writing
+                (None = implementation default, 0 = off)
             
         Returns:
             file_id (str): The identifier of the saved file
@@ -46,22 +55,108 @@ class IFileRepository(ABC):
         """
         pass
 
+    async def invalidate_metadata(self, file_id: str) -> None:
+        """
+        Drop any cached metadata for a file.
+        Implementations may cache get_file_metadata results; every method
+        that changes or removes a file must then call this for it. The
+        default (no cache) does nothing.
+        
+        Args:
+            file_id: The file identifier
+        """
+        return None
+
+    async def get_files_metadata(self, file_ids: List[str]) -> Dict[str, File]:
+        """
+        Retrieve metadata for many files at once.
+        Implementations should override this with a single bulk query; the
+        default looks each file up individually.
+        
+        Args:
+            file_ids: The file identifiers
+            
+        Returns:
+            Dict of file_id -> File entity (missing files are omitted)
+        """
+        files = {}
+        for file_id in file_ids:
+            file = await self.get_file_metadata(file_id)
+            if file:
+                files[file_id] = file
+        return files
+
     @abstractmethod
     async def get_file_stream(
         self,
         file_id: str,
-    ) -> Tuple[Optional[File], Optional[AsyncGenerator]]:
+        *,
+        prefetch: Optional[int] = None,
+    ) -> Tuple[Optional[File], Optional[AsyncIterator[bytes]]]:
         """
         Retrieve file metadata and content stream.
         
         Args:
             file_id: The file identifier
+            prefetch: Chunks to read ahead of the consumer, so storage reads
+                overlap decryption and sending (None = implementation
+                default, 0 = off)
             
         Returns:
             Tuple of (File entity, async generator of chunks) or (None, None) if not found
         """
         pass
 
+    async def get_file_range(
+        self,
+        file_id: str,
+        start: int,
+        end: int,
+    ) -> Tuple[Optional[File], Optional[AsyncIterator[bytes]]]:
+        """
+        Retrieve file metadata and the stored bytes start..end (inclusive).
+        Implementations should seek to the chunk containing start instead of
+        reading from the beginning; the default skips through get_file_stream.
+        
+        Args:
+            file_id: The file identifier
+            start: First byte offset
+            end: Last byte offset (inclusive, clamped to the file size)
+            
+        Returns:
+            Tuple of (File entity, async generator of chunks) or (None, None) if not found
+        """
+        file, stream = await self.get_file_stream(file_id)
+        if not stream:
+            return file, None
+
+        async def range_generator():
+            position = 0
+            async for chunk in stream:
+                chunk_end = position + len(chunk)
+                if chunk_end > start:
+                    yield chunk[max(start - position, 0):end + 1 - position]
+                position = chunk_end
+                if position > end:
+                    break
+
+        return file, range_generator()
+
+    async def get_file_sendfile(self, file_id: str) -> Optional[Tuple[File, int, int, int]]:
+        """
+        Zero-copy fast path for plaintext content that lives in a local file.
+        Callers can hand the descriptor to os.sendfile (e.g. FileResponse)
+        and must fall back to get_file_stream when this returns None.
+        
+        Args:
+            file_id: The file identifier
+            
+        Returns:
+            Tuple of (File entity, fd, offset, length), or None when the
+            backend cannot serve the file from a local descriptor (default)
+        """
+        return None
+
     @abstractmethod
     async def delete(self, file_id: str) -> bool:
         """
@@ -75,25 +170,117 @@ class IFileRepository(ABC):
         """
         pass
 
+    async def copy_file(
+        self,
+        file_id: str,
+        new_owner_id: str,
+        folder_id: Optional[str] = None,
+    ) -> Optional[str]:
+        """
+        Copy a file (content and encryption metadata) to a new owner/folder.
+        Implementations should copy server-side so no bytes pass through
+        the service; the default streams the content back through it.
+        
+        Args:
+            file_id: The source file identifier
+            new_owner_id: Owner of the copy
+            folder_id: Folder for the copy (None = root)
+            
+        Returns:
+            The new file identifier, or None if the source was not found
+        """
+        source, stream = await self.get_file_stream(file_id)
+        if not source:
+            return None
+        copy = File(
+            filename=source.filename,
+            content_type=source.content_type,
+            owner_id=new_owner_id,
+            folder_id=folder_id,
+            encrypted=source.encrypted,
+            nonce=source.nonce,
+            encrypted_key=source.encrypted_key,
+            is_infected=source.is_infected,
+        )
+        return await self.save_file_stream(copy, stream)
+
+    async def delete_batch(self, file_ids: List[str]) -> int:
+        """
+        Delete many files at once.
+        Implementations should override this with a bulk operation; the
+        default deletes one file at a time.
+        
+        Args:
+            file_ids: The file identifiers
+            
+        Returns:
+            Number of files deleted
+        """
+        deleted = 0
+        for file_id in file_ids:
+            if await self.delete(file_id):
+                deleted += 1
+        return deleted
+
     @abstractmethod
-    async def list_by_owner(self, owner_id: str, folder_id: Optional[str] = None) -> List[File]:
+    async def list_by_owner(
+        self,
+        owner_id: str,
+        folder_id: Optional[str] = None,
+        *,
+        limit: Optional[int] = None,
+        after_id: Optional[str] = None,
+    ) -> List[File]:
         """
         List all files owned by a user, optionally filtered by folder.
+        Implementations must serve this from an (owner, folder, deleted flag,
+        upload date) index rather than a collection scan.
         
         Args:
             owner_id: The owner's identifier
             folder_id: Optional folder ID to filter by (None = root files only)
+            limit: Optional maximum number of files to return (page size)
+            after_id: Optional file ID to resume after (keyset pagination;
+                pages are ordered by file ID)
             
         Returns:
             List of File entities
         """
         pass
 
+    async def iter_by_owner(
+        self,
+        owner_id: str,
+        folder_id: Optional[str] = None,
+        *,
+        limit: Optional[int] = None,
+        after_id: Optional[str] = None,
+    ) -> AsyncIterator[File]:
+        """
+        Stream the files list_by_owner would return, one at a time.
+        Implementations should yield straight from the database cursor so
+        callers can start processing before the whole result is fetched;
+        the default iterates over list_by_owner.
+        
+        Args:
+            owner_id: The owner's identifier
+            folder_id: Optional folder ID to filter by (None = root files only)
+            limit: Optional maximum number of files to yield
+            after_id: Optional file ID to resume after
+            
+        Yields:
+            File entities
+        """
+        for file in await self.list_by_owner(owner_id, folder_id, limit=limit, after_id=after_id):
+            yield file
+
 
 class ICryptoService(ABC):
     """
     Abstract contract for file encryption/decryption.
     Implementations can use AES, ChaCha20, etc.
+    Stream methods must build one cipher context per stream and reuse it for
+    every chunk (never a new context per chunk).
     """
 
     @abstractmethod
@@ -109,17 +296,23 @@ class ICryptoService(ABC):
     @abstractmethod
     def encrypt_stream(
         self,
-        stream: AsyncGenerator,
+        stream: AsyncIterable[bytes],
         file_key: bytes,
         nonce: bytes,
-    ) -> AsyncGenerator:
+        chunk_size: Optional[int] = None,
+        executor: Optional[Executor] = None,
+    ) -> AsyncIterator[bytes]:
         """
         Create an async generator that encrypts chunks on-the-fly.
         
         Args:
-            stream: Input async generator yielding plaintext chunks
+            stream: Input async iterable yielding plaintext chunks
             file_key: Key for encryption
             nonce: Nonce/IV for encryption
+            chunk_size: Optional minimum block size per cipher call; smaller
+                input chunks are coalesced up to it (None = as received)
+            executor: Executor for the cipher work on large blocks, keeping
+                it off the event loop (None = the loop's default executor)
             
         Yields:
             Encrypted chunks
@@ -129,17 +322,26 @@ class ICryptoService(ABC):
     @abstractmethod
     def decrypt_stream(
         self,
-        stream: AsyncGenerator,
+        stream: AsyncIterable[bytes],
         file_key: bytes,
         nonce: bytes,
-    ) -> AsyncGenerator:
+        chunk_size: Optional[int] = None,
+        executor: Optional[Executor] = None,
+        offset: int = 0,
+    ) -> AsyncIterator[bytes]:
         """
         Create an async generator that decrypts chunks on-the-fly.
         
         Args:
-            stream: Input async generator yielding ciphertext chunks
+            stream: Input async iterable yielding ciphertext chunks
             file_key: Key for decryption
             nonce: Nonce/IV for decryption
+            chunk_size: Optional minimum block size per cipher call; smaller
+                input chunks are coalesced up to it (None = as received)
+            executor: Executor for the cipher work on large blocks, keeping
+                it off the event loop (None = the loop's default executor)
+            offset: Position of the stream's first byte within the whole
+                ciphertext, for decrypting a byte range (0 = from the start)
             
         Yields:
             Decrypted chunks
@@ -172,11 +374,45 @@ class ICryptoService(ABC):
         """
         pass
 
+    def wrap_keys(self, file_keys: List[bytes]) -> List[bytes]:
+        """
+        Wrap several file keys at once.
+        Implementations should override this to reuse one cipher context;
+        the default wraps each key individually.
+        
+        Args:
+            file_keys: The file-specific keys
+            
+        Returns:
+            Encrypted keys, in the same order
+        """
+        return [self.wrap_key(file_key) for file_key in file_keys]
+
+    def unwrap_keys(self, encrypted_keys: List[bytes]) -> List[bytes]:
+        """
+        Unwrap several file keys at once.
+        
+        Args:
+            encrypted_keys: The encrypted keys
+            
+        Returns:
+            Decrypted keys, in the same order
+        """
+        return [self.unwrap_key(encrypted_key) for encrypted_key in encrypted_keys]
+
+    def prepare(self) -> None:
+        """
+        Run expensive one-time setup (e.g. master key schedule) at startup
+        so the first request does not pay for it. Default: nothing to do.
+        """
+
 
 class IEventPublisher(ABC):
     """
     Abstract contract for publishing file events (async messaging).
     Implementations can use RabbitMQ, Kafka, SNS, etc.
+    Broker-backed publishers should be wrapped in a process-wide
+    QueuedEventPublisher so request handlers never wait on the broker.
     """
 
     @abstractmethod
@@ -214,11 +450,35 @@ class IEventPublisher(ABC):
         """
         pass
 
+    async def publish_batch(self, events: List[Tuple[str, str, str, int]]) -> None:
+        """
+        Publish several file events in one call.
+        Implementations should override this to send the batch in a single
+        round trip (e.g. one publisher confirm); the default publishes
+        each event individually.
+        
+        Args:
+            events: (event_type, user_id, file_id, file_size) tuples, where
+                event_type is "upload", "delete" or "download" (file_size
+                is ignored for downloads)
+        """
+        for event_type, user_id, file_id, file_size in events:
+            if event_type == "upload":
+                await self.publish_upload(user_id, file_id, file_size)
+            elif event_type == "delete":
+                await self.publish_delete(user_id, file_id, file_size)
+            elif event_type == "download":
+                await self.publish_download(user_id, file_id)
+            else:
+                raise ValueError(f"Unknown event type: {event_type}")
+
 
 class IQuotaRepository(ABC):
     """
     Abstract contract for updating user storage quota.
     Implementations can use HTTP calls, direct DB access, messaging, etc.
+    Remote implementations must cap their in-flight requests process-wide
+    (instances are created per request).
     """
 
     @abstractmethod
@@ -235,11 +495,34 @@ class IQuotaRepository(ABC):
         """
         pass
 
+    async def batch_update_usage(self, deltas: Dict[str, int]) -> Dict[str, int]:
+        """
+        Apply quota changes for several users.
+        Callers should coalesce deltas per user first; implementations with a
+        bulk endpoint should override this with a single call. The default
+        issues one concurrent update per user (zero deltas are skipped).
+        
+        Args:
+            deltas: user_id -> size change in bytes
+            
+        Returns:
+            The deltas known not to have been applied, which the caller may
+            retry (the default reports none)
+        """
+        await asyncio.gather(*(
+            self.update_usage(user_id, size_delta)
+            for user_id, size_delta in deltas.items()
+            if size_delta
+        ))
+        return {}
+
 
 class IActivityLogger(ABC):
     """
     Abstract contract for logging user activities to the Auth Service.
     Implementations can use HTTP calls, direct DB access, messaging, etc.
+    Remote implementations must cap their in-flight requests process-wide
+    (instances are created per request).
     """
 
     @abstractmethod
@@ -247,7 +530,7 @@ class IActivityLogger(ABC):
         self,
         user_id: str,
         action: str,
-        details: Dict[str, Any] = None,
+        details: Union[ActivityDetails, Dict[str, Any], None] = None,
         ip_address: Optional[str] = None,
     ) -> None:
         """
@@ -258,7 +541,8 @@ class IActivityLogger(ABC):
         Args:
             user_id: The user who performed the action
             action: Action type (e.g., "FILE_UPLOAD", "FILE_DELETE")
-            details: Optional context data (filename, size, etc.)
+            details: Optional context data (ActivityDetails, or a dict for
+                ad-hoc events)
             ip_address: Optional client IP address
         """
         pass
@@ -268,6 +552,11 @@ class IFolderRepository(ABC):
     """
     Abstract contract for folder storage and management.
     Supports hierarchical folder structure with parent_id pattern.
+
+    Implementations must also maintain each folder's materialized path
+    (Folder.tree_path) of the form "/root_id/child_id/.../self_id", set on
+    create and rewritten for the whole subtree when a folder moves, so
+    subtree reads need a single prefix query instead of a recursive walk.
     """
 
     @abstractmethod
@@ -297,6 +586,29 @@ class IFolderRepository(ABC):
         """
         pass
 
+    async def get_folders_by_ids(
+        self,
+        folder_ids: List[str],
+        owner_id: str,
+    ) -> Dict[str, "Folder"]:
+        """
+        Get several folders at once (e.g. every ancestor on a path).
+        Implementations should answer with a single query; the default
+        calls get_folder once per folder, concurrently.
+        
+        Args:
+            folder_ids: Folder identifiers
+            owner_id: The owner (for verification)
+            
+        Returns:
+            Dict mapping folder_id -> Folder for the folders that exist and
+            are owned (metadata may not be loaded)
+        """
+        folders = await asyncio.gather(
+            *(self.get_folder(folder_id, owner_id) for folder_id in folder_ids)
+        )
+        return {folder.id: folder for folder in folders if folder is not None}
+
     @abstractmethod
     async def list_folders(
         self,
@@ -315,6 +627,26 @@ class IFolderRepository(ABC):
         """
         pass
 
+    async def iter_folders(
+        self,
+        owner_id: str,
+        parent_id: Optional[str] = None,
+    ) -> AsyncIterator["Folder"]:
+        """
+        Stream the folders list_folders would return, one at a time.
+        Implementations should yield straight from the database cursor;
+        the default iterates over list_folders.
+        
+        Args:
+            owner_id: The owner's identifier
+            parent_id: Optional parent folder ID (None = root folders)
+            
+        Yields:
+            Folder entities
+        """
+        for folder in await self.list_folders(owner_id, parent_id):
+            yield folder
+
     @abstractmethod
     async def update_folder(self, folder: "Folder") -> bool:
         """
@@ -355,3 +687,66 @@ class IFolderRepository(ABC):
         """
         pass
 
+    async def list_folders_subtree(self, owner_id: str, root_path: str) -> List["Folder"]:
+        """
+        List a folder and all its descendants by materialized path.
+        Implementations should answer with a single prefix query; the
+        default walks the tree one level at a time through list_folders.
+        
+        Args:
+            owner_id: The owner's identifier
+            root_path: tree_path of the subtree root
+            
+        Returns:
+            List of Folder entities (root included)
+        """
+        root_id = root_path.rstrip("/").rsplit("/", 1)[-1]
+        root = await self.get_folder(root_id, owner_id) if root_id else None
+        if root is None:
+            return []
+
+        subtree = [root]
+        level = [root]
+        while level:
+            children = await asyncio.gather(
+                *(self.list_folders(owner_id, folder.id) for folder in level)
+            )
+            level = [child for batch in children for child in batch]
+            subtree.extend(level)
+        return subtree
+
+    @abstractmethod
+    async def tree_delete(self, folder_id: str, owner_id: str) -> Tuple[int, int]:
+        """
+        Delete a folder, all descendant folders and every file inside them
+        using bulk operations (no per-node deletes).
+        Required: FolderService.delete_folder_recursive relies on it, and
+        the file deletes need storage access the other contract methods
+        do not expose, so there is no generic default.
+        
+        Args:
+            folder_id: Root of the subtree to delete
+            owner_id: The owner (for verification)
+            
+        Returns:
+            Tuple of (files_deleted, bytes_freed); (0, 0) if not found/not owned
+        """
+        pass
+
+    async def get_folder_contents_sizes(self, folder_ids: List[str]) -> Dict[str, int]:
+        """
+        Get total file size for several folders at once.
+        Implementations should answer with a single grouped query; the
+        default calls get_folder_contents_size once per folder.
+        
+        Args:
+            folder_ids: Folder identifiers
+            
+        Returns:
+            Dict mapping folder_id -> total size in bytes (0 for empty folders)
+        """
+        sizes = await asyncio.gather(
+            *(self.get_folder_contents_size(folder_id) for folder_id in folder_ids)
+        )
+        return dict(zip(folder_ids, sizes))
+
@@ -0,0 +1,148 @@
+"""
+Process-wide TTL + LRU caches for file and folder metadata.
+Repositories are built per request, so the caches live at module level and
+are shared by every repository instance in the process. Writers must
+invalidate the entries they change after the write; readers take a
+generation() before querying and pass it to put() so a fill that raced an
+invalidation is dropped. The TTL bounds how long other worker processes can
+serve a stale entry.
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Callable, Iterable, Optional, Tuple, Union
+
+from app.core.config import settings
+from app.domain.entities import File, Folder
+
+Entity = Union[File, Folder]
+Generation = Tuple[int, int]
+
+
+def _copy_file(file: File) -> File:
+    """Copy a File deep enough that callers cannot reach cached state."""
+    return replace(file, metadata=dict(file.metadata))
+
+
+def _copy_folder(folder: Folder) -> Folder:
+    """Copy a Folder deep enough that callers cannot reach cached state."""
+    return replace(folder, path=list(folder.path), metadata=dict(folder.metadata))
+
+
+class MetadataCache:
+    """
+    Least-recently-used cache of entities with a per-entry time to live.
+    Entries are copied on the way in and out so callers cannot mutate
+    cached state.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        copy: Callable[[Entity], Entity] = _copy_file,
+    ):
+        """
+        Initialize an empty cache.
+
+        Args:
+            maxsize: Maximum number of entries (0 disables caching)
+            ttl: Seconds an entry stays valid (0 disables caching)
+            copy: Copies an entity (File entities by default)
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._copy = copy
+        self._entries: "OrderedDict[str, Tuple[float, Entity]]" = OrderedDict()
+        # Per-id invalidation counters (bounded like the entries); forgetting
+        # one bumps the epoch, which invalidates every generation handed out
+        self._generations: "OrderedDict[str, int]" = OrderedDict()
+        self._epoch = 0
+
+    @property
+    def enabled(self) -> bool:
+        """True when entries are actually kept."""
+        return self.maxsize > 0 and self.ttl > 0
+
+    def get(self, entity_id: str) -> Optional[Entity]:
+        """
+        Return a copy of the cached entity, or None on a miss or expiry.
+
+        Args:
+            entity_id: The file or folder identifier
+
+        Returns:
+            Cached entity or None
+        """
+        entry = self._entries.get(entity_id)
+        if entry is None:
+            return None
+        expires_at, entity = entry
+        if expires_at < time.monotonic():
+            del self._entries[entity_id]
+            return None
+        self._entries.move_to_end(entity_id)
+        return self._copy(entity)
+
+    def generation(self, entity_id: str) -> Generation:
+        """
+        Return the invalidation generation of an id (take it before reading).
+
+        Args:
+            entity_id: The file or folder identifier
+
+        Returns:
+            Opaque token to pass to put()
+        """
+        return self._epoch, self._generations.get(entity_id, 0)
+
+    def put(self, entity: Entity, generation: Optional[Generation] = None) -> None:
+        """
+        Cache a copy of an entity under its id.
+
+        Args:
+            entity: File or Folder entity (entities without an id are ignored)
+            generation: Token from generation() taken before the entity was
+                read; the put is skipped if the id was invalidated since
+        """
+        if not self.enabled or not entity.id:
+            return
+        if generation is not None and generation != self.generation(entity.id):
+            return
+        self._entries[entity.id] = (time.monotonic() + self.ttl, self._copy(entity))
+        self._entries.move_to_end(entity.id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, entity_ids: Iterable[str]) -> None:
+        """
+        Drop cached entries (unknown ids are ignored).
+
+        Args:
+            entity_ids: File or folder identifiers
+        """
+        for entity_id in entity_ids:
+            self._entries.pop(entity_id, None)
+            self._generations[entity_id] = self._generations.get(entity_id, 0) + 1
+            self._generations.move_to_end(entity_id)
+        while len(self._generations) > max(self.maxsize, 1):
+            self._generations.popitem(last=False)
+            self._epoch += 1
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._entries.clear()
+        self._generations.clear()
+        self._epoch += 1
+
+
+file_metadata_cache = MetadataCache(
+    maxsize=settings.file_metadata_cache_size,
+    ttl=settings.file_metadata_cache_ttl,
+)
+folder_metadata_cache = MetadataCache(
+    maxsize=settings.folder_metadata_cache_size,
+    ttl=settings.folder_metadata_cache_ttl,
+    copy=_copy_folder,
+)
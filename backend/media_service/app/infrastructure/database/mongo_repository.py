@@ -3,18 +3,248 @@ MongoDB GridFS implementation of IFileRepository.
 Handles all MongoDB/GridFS-specific logic.
 """
 
+import asyncio
 import logging
-from typing import AsyncGenerator, Optional, Tuple, List
+import re
+from typing import AsyncIterable, AsyncIterator, Dict, Optional, Tuple, List
 from bson import ObjectId
 from bson.errors import InvalidId
+from gridfs.errors import CorruptGridFile
 from motor.motor_asyncio import AsyncIOMotorGridFSBucket, AsyncIOMotorDatabase
-from datetime import datetime
 
-from app.domain.entities import File, Folder
+from app.domain.entities import File, Folder, _utcnow
 from app.domain.interfaces import IFileRepository, IFolderRepository
+from app.core.config import settings
+from app.infrastructure.database.metadata_cache import file_metadata_cache, folder_metadata_cache
+from app.utils.streams import prefetch_stream
 
 logger = logging.getLogger(__name__)
-CHUNK_SIZE = 64 * 1024  # 64KB chunks
+
+# Stored chunk bytes sent per fs.chunks insert_many (the driver still splits
+# anything above the server's maxMessageSizeBytes)
+GRIDFS_INSERT_BATCH_BYTES = 16 * 1024 * 1024
+# fs.chunks insert_many batches allowed in flight per upload (bounds upload
+# memory to about this many batches)
+GRIDFS_INSERT_CONCURRENCY = 2
+# Stored chunk bytes requested per fs.chunks cursor batch on download
+GRIDFS_READ_BATCH_BYTES = 16 * 1024 * 1024
+
+# fs.files fields a File entity is built from (skips md5/chunkSize/aliases)
+FILE_LIST_PROJECTION = {"filename": 1, "length": 1, "uploadDate": 1, "contentType": 1, "metadata": 1}
+# Streams also need the chunk size to page through fs.chunks
+FILE_STREAM_PROJECTION = {**FILE_LIST_PROJECTION, "chunkSize": 1}
+# fs.files documents per cursor batch when streaming listings (bounds the
+# memory held per getMore; pages smaller than this are fetched in one go)
+FILE_LIST_BATCH_SIZE = 500
+
+# Index key patterns the listing queries are pinned to with hint() (created
+# at startup by app.database._ensure_indexes)
+FILE_LISTING_INDEX = [
+    ("metadata.owner", 1), ("metadata.folder_id", 1), ("metadata.is_deleted", 1), ("uploadDate", -1),
+]
+FILE_FOLDER_INDEX = [("metadata.folder_id", 1)]
+# (created_at serves list_subfolders' newest-first sort straight from the index)
+FOLDER_LISTING_INDEX = [("owner_id", 1), ("parent_id", 1), ("created_at", -1)]
+# Subtree walks read only _id by parent_id (+ owner_id): covered by this index
+FOLDER_TREE_INDEX = [("parent_id", 1), ("owner_id", 1), ("_id", 1)]
+
+# folders fields listing entities are built from (metadata is never shown in
+# listings and can be large)
+FOLDER_LIST_PROJECTION = {
+    "name": 1, "owner_id": 1, "parent_id": 1, "created_at": 1, "updated_at": 1, "path": 1,
+}
+
+# Folder documents per cursor batch when streaming folder listings
+FOLDER_LIST_BATCH_SIZE = 500
+
+# Folder ids per cursor batch in subtree walks (ids are tiny, so one batch
+# usually holds a whole tree level)
+FOLDER_TREE_BATCH_SIZE = 10_000
+
+# metadata keys already carried by File fields; File.metadata keeps only the rest
+FILE_FIELD_METADATA_KEYS = frozenset({
+    "owner", "contentType", "folder_id", "encrypted", "nonce", "encryptedKey",
+    "isInfected", "is_deleted", "deleted_at",
+})
+
+
+async def _cursor_batches(cursor, size: int) -> AsyncIterator[list]:
+    """
+    Read a cursor a batch at a time with to_list, so streaming callers
+    await once per batch instead of once per document.
+
+    Args:
+        cursor: Motor cursor (its own batch_size should match size)
+        size: Documents per batch
+
+    Yields:
+        Non-empty lists of documents, in cursor order
+    """
+    while True:
+        docs = await cursor.to_list(size)
+        if not docs:
+            return
+        yield docs
+
+
+def _file_listing_query(folder_id: Optional[str], owner_id: Optional[str] = None) -> dict:
+    """
+    Build the flat filter for non-deleted files in one folder.
+    Every field is an equality or a two-value $in (point bounds on
+    FILE_LISTING_INDEX, no $and/$or nesting to build or plan). The $in
+    values also match files the startup migrations have not normalized (or
+    that pre-upgrade workers wrote since): is_deleted missing, or a root
+    folder_id stored as "".
+
+    Args:
+        folder_id: The folder identifier (None or "" = root)
+        owner_id: Optional owner identifier (None = any owner)
+
+    Returns:
+        fs.files filter dict (fresh, safe to extend)
+    """
+    query = {
+        "metadata.folder_id": folder_id if folder_id else {"$in": [None, ""]},
+        "metadata.is_deleted": {"$in": [False, None]},
+    }
+    if owner_id is not None:
+        query["metadata.owner"] = owner_id
+    return query
+
+
+# Shared read-only fallback for documents without a metadata sub-document
+# (never mutated; saves allocating a throwaway dict per document)
+_EMPTY: dict = {}
+
+
+def _to_object_id(id_str: Optional[str]) -> Optional[ObjectId]:
+    """
+    Safely convert a string to ObjectId.
+
+    Args:
+        id_str: String to convert
+
+    Returns:
+        ObjectId or None if invalid format
+    """
+    if not id_str:
+        return None
+    try:
+        return ObjectId(id_str)
+    except (InvalidId, TypeError):
+        return None
+
+
+def _file_from_doc(doc: dict) -> File:
+    """
+    Build a File entity from an fs.files document.
+
+    Args:
+        doc: fs.files document (FILE_LIST_PROJECTION fields are enough)
+
+    Returns:
+        File entity
+    """
+    meta = doc.get("metadata") or _EMPTY
+    get = meta.get
+    return File(
+        str(doc["_id"]),
+        doc.get("filename", ""),
+        get("contentType", doc.get("contentType", "")),
+        doc.get("length", 0),
+        get("owner", ""),
+        get("folder_id"),
+        doc.get("uploadDate"),
+        get("encrypted", False),
+        get("nonce", ""),
+        get("encryptedKey", ""),
+        get("isInfected", False),
+        get("is_deleted", False),
+        get("deleted_at"),
+        {k: v for k, v in meta.items() if k not in FILE_FIELD_METADATA_KEYS},
+    )
+
+
+def _file_from_grid_out(grid_out) -> File:
+    """
+    Build a File entity from a GridOut (download stream or GridFS find cursor).
+
+    Args:
+        grid_out: Motor GridOut
+
+    Returns:
+        File entity
+    """
+    meta = grid_out.metadata or _EMPTY
+    get = meta.get
+    return File(
+        str(grid_out._id),
+        grid_out.filename,
+        get("contentType", grid_out.content_type),
+        grid_out.length,
+        get("owner", ""),
+        get("folder_id"),
+        grid_out.upload_date,
+        get("encrypted", False),
+        get("nonce", ""),
+        get("encryptedKey", ""),
+        get("isInfected", False),
+        get("is_deleted", False),
+        get("deleted_at"),
+        {k: v for k, v in meta.items() if k not in FILE_FIELD_METADATA_KEYS},
+    )
+
+
+def _folder_from_doc(doc: dict) -> Folder:
+    """
+    Build a Folder entity from a folders document.
+
+    Args:
+        doc: folders document (FOLDER_LIST_PROJECTION fields are enough)
+
+    Returns:
+        Folder entity
+    """
+    get = doc.get
+    return Folder(
+        str(doc["_id"]),
+        get("name", ""),
+        get("owner_id", ""),
+        get("parent_id"),
+        get("created_at"),
+        get("updated_at"),
+        [],
+        get("path", ""),
+        get("metadata") or {},
+    )
+
+
+class _GridOutReader:
+    """
+    Async iterator over a GridOut's stored chunks.
+    Yields one stored chunk per step (no re-slicing into small reads) and
+    closes the GridOut once it is exhausted or aclose() is called.
+    """
+
+    __slots__ = ("grid_out",)
+
+    def __init__(self, grid_out):
+        self.grid_out = grid_out
+
+    def __aiter__(self) -> "_GridOutReader":
+        return self
+
+    async def __anext__(self) -> bytes:
+        # readchunk returns the rest of the current stored chunk
+        chunk = await self.grid_out.readchunk()
+        if not chunk:
+            self.grid_out.close()
+            raise StopAsyncIteration
+        return chunk
+
+    async def aclose(self) -> None:
+        """Close the GridOut early (e.g. the client went away)."""
+        self.grid_out.close()
 
 
 class MongoGridFSRepository(IFileRepository):
@@ -37,14 +267,18 @@ class MongoGridFSRepository(IFileRepository):
     async def save_file_stream(
         self,
         file: File,
-        stream: AsyncGenerator,
+        stream: AsyncIterable[bytes],
+        *,
+        prefetch: Optional[int] = None,
     ) -> str:
         """
         Save encrypted file to GridFS.
         
         Args:
             file: Domain File entity
-            stream: Async generator yielding encrypted chunks
+            stream: Async iterable yielding encrypted chunks
+            prefetch: Chunks produced ahead of the GridFS writes
+                (None = settings.stream_prefetch_chunks)
             
         Returns:
             ObjectId as string
@@ -55,27 +289,35 @@ class MongoGridFSRepository(IFileRepository):
                 "owner": file.owner_id,
                 "contentType": file.content_type,
                 "originalFilename": file.filename,
-                "folder_id": file.folder_id,  # Added folder support - snake_case to match queries
+                "folder_id": file.folder_id or None,  # Root = None (never "" or missing)
                 "encrypted": file.encrypted,
                 "nonce": file.nonce,
                 "encryptedKey": file.encrypted_key,
                 "isInfected": file.is_infected,  # Added virus scan status
+                # Always stored so listings can filter on is_deleted == False
+                "is_deleted": file.is_deleted,
             }
             metadata.update(file.metadata)
 
-            # Open GridFS upload stream
-            grid_in = self.fs.open_upload_stream(
-                file.filename,
-                metadata=metadata,
-            )
-
-            # Stream encrypted chunks to GridFS
-            async for chunk in stream:
-                await grid_in.write(chunk)
+            # The next chunks are read and encrypted while the current ones
+            # are being written
+            if prefetch is None:
+                prefetch = settings.stream_prefetch_chunks
+            chunks = prefetch_stream(stream, prefetch)
 
-            grid_in.close()
+            if self.db is not None:
+                file_id = await self._write_gridfs_batched(file.filename, metadata, chunks)
+            else:
+                grid_in = self.fs.open_upload_stream(
+                    file.filename,
+                    metadata=metadata,
+                )
+                async for chunk in chunks:
+                    await grid_in.write(chunk)
+                await grid_in.close()
+                file_id = str(grid_in._id)
 
-            file_id = str(grid_in._id)
+            await self.invalidate_metadata(file_id)
             logger.info(f"✓ Saved file {file_id} for owner {file.owner_id} (folder: {file.folder_id})")
             return file_id
 
@@ -83,9 +325,111 @@ class MongoGridFSRepository(IFileRepository):
             logger.error(f"GridFS save failed: {e}")
             raise
 
+    async def _write_gridfs_batched(
+        self,
+        filename: str,
+        metadata: dict,
+        stream: AsyncIterable[bytes],
+    ) -> str:
+        """
+        Write a GridFS file with batched fs.chunks inserts.
+        GridIn inserts each chunk with its own round trip; here chunks are
+        cut to the bucket chunk size and sent GRIDFS_INSERT_BATCH_BYTES at a
+        time, with up to GRIDFS_INSERT_CONCURRENCY batches in flight while
+        the next one is read (chunks carry their own n, so batches may land
+        in any order). The fs.files document is inserted last (as GridIn
+        does), so readers never see a file whose chunks are still being
+        written.
+        
+        Args:
+            filename: Stored file name
+            metadata: GridFS metadata document
+            stream: Async iterable yielding the bytes to store
+            
+        Returns:
+            ObjectId of the new file as string
+        """
+        chunks_coll = self.db["fs.chunks"]
+        chunk_size = settings.gridfs_chunk_size
+        batch_limit = max(GRIDFS_INSERT_BATCH_BYTES // chunk_size, 1)
+        oid = ObjectId()
+        buffer = bytearray()
+        batch = []
+        n = 0
+        length = 0
+        in_flight: set = set()
+
+        async def send(docs: list) -> None:
+            # Wait for a free slot, surfacing any failed insert
+            while len(in_flight) >= GRIDFS_INSERT_CONCURRENCY:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                in_flight.difference_update(done)
+                for task in done:
+                    task.result()
+            in_flight.add(asyncio.create_task(chunks_coll.insert_many(docs, ordered=True)))
+
+        try:
+            async for piece in stream:
+                length += len(piece)
+                if buffer:
+                    # Complete the carried-over partial chunk first
+                    buffer += piece
+                    piece, buffer = buffer, bytearray()
+
+                # Upload reads are already chunk-sized, so a piece usually
+                # is a whole chunk and is stored as is; otherwise chunks
+                # are cut from it with a single copy each (bytes are encoded
+                # as BSON binary, no Binary wrapper copy needed)
+                end = len(piece)
+                offset = 0
+                with memoryview(piece) as view:
+                    while end - offset >= chunk_size:
+                        if end == chunk_size and type(piece) is bytes:
+                            data = piece
+                        else:
+                            data = bytes(view[offset:offset + chunk_size])
+                        batch.append({"files_id": oid, "n": n, "data": data})
+                        offset += chunk_size
+                        n += 1
+                        if len(batch) >= batch_limit:
+                            await send(batch)
+                            batch = []
+                    if offset < end:
+                        buffer += view[offset:]
+
+            if buffer:
+                batch.append({"files_id": oid, "n": n, "data": bytes(buffer)})
+            if batch:
+                await send(batch)
+            if in_flight:
+                await asyncio.gather(*in_flight)
+
+            await self.db["fs.files"].insert_one({
+                "_id": oid,
+                "length": length,
+                "chunkSize": chunk_size,
+                "uploadDate": _utcnow(),
+                "filename": filename,
+                "metadata": metadata,
+            })
+            return str(oid)
+
+        except BaseException:
+            # Let outstanding inserts settle first (Motor runs them in worker
+            # threads, so cancelling would not stop them), so none lands
+            # after the cleanup
+            await asyncio.gather(*in_flight, return_exceptions=True)
+            # Like GridIn.abort(): don't leave orphaned chunks behind
+            try:
+                await chunks_coll.delete_many({"files_id": oid})
+            except Exception as cleanup_error:
+                logger.warning(f"Failed to remove partial chunks of {oid}: {cleanup_error}")
+            raise
+
     async def get_file_metadata(self, file_id: str) -> Optional[File]:
         """
-        Retrieve file metadata from GridFS.
+        Retrieve file metadata from GridFS (served from the process-wide
+        metadata cache when possible).
         
         Args:
             file_id: ObjectId as string
@@ -93,82 +437,241 @@ class MongoGridFSRepository(IFileRepository):
         Returns:
             File entity or None if not found
         """
+        cached = file_metadata_cache.get(file_id)
+        if cached is not None:
+            return cached
+        # Taken before the read so a concurrent invalidation voids the fill
+        generation = file_metadata_cache.generation(file_id)
+
+        oid = _to_object_id(file_id)
+        if oid is None:
+            logger.error(f"Invalid file ID format: {file_id}")
+            return None
+
         try:
-            oid = ObjectId(file_id)
+            if self.db is not None:
+                # Just the file document: no GridOut, no chunk cursor
+                doc = await self.db["fs.files"].find_one({"_id": oid}, FILE_LIST_PROJECTION)
+                if not doc:
+                    return None
+                file = _file_from_doc(doc)
+                file_metadata_cache.put(file, generation)
+                return file
+
             grid_out = await self.fs.open_download_stream(oid)
-            meta = grid_out.metadata or {}
-
-            file = File(
-                id=str(grid_out._id),
-                filename=grid_out.filename,
-                content_type=meta.get("contentType", grid_out.content_type),
-                size=grid_out.length,
-                owner_id=meta.get("owner", ""),
-                folder_id=meta.get("folder_id"),  # Added folder support - snake_case to match queries
-                upload_date=grid_out.upload_date,
-                encrypted=meta.get("encrypted", False),
-                nonce=meta.get("nonce", ""),
-                encrypted_key=meta.get("encryptedKey", ""),
-                is_infected=meta.get("isInfected", False),  # Added virus scan status
-                is_deleted=meta.get("is_deleted", False),  # Soft delete status
-                deleted_at=meta.get("deleted_at"),  # Deletion timestamp
-                metadata=meta,
-            )
+            file = _file_from_grid_out(grid_out)
 
             grid_out.close()
+            file_metadata_cache.put(file, generation)
             return file
 
         except Exception as e:
             logger.error(f"Failed to get metadata for {file_id}: {e}")
             return None
 
+    async def invalidate_metadata(self, file_id: str) -> None:
+        """
+        Drop the cached metadata for a file.
+        
+        Args:
+            file_id: ObjectId as string
+        """
+        file_metadata_cache.invalidate((file_id,))
+
+    async def get_files_metadata(self, file_ids: List[str]) -> Dict[str, File]:
+        """
+        Retrieve metadata for many files with one fs.files query.
+        
+        Args:
+            file_ids: ObjectIds as strings (invalid ids are skipped)
+            
+        Returns:
+            Dict of file_id -> File entity (missing files are omitted)
+        """
+        oids = []
+        for file_id in file_ids:
+            oid = _to_object_id(file_id)
+            if oid is None:
+                logger.warning(f"Skipping invalid file ID in bulk metadata lookup: {file_id}")
+                continue
+            oids.append(oid)
+        if not oids:
+            return {}
+
+        try:
+            files = {}
+            async for grid_out in self.fs.find({"_id": {"$in": oids}}):
+                file = _file_from_grid_out(grid_out)
+                files[file.id] = file
+            return files
+
+        except Exception as e:
+            logger.error(f"Bulk metadata lookup failed: {e}")
+            return {}
+
+    async def _iter_chunks(
+        self,
+        oid: ObjectId,
+        length: int,
+        chunk_size: int,
+        first_n: int = 0,
+        last_n: Optional[int] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream a file's stored chunks from one fs.chunks cursor.
+        Each getMore returns up to GRIDFS_READ_BATCH_BYTES of chunks (never
+        more than the requested range), and only n/data are sent back;
+        sequence gaps are reported the way GridOut reports them.
+        
+        Args:
+            oid: The file's ObjectId
+            length: File length in bytes (from the file document)
+            chunk_size: The file's own chunkSize (older files use a smaller one)
+            first_n: Index of the first chunk to return
+            last_n: Index of the last chunk to return (None = the file's last)
+            
+        Yields:
+            Chunk payloads in order
+        """
+        expected = first_n
+        file_last_n = -(-length // chunk_size) - 1 if chunk_size else -1
+        if last_n is None or last_n > file_last_n:
+            last_n = file_last_n
+        batch_size = min(
+            max(GRIDFS_READ_BATCH_BYTES // max(chunk_size, 1), 1),
+            max(last_n - first_n + 1, 1),
+        )
+        cursor = self.db["fs.chunks"].find(
+            {"files_id": oid, "n": {"$gte": first_n, "$lte": last_n}},
+            {"_id": 0, "n": 1, "data": 1},
+        ).sort("n", 1).batch_size(batch_size)
+
+        async for doc in cursor:
+            if doc["n"] != expected:
+                raise CorruptGridFile(f"Missing chunk {expected} of file {oid}")
+            expected += 1
+            yield doc["data"]
+
+        if expected <= last_n:
+            raise CorruptGridFile(f"Missing chunk {expected} of file {oid}")
+
     async def get_file_stream(
         self,
         file_id: str,
-    ) -> Tuple[Optional[File], Optional[AsyncGenerator]]:
+        *,
+        prefetch: Optional[int] = None,
+    ) -> Tuple[Optional[File], Optional[AsyncIterator[bytes]]]:
         """
         Retrieve file metadata and content stream from GridFS.
         
         Args:
             file_id: ObjectId as string
+            prefetch: Chunks read ahead of the consumer
+                (None = settings.stream_prefetch_chunks)
             
         Returns:
             Tuple of (File entity, async generator of chunks)
         """
+        oid = _to_object_id(file_id)
+        if oid is None:
+            logger.error(f"Invalid file ID format: {file_id}")
+            return None, None
+
         try:
-            oid = ObjectId(file_id)
+            if prefetch is None:
+                prefetch = settings.stream_prefetch_chunks
+
+            if self.db is not None:
+                # One fs.files lookup; content comes from a batched
+                # fs.chunks cursor, so no GridOut is opened at all
+                doc = await self.db["fs.files"].find_one({"_id": oid}, FILE_STREAM_PROJECTION)
+                if not doc:
+                    return None, None
+                stream = self._iter_chunks(oid, doc["length"], doc["chunkSize"])
+                return _file_from_doc(doc), prefetch_stream(stream, prefetch)
+
             grid_out = await self.fs.open_download_stream(oid)
-            meta = grid_out.metadata or {}
-
-            file = File(
-                id=str(grid_out._id),
-                filename=grid_out.filename,
-                content_type=meta.get("contentType", grid_out.content_type),
-                size=grid_out.length,
-                owner_id=meta.get("owner", ""),
-                upload_date=grid_out.upload_date,
-                encrypted=meta.get("encrypted", False),
-                nonce=meta.get("nonce", ""),
-                encrypted_key=meta.get("encryptedKey", ""),
-                is_deleted=meta.get("is_deleted", False),  # Soft delete status
-                deleted_at=meta.get("deleted_at"),  # Deletion timestamp
-                metadata=meta,
-            )
+            file = _file_from_grid_out(grid_out)
+            return file, prefetch_stream(_GridOutReader(grid_out), prefetch)
+
+        except Exception as e:
+            logger.error(f"Failed to get stream for {file_id}: {e}")
+            return None, None
+
+    async def get_file_range(
+        self,
+        file_id: str,
+        start: int,
+        end: int,
+    ) -> Tuple[Optional[File], Optional[AsyncIterator[bytes]]]:
+        """
+        Retrieve file metadata and the stored bytes start..end (inclusive).
+        GridFS seeks straight to the chunk containing start, so earlier
+        chunks are never fetched.
+        
+        Args:
+            file_id: ObjectId as string
+            start: First byte offset
+            end: Last byte offset (inclusive, clamped to the file size)
+            
+        Returns:
+            Tuple of (File entity, async generator of chunks); the stream is
+            None if start lies beyond the end of the file
+        """
+        oid = _to_object_id(file_id)
+        if oid is None:
+            logger.error(f"Invalid file ID format: {file_id}")
+            return None, None
+
+        try:
+            if self.db is not None:
+                doc = await self.db["fs.files"].find_one({"_id": oid}, FILE_STREAM_PROJECTION)
+                if not doc:
+                    return None, None
+                file = _file_from_doc(doc)
+                length, chunk_size = doc["length"], doc["chunkSize"]
+            else:
+                grid_out = await self.fs.open_download_stream(oid)
+                file = _file_from_grid_out(grid_out)
+                length = grid_out.length
 
-            async def stream_generator():
+            if start < 0 or start >= length or end < start:
+                if self.db is None:
+                    grid_out.close()
+                return file, None
+
+            remaining = min(end, length - 1) - start + 1
+
+            if self.db is not None:
+                first_n, skip = divmod(start, chunk_size)
+                # Only the chunks the range touches
+                last_n = min(end, length - 1) // chunk_size
+                chunks = self._iter_chunks(oid, length, chunk_size, first_n, last_n)
+            else:
+                grid_out.seek(start)
+                skip = 0
+                chunks = _GridOutReader(grid_out)
+
+            async def range_generator():
+                nonlocal remaining, skip
                 try:
-                    while True:
-                        chunk = await grid_out.read(CHUNK_SIZE)
-                        if not chunk:
-                            break
+                    async for chunk in chunks:
+                        if skip:
+                            chunk = chunk[skip:]
+                            skip = 0
+                        if len(chunk) > remaining:
+                            chunk = chunk[:remaining]
+                        remaining -= len(chunk)
                         yield chunk
+                        if remaining <= 0:
+                            break
                 finally:
-                    grid_out.close()
+                    await chunks.aclose()
 
-            return file, stream_generator()
+            return file, range_generator()
 
         except Exception as e:
-            logger.error(f"Failed to get stream for {file_id}: {e}")
+            logger.error(f"Failed to get range {start}-{end} for {file_id}: {e}")
             return None, None
 
     async def delete(self, file_id: str) -> bool:
@@ -181,14 +684,137 @@ class MongoGridFSRepository(IFileRepository):
         Returns:
             True if deleted, False otherwise
         """
+        oid = _to_object_id(file_id)
+        if oid is None:
+            logger.error(f"Invalid file ID format: {file_id}")
+            return False
+
         try:
-            oid = ObjectId(file_id)
-            await self.fs.delete(oid)
+            if self.db is not None:
+                if not await self._delete_files_and_chunks([oid]):
+                    logger.error(f"Failed to delete {file_id}: file not found")
+                    return False
+            else:
+                await self.fs.delete(oid)
             logger.info(f"✓ Deleted file {file_id}")
             return True
         except Exception as e:
             logger.error(f"Failed to delete {file_id}: {e}")
             return False
+        finally:
+            # After the write (even a failed one), so a read racing the
+            # delete cannot cache the file again
+            await self.invalidate_metadata(file_id)
+
+    async def _delete_files_and_chunks(self, oids: List[ObjectId]) -> int:
+        """
+        Remove files' fs.files entries, then their chunks, with one
+        delete_many each. Files go first (as in tree_delete): an interruption
+        leaves unreachable chunks, never a listed file without content.
+        
+        Args:
+            oids: File ObjectIds
+            
+        Returns:
+            Number of fs.files entries deleted
+        """
+        result = await self.db["fs.files"].delete_many({"_id": {"$in": oids}})
+        await self.db["fs.chunks"].delete_many({"files_id": {"$in": oids}})
+        return result.deleted_count
+
+    async def copy_file(
+        self,
+        file_id: str,
+        new_owner_id: str,
+        folder_id: Optional[str] = None,
+    ) -> Optional[str]:
+        """
+        Copy a GridFS file server-side: the chunks are duplicated by an
+        aggregation ($merge) so no content passes through Python.
+        The copy keeps the source's (still encrypted) data, nonce and key.
+        
+        Args:
+            file_id: Source ObjectId as string
+            new_owner_id: Owner of the copy
+            folder_id: Folder for the copy (None = root)
+            
+        Returns:
+            New ObjectId as string, or None if the source was not found
+        """
+        if self.db is None:
+            return await super().copy_file(file_id, new_owner_id, folder_id)
+
+        oid = _to_object_id(file_id)
+        if oid is None:
+            logger.error(f"Invalid file ID format: {file_id}")
+            return None
+
+        try:
+            source = await self.db["fs.files"].find_one({"_id": oid})
+            if not source:
+                return None
+
+            new_oid = ObjectId()
+            metadata = dict(source.get("metadata") or {})
+            metadata["owner"] = new_owner_id
+            metadata["folder_id"] = folder_id or None
+            metadata["is_deleted"] = False
+            metadata.pop("deleted_at", None)
+
+            # Chunks first, so the new fs.files entry never points at missing content
+            await self.db["fs.chunks"].aggregate([
+                {"$match": {"files_id": oid}},
+                {"$project": {"_id": 0, "files_id": {"$literal": new_oid}, "n": 1, "data": 1}},
+                {"$merge": {"into": "fs.chunks"}},
+            ]).to_list(None)
+
+            await self.db["fs.files"].insert_one({
+                **source,
+                "_id": new_oid,
+                "uploadDate": _utcnow(),
+                "metadata": metadata,
+            })
+
+            logger.info(f"✓ Copied file {file_id} -> {new_oid} for owner {new_owner_id}")
+            return str(new_oid)
+
+        except Exception as e:
+            logger.error(f"Failed to copy {file_id}: {e}")
+            return None
+
+    async def delete_batch(self, file_ids: List[str]) -> int:
+        """
+        Delete many files from GridFS with two concurrent bulk operations
+        (fs.files + fs.chunks) instead of two round trips per file.
+        
+        Args:
+            file_ids: ObjectIds as strings (invalid ids are skipped)
+            
+        Returns:
+            Number of files deleted
+        """
+        if self.db is None:
+            return await super().delete_batch(file_ids)
+
+        oids = []
+        for file_id in file_ids:
+            oid = _to_object_id(file_id)
+            if oid is None:
+                logger.warning(f"Skipping invalid file ID in batch delete: {file_id}")
+                continue
+            oids.append(oid)
+        if not oids:
+            return 0
+
+        try:
+            deleted_count = await self._delete_files_and_chunks(oids)
+            logger.info(f"✓ Batch deleted {deleted_count} files")
+            return deleted_count
+        except Exception as e:
+            logger.error(f"Batch delete failed: {e}")
+            return 0
+        finally:
+            file_metadata_cache.invalidate(str(oid) for oid in oids)
 
     async def delete_file_from_gridfs(self, file_id: str) -> bool:
         """
@@ -203,7 +829,76 @@ class MongoGridFSRepository(IFileRepository):
         """
         return await self.delete(file_id)
 
-    async def list_by_owner(self, owner_id: str, folder_id: Optional[str] = None) -> List[File]:
+    async def iter_by_owner(
+        self,
+        owner_id: str,
+        folder_id: Optional[str] = None,
+        *,
+        limit: Optional[int] = None,
+        after_id: Optional[str] = None,
+    ) -> AsyncIterator[File]:
+        """
+        Stream the files owned by a user as the cursor yields them,
+        optionally filtered by folder.
+        Automatically excludes deleted files (soft delete).
+        
+        Args:
+            owner_id: Owner identifier
+            folder_id: Optional folder ID to filter by (None = root files only)
+            limit: Optional maximum number of files to return (page size)
+            after_id: Optional file ID to resume after (keyset pagination;
+                pages are ordered by file ID; an invalid ID yields nothing)
+            
+        Yields:
+            File entities
+        """
+        # Always filter by owner and exclude deleted files; folder_id None
+        # selects root files only
+        query = _file_listing_query(folder_id, owner_id)
+        if after_id:
+            after_oid = _to_object_id(after_id)
+            if after_oid is None:
+                logger.error(f"Invalid file ID format: {after_id}")
+                return
+            query["_id"] = {"$gt": after_oid}
+
+        if self.db is not None:
+            # Plain projected documents: no GridOut wrapper per file
+            cursor = self.db["fs.files"].find(query, FILE_LIST_PROJECTION)
+        else:
+            cursor = self.fs.find(query)
+        if limit is not None or after_id:
+            # Stable _id order so each page resumes exactly after the last one
+            # (no hint: the listing index can serve neither the _id sort nor
+            # the after_id bound, so the planner picks the plan)
+            cursor = cursor.sort("_id", 1)
+        else:
+            # Owner + folder + is_deleted equalities: skip plan selection
+            cursor = cursor.hint(FILE_LISTING_INDEX)
+        if limit is not None:
+            cursor = cursor.limit(limit)
+        batch_size = min(limit or FILE_LIST_BATCH_SIZE, FILE_LIST_BATCH_SIZE)
+        cursor = cursor.batch_size(batch_size)
+
+        if self.db is not None:
+            async for docs in _cursor_batches(cursor, batch_size):
+                for doc in docs:
+                    yield _file_from_doc(doc)
+            return
+
+        # GridOut cursors wrap documents one at a time (to_list would
+        # return the raw documents)
+        async for grid_out in cursor:
+            yield _file_from_grid_out(grid_out)
+
+    async def list_by_owner(
+        self,
+        owner_id: str,
+        folder_id: Optional[str] = None,
+        *,
+        limit: Optional[int] = None,
+        after_id: Optional[str] = None,
+    ) -> List[File]:
         """
         List all files owned by a user, optionally filtered by folder.
         Automatically excludes deleted files (soft delete).
@@ -211,72 +906,59 @@ class MongoGridFSRepository(IFileRepository):
         Args:
             owner_id: Owner identifier
             folder_id: Optional folder ID to filter by (None = root files only)
+            limit: Optional maximum number of files to return (page size)
+            after_id: Optional file ID to resume after (keyset pagination;
+                pages are ordered by file ID)
             
         Returns:
             List of File entities
         """
         try:
-            # Build query: always filter by owner and exclude deleted files
-            # CRITICAL FIX: When folder_id is None, only get root files
-            # When folder_id is provided, get files in that folder
-            if folder_id is None:
-                # Root files: folder_id must not be set OR be None/empty, AND not deleted
-                # Use $and to ensure both owner and root-level conditions are met
-                query = {
-                    "$and": [
-                        {"metadata.owner": owner_id},
-                        {"$or": [
-                            {"metadata.folder_id": {"$exists": False}},
-                            {"metadata.folder_id": None},
-                            {"metadata.folder_id": ""}
-                        ]},
-                        {"$or": [
-                            {"metadata.is_deleted": {"$exists": False}},
-                            {"metadata.is_deleted": False}
-                        ]}
-                    ]
-                }
-            else:
-                # Files in specific folder (not deleted)
-                query = {
-                    "$and": [
-                        {"metadata.owner": owner_id},
-                        {"metadata.folder_id": folder_id},
-                        {"$or": [
-                            {"metadata.is_deleted": {"$exists": False}},
-                            {"metadata.is_deleted": False}
-                        ]}
-                    ]
-                }
-            
-            cursor = self.fs.find(query)
-            files = []
-
-            async for grid_out in cursor:
-                meta = grid_out.metadata or {}
-                file = File(
-                    id=str(grid_out._id),
-                    filename=grid_out.filename,
-                    content_type=meta.get("contentType", grid_out.content_type),
-                    size=grid_out.length,
-                    owner_id=meta.get("owner", ""),
-                    folder_id=meta.get("folder_id"),
-                    upload_date=grid_out.upload_date,
-                    encrypted=meta.get("encrypted", False),
-                    nonce=meta.get("nonce", ""),
-                    encrypted_key=meta.get("encryptedKey", ""),
-                    is_deleted=meta.get("is_deleted", False),  # Soft delete status
-                    deleted_at=meta.get("deleted_at"),  # Deletion timestamp
-                    metadata=meta,
+            return [
+                file
+                async for file in self.iter_by_owner(
+                    owner_id, folder_id, limit=limit, after_id=after_id
                 )
-                files.append(file)
-
-            return files
+            ]
 
         except Exception as e:
             logger.error(f"Failed to list files for {owner_id}: {e}")
             return []
 
+    async def iter_files_in_folder(
+        self,
+        folder_id: Optional[str],
+        owner_id: Optional[str] = None,
+    ) -> AsyncIterator[File]:
+        """
+        Stream the files in a specific folder (root if folder_id is None),
+        newest first, as the cursor yields them.
+        Automatically excludes deleted files (soft delete).
+        
+        Args:
+            folder_id: The folder identifier (None = root)
+            owner_id: Optional owner identifier (None for public/shared lists)
+            
+        Yields:
+            File entities
+        """
+        if self.db is None:
+            logger.error("Database not initialized for file queries")
+            return
+
+        cursor = (
+            self.db["fs.files"].find(_file_listing_query(folder_id, owner_id), FILE_LIST_PROJECTION)
+            .sort("uploadDate", -1)
+            # Owner listings are fully covered by the listing index (sort
+            # included); shared/public listings only have the folder to go on
+            .hint(FILE_LISTING_INDEX if owner_id is not None else FILE_FOLDER_INDEX)
+            .batch_size(FILE_LIST_BATCH_SIZE)
+        )
+
+        async for docs in _cursor_batches(cursor, FILE_LIST_BATCH_SIZE):
+            for doc in docs:
+                yield _file_from_doc(doc)
+
     async def list_files_in_folder(
         self,
         folder_id: Optional[str],
@@ -294,54 +976,7 @@ class MongoGridFSRepository(IFileRepository):
             List of File entities
         """
         try:
-            if self.db is None:
-                logger.error("Database not initialized for file queries")
-                return []
-
-            fs = self.db.get_collection("fs.files")
-            query = {}
-            
-            # Only filter by owner if owner_id is provided
-            if owner_id:
-                query["metadata.owner"] = owner_id
-            
-            # Always exclude deleted files
-            query["$or"] = [
-                {"metadata.is_deleted": {"$exists": False}},
-                {"metadata.is_deleted": False}
-            ]
-            
-            if folder_id is None:
-                # Root files have no folder_id
-                query["metadata.folder_id"] = {"$in": [None, ""]}
-            else:
-                # Files in specific folder
-                query["metadata.folder_id"] = folder_id
-
-            cursor = fs.find(query).sort("uploadDate", -1)
-            files = []
-
-            async for doc in cursor:
-                meta = doc.get("metadata", {})
-                file = File(
-                    id=str(doc["_id"]),
-                    filename=doc.get("filename", ""),
-                    content_type=meta.get("contentType", ""),
-                    size=doc.get("length", 0),
-                    owner_id=meta.get("owner", ""),
-                    folder_id=meta.get("folderId"),
-                    upload_date=doc.get("uploadDate"),
-                    encrypted=meta.get("encrypted", False),
-                    nonce=meta.get("nonce", ""),
-                    encrypted_key=meta.get("encryptedKey", ""),
-                    is_infected=meta.get("isInfected", False),
-                    is_deleted=meta.get("is_deleted", False),
-                    deleted_at=meta.get("deleted_at"),
-                    metadata=meta,
-                )
-                files.append(file)
-
-            return files
+            return [file async for file in self.iter_files_in_folder(folder_id, owner_id)]
 
         except Exception as e:
             logger.error(f"Failed to list files in folder {folder_id}: {e}")
@@ -363,20 +998,12 @@ class MongoGridFSRepository(IFileRepository):
                 logger.error("Database not initialized for updates")
                 return False
 
-            oid = ObjectId(file_id)
-            mongo_updates = {}
-            
-            # Map domain fields to MongoDB metadata fields
-            if "folder_id" in updates:
-                mongo_updates["metadata.folderId"] = updates["folder_id"]
-            
-            # Soft delete fields
-            if "is_deleted" in updates:
-                mongo_updates["metadata.is_deleted"] = updates["is_deleted"]
-            if "deleted_at" in updates:
-                mongo_updates["metadata.deleted_at"] = updates["deleted_at"]
-            
-            # Add other fields as needed
+            oid = _to_object_id(file_id)
+            if oid is None:
+                logger.error(f"Invalid file ID format: {file_id}")
+                return False
+
+            mongo_updates = self._metadata_set(updates)
             if not mongo_updates:
                 return False
 
@@ -384,6 +1011,7 @@ class MongoGridFSRepository(IFileRepository):
                 {"_id": oid},
                 {"$set": mongo_updates}
             )
+            await self.invalidate_metadata(file_id)
             
             logger.info(f"✓ Updated metadata for file {file_id}: {mongo_updates}")
             return True  # Return True even if modified_count is 0 (idempotent)
@@ -392,6 +1020,73 @@ class MongoGridFSRepository(IFileRepository):
             logger.error(f"Failed to update metadata for {file_id}: {e}")
             return False
 
+    async def update_files_metadata(self, file_ids: List[str], updates: dict) -> int:
+        """
+        Apply the same metadata update to many files with one update_many
+        (e.g., moving a selection to a folder, trashing or restoring it).
+        
+        Args:
+            file_ids: ObjectIds as strings (invalid ids are skipped)
+            updates: Dict of fields to update, as for update_file_metadata
+            
+        Returns:
+            Number of files matched (0 on error or if nothing to update)
+        """
+        try:
+            if self.db is None:
+                logger.error("Database not initialized for updates")
+                return 0
+
+            mongo_updates = self._metadata_set(updates)
+            oids = []
+            for file_id in file_ids:
+                oid = _to_object_id(file_id)
+                if oid is None:
+                    logger.warning(f"Skipping invalid file ID in bulk update: {file_id}")
+                    continue
+                oids.append(oid)
+            if not mongo_updates or not oids:
+                return 0
+
+            result = await self.db["fs.files"].update_many(
+                {"_id": {"$in": oids}},
+                {"$set": mongo_updates}
+            )
+            file_metadata_cache.invalidate(str(oid) for oid in oids)
+            
+            logger.info(f"✓ Updated metadata for {result.matched_count} files: {mongo_updates}")
+            return result.matched_count
+            
+        except Exception as e:
+            logger.error(f"Bulk metadata update failed: {e}")
+            return 0
+
+    @staticmethod
+    def _metadata_set(updates: dict) -> dict:
+        """
+        Map domain field updates to fs.files metadata paths for $set.
+        
+        Args:
+            updates: Dict of domain fields (folder_id, is_deleted, deleted_at)
+            
+        Returns:
+            Dict of metadata.* paths (empty if no supported field is given)
+        """
+        mongo_updates = {}
+        
+        # Map domain fields to MongoDB metadata fields
+        if "folder_id" in updates:
+            mongo_updates["metadata.folder_id"] = updates["folder_id"] or None
+        
+        # Soft delete fields
+        if "is_deleted" in updates:
+            mongo_updates["metadata.is_deleted"] = updates["is_deleted"]
+        if "deleted_at" in updates:
+            mongo_updates["metadata.deleted_at"] = updates["deleted_at"]
+        
+        # Add other fields as needed
+        return mongo_updates
+
 
 class MongoFolderRepository(IFolderRepository):
     """
@@ -409,23 +1104,7 @@ class MongoFolderRepository(IFolderRepository):
         self.db = db
         self.collection = db["folders"]
 
-    @staticmethod
-    def _to_object_id(id_str: Optional[str]) -> Optional[ObjectId]:
-        """
-        Safely convert a string to ObjectId.
-        
-        Args:
-            id_str: String to convert
-            
-        Returns:
-            ObjectId or None if invalid format
-        """
-        if not id_str:
-            return None
-        try:
-            return ObjectId(id_str)
-        except InvalidId:
-            return None
+    _to_object_id = staticmethod(_to_object_id)
 
     async def create_folder(self, folder: Folder) -> str:
         """
@@ -438,12 +1117,17 @@ class MongoFolderRepository(IFolderRepository):
             folder_id as string
         """
         try:
+            # Pick the id up front so the materialized path can end with it
+            oid = ObjectId()
+            folder.tree_path = await self._child_path(folder.parent_id, str(oid))
             doc = {
+                "_id": oid,
                 "name": folder.name,
                 "owner_id": folder.owner_id,
                 "parent_id": folder.parent_id,
-                "created_at": folder.created_at or datetime.utcnow(),
-                "updated_at": folder.updated_at or datetime.utcnow(),
+                "path": folder.tree_path,
+                "created_at": folder.created_at or _utcnow(),
+                "updated_at": folder.updated_at or _utcnow(),
                 "metadata": folder.metadata,
             }
 
@@ -456,9 +1140,49 @@ class MongoFolderRepository(IFolderRepository):
             logger.error(f"Failed to create folder: {e}")
             raise
 
+    async def _folder_path(self, folder_id: str) -> str:
+        """
+        Get a folder's materialized path, computing and storing it for
+        folders created before paths were maintained.
+        
+        Args:
+            folder_id: The folder identifier
+            
+        Returns:
+            The "/root_id/.../folder_id" path ("" if the folder does not exist)
+        """
+        oid = self._to_object_id(folder_id)
+        if oid is None:
+            return ""
+        doc = await self.collection.find_one({"_id": oid}, {"parent_id": 1, "path": 1})
+        if not doc:
+            return ""
+        if doc.get("path"):
+            return doc["path"]
+
+        path = await self._child_path(doc.get("parent_id"), folder_id)
+        await self.collection.update_one({"_id": oid}, {"$set": {"path": path}})
+        folder_metadata_cache.invalidate((folder_id,))
+        return path
+
+    async def _child_path(self, parent_id: Optional[str], folder_id: str) -> str:
+        """
+        Build the materialized path of folder_id placed under parent_id.
+        
+        Args:
+            parent_id: The parent folder identifier (None = root)
+            folder_id: The child folder identifier
+            
+        Returns:
+            The child's "/root_id/.../folder_id" path
+        """
+        parent_path = await self._folder_path(parent_id) if parent_id else ""
+        return f"{parent_path}/{folder_id}"
+
     async def get_folder(self, folder_id: str, owner_id: str) -> Optional[Folder]:
         """
-        Get a folder by ID with ownership verification.
+        Get a folder by ID with ownership verification (served from the
+        process-wide folder cache when possible).
         
         Args:
             folder_id: The folder identifier
@@ -467,6 +1191,11 @@ class MongoFolderRepository(IFolderRepository):
         Returns:
             Folder entity or None
         """
+        cached = folder_metadata_cache.get(folder_id)
+        if cached is not None:
+            return cached if cached.owner_id == owner_id else None
+        generation = folder_metadata_cache.generation(folder_id)
+
         try:
             # Validate folder_id is a valid ObjectId
             oid = self._to_object_id(folder_id)
@@ -482,15 +1211,9 @@ class MongoFolderRepository(IFolderRepository):
             if not doc:
                 return None
 
-            return Folder(
-                id=str(doc["_id"]),
-                name=doc["name"],
-                owner_id=doc["owner_id"],
-                parent_id=doc.get("parent_id"),
-                created_at=doc.get("created_at"),
-                updated_at=doc.get("updated_at"),
-                metadata=doc.get("metadata", {}),
-            )
+            folder = _folder_from_doc(doc)
+            folder_metadata_cache.put(folder, generation)
+            return folder
 
         except Exception as e:
             logger.error(f"Failed to get folder {folder_id}: {e}")
@@ -498,7 +1221,8 @@ class MongoFolderRepository(IFolderRepository):
 
     async def get_folder_by_id(self, folder_id: str) -> Optional[Folder]:
         """
-        Get a folder by ID without ownership verification (for public access).
+        Get a folder by ID without ownership verification (for public access;
+        served from the process-wide folder cache when possible).
         
         Args:
             folder_id: The folder identifier
@@ -506,6 +1230,11 @@ class MongoFolderRepository(IFolderRepository):
         Returns:
             Folder entity or None
         """
+        cached = folder_metadata_cache.get(folder_id)
+        if cached is not None:
+            return cached
+        generation = folder_metadata_cache.generation(folder_id)
+
         try:
             # Validate folder_id is a valid ObjectId
             oid = self._to_object_id(folder_id)
@@ -518,20 +1247,74 @@ class MongoFolderRepository(IFolderRepository):
             if not doc:
                 return None
 
-            return Folder(
-                id=str(doc["_id"]),
-                name=doc["name"],
-                owner_id=doc["owner_id"],
-                parent_id=doc.get("parent_id"),
-                created_at=doc.get("created_at"),
-                updated_at=doc.get("updated_at"),
-                metadata=doc.get("metadata", {}),
-            )
+            folder = _folder_from_doc(doc)
+            folder_metadata_cache.put(folder, generation)
+            return folder
 
         except Exception as e:
             logger.error(f"Failed to get folder {folder_id}: {e}")
             return None
 
+    async def get_folders_by_ids(
+        self,
+        folder_ids: List[str],
+        owner_id: str,
+    ) -> Dict[str, Folder]:
+        """
+        Get several folders with one $in query instead of a lookup per folder.
+        
+        Args:
+            folder_ids: Folder identifiers (invalid ones are skipped)
+            owner_id: The owner (for verification)
+            
+        Returns:
+            Dict mapping folder_id -> Folder (metadata is not loaded)
+        """
+        oids = [oid for oid in map(self._to_object_id, folder_ids) if oid is not None]
+        if not oids:
+            return {}
+
+        try:
+            docs = await self.collection.find(
+                {"_id": {"$in": oids}, "owner_id": owner_id},
+                FOLDER_LIST_PROJECTION,
+            ).to_list(None)
+            return {str(doc["_id"]): _folder_from_doc(doc) for doc in docs}
+
+        except Exception as e:
+            logger.error(f"Failed to get {len(oids)} folders for {owner_id}: {e}")
+            return {}
+
+    async def iter_folders(
+        self,
+        owner_id: str,
+        parent_id: Optional[str] = None,
+    ) -> AsyncIterator[Folder]:
+        """
+        Stream a user's folders as the cursor yields them.
+        
+        Args:
+            owner_id: The owner's identifier
+            parent_id: Optional parent folder ID (None = root folders)
+            
+        Yields:
+            Folder entities (metadata is not loaded)
+        """
+        query = {"owner_id": owner_id}
+        if parent_id is None:
+            query["parent_id"] = None
+        else:
+            query["parent_id"] = parent_id
+
+        cursor = (
+            self.collection.find(query, FOLDER_LIST_PROJECTION)
+            .hint(FOLDER_LISTING_INDEX)
+            .batch_size(FOLDER_LIST_BATCH_SIZE)
+        )
+        async for docs in _cursor_batches(cursor, FOLDER_LIST_BATCH_SIZE):
+            for doc in docs:
+                yield _folder_from_doc(doc)
+
     async def list_folders(
         self,
         owner_id: str,
@@ -545,31 +1328,10 @@ class MongoFolderRepository(IFolderRepository):
             parent_id: Optional parent folder ID (None = root folders)
             
         Returns:
-            List of Folder entities
+            List of Folder entities (metadata is not loaded)
         """
         try:
-            query = {"owner_id": owner_id}
-            if parent_id is None:
-                query["parent_id"] = None
-            else:
-                query["parent_id"] = parent_id
-
-            cursor = self.collection.find(query)
-            folders = []
-
-            async for doc in cursor:
-                folder = Folder(
-                    id=str(doc["_id"]),
-                    name=doc["name"],
-                    owner_id=doc["owner_id"],
-                    parent_id=doc.get("parent_id"),
-                    created_at=doc.get("created_at"),
-                    updated_at=doc.get("updated_at"),
-                    metadata=doc.get("metadata", {}),
-                )
-                folders.append(folder)
-
-            return folders
+            return [folder async for folder in self.iter_folders(owner_id, parent_id)]
 
         except Exception as e:
             logger.error(f"Failed to list folders for {owner_id}: {e}")
@@ -591,22 +1353,58 @@ class MongoFolderRepository(IFolderRepository):
                 logger.error(f"Invalid folder ID format: {folder.id}")
                 return False
 
-            folder.updated_at = datetime.utcnow()
-            result = await self.collection.update_one(
-                {"_id": oid},
-                {
-                    "$set": {
-                        "name": folder.name,
-                        "parent_id": folder.parent_id,
-                        "metadata": folder.metadata,
-                        "updated_at": folder.updated_at,
-                    }
-                },
-            )
+            current = await self.collection.find_one({"_id": oid}, {"parent_id": 1, "path": 1})
+            if not current:
+                return False
+
+            old_path = current.get("path")
+            moved = current.get("parent_id") != folder.parent_id
+            if moved or not old_path:
+                folder.tree_path = await self._child_path(folder.parent_id, folder.id)
+            else:
+                folder.tree_path = old_path
+
+            folder.updated_at = _utcnow()
+            try:
+                result = await self.collection.update_one(
+                    {"_id": oid},
+                    {
+                        "$set": {
+                            "name": folder.name,
+                            "parent_id": folder.parent_id,
+                            "path": folder.tree_path,
+                            "metadata": folder.metadata,
+                            "updated_at": folder.updated_at,
+                        }
+                    },
+                )
+            finally:
+                folder_metadata_cache.invalidate((folder.id,))
 
             if result.matched_count == 0:
                 return False
 
+            # Re-root the descendants' paths in one server-side update
+            # (moves are rare: drop every cached folder rather than
+            # tracking which ones sit under old_path)
+            if old_path and folder.tree_path != old_path:
+                try:
+                    await self.collection.update_many(
+                        {"path": {"$regex": f"^{re.escape(old_path)}/"}},
+                        [{
+                            "$set": {
+                                "path": {
+                                    "$concat": [
+                                        folder.tree_path,
+                                        {"$substrCP": ["$path", len(old_path), {"$strLenCP": "$path"}]},
+                                    ]
+                                }
+                            }
+                        }],
+                    )
+                finally:
+                    folder_metadata_cache.clear()
+
             logger.info(f"✓ Updated folder {folder.id}")
             return True
 
@@ -631,25 +1429,24 @@ class MongoFolderRepository(IFolderRepository):
                 logger.error(f"Invalid folder ID format: {folder_id}")
                 return False
 
-            # Check if folder is empty
-            # Need to check both files collection and subfolders
-            file_count = await self.db["files"].count_documents({
-                "folder_id": oid
-            })
-            
-            subfolder_count = await self.collection.count_documents({
-                "parent_id": folder_id,
-                "owner_id": owner_id,
-            })
+            # Check if folder is empty: existence checks (no counting) on
+            # files (trashed ones included) and subfolders, run concurrently
+            any_file, any_subfolder = await asyncio.gather(
+                self.db["fs.files"].find_one({"metadata.folder_id": folder_id}, {"_id": 1}),
+                self.collection.find_one({"parent_id": folder_id, "owner_id": owner_id}, {"_id": 1}),
+            )
 
-            if file_count > 0 or subfolder_count > 0:
+            if any_file or any_subfolder:
                 logger.warning(f"Cannot delete folder {folder_id}: not empty")
                 return False
 
-            result = await self.collection.delete_one({
-                "_id": oid,
-                "owner_id": owner_id,
-            })
+            try:
+                result = await self.collection.delete_one({
+                    "_id": oid,
+                    "owner_id": owner_id,
+                })
+            finally:
+                folder_metadata_cache.invalidate((folder_id,))
 
             if result.deleted_count == 0:
                 return False
@@ -677,27 +1474,141 @@ class MongoFolderRepository(IFolderRepository):
                 logger.error(f"Invalid folder ID format: {folder_id}")
                 return 0
 
-            pipeline = [
-                {"$match": {"folder_id": oid}},
-                {"$group": {"_id": None, "total": {"$sum": "$size"}}},
-            ]
-
-            result = await self.db["files"].aggregate(pipeline).to_list(1)
-            if result:
-                return int(result[0]["total"])
-            return 0
+            # Same fs.files aggregation as the batched variant (files store
+            # their folder as the metadata.folder_id string)
+            sizes = await self.get_folder_contents_sizes([folder_id])
+            return sizes[folder_id]
 
         except Exception as e:
             logger.error(f"Failed to get folder size {folder_id}: {e}")
             return 0
 
+    async def list_folders_subtree(self, owner_id: str, root_path: str) -> List[Folder]:
+        """
+        List a folder and all its descendants with one indexed prefix query
+        on the materialized path.
+        
+        Args:
+            owner_id: The owner's identifier
+            root_path: tree_path of the subtree root
+            
+        Returns:
+            List of Folder entities (root included)
+        """
+        if not root_path:
+            return []
+
+        try:
+            cursor = self.collection.find({
+                "owner_id": owner_id,
+                "path": {"$regex": f"^{re.escape(root_path)}(/|$)"},
+            })
+
+            return [_folder_from_doc(doc) for doc in await cursor.to_list(None)]
+
+        except Exception as e:
+            logger.error(f"Failed to list subtree {root_path} for {owner_id}: {e}")
+            return []
+
+    async def get_folder_contents_sizes(self, folder_ids: List[str]) -> Dict[str, int]:
+        """
+        Get total file size for several folders with one $group aggregation.
+        
+        Args:
+            folder_ids: Folder identifiers
+            
+        Returns:
+            Dict mapping folder_id -> total size in bytes (0 for empty folders)
+        """
+        sizes = dict.fromkeys(folder_ids, 0)
+        if not folder_ids:
+            return sizes
+
+        try:
+            pipeline = [
+                {"$match": {"metadata.folder_id": {"$in": list(folder_ids)}}},
+                {"$group": {"_id": "$metadata.folder_id", "total": {"$sum": "$length"}}},
+            ]
+            async for row in self.db["fs.files"].aggregate(pipeline):
+                sizes[row["_id"]] = int(row["total"])
+            return sizes
+
+        except Exception as e:
+            logger.error(f"Failed to get sizes for {len(folder_ids)} folders: {e}")
+            return sizes
+
     # ========================================================================
     # RECURSIVE DELETE HELPERS
     # ========================================================================
 
+    async def _collect_subtree_ids(
+        self,
+        folder_id: str,
+        owner_id: Optional[str] = None,
+        oids: Optional[List[ObjectId]] = None,
+    ) -> List[str]:
+        """
+        Collect all descendant folder IDs, one $in query per tree level.
+        (parent_id is stored as a string while _id is an ObjectId, so
+        $graphLookup cannot follow the links.)
+        
+        Args:
+            folder_id: The root folder identifier
+            owner_id: Optional owner restriction
+            oids: Optional list that receives the descendants' ObjectIds
+                as read from the database (saves re-parsing the strings)
+            
+        Returns:
+            List of descendant folder IDs (root excluded)
+        """
+        seen = {folder_id}
+        descendants = []
+        frontier = [folder_id]
+        while frontier:
+            frontier = await self._next_level(frontier, seen, owner_id, oids)
+            descendants.extend(frontier)
+        return descendants
+
+    async def _next_level(
+        self,
+        parent_ids: List[str],
+        seen: set,
+        owner_id: Optional[str] = None,
+        oids: Optional[List[ObjectId]] = None,
+    ) -> List[str]:
+        """
+        Get the direct children of several folders with one $in query.
+        
+        Args:
+            parent_ids: Folder identifiers of the current tree level
+            seen: IDs already visited (updated in place; guards against cycles)
+            owner_id: Optional owner restriction
+            oids: Optional list that receives the children's ObjectIds
+            
+        Returns:
+            List of child folder IDs not seen before
+        """
+        query = {"parent_id": {"$in": parent_ids}}
+        if owner_id:
+            query["owner_id"] = owner_id
+        children = []
+        cursor = (
+            self.collection.find(query, {"_id": 1})
+            .hint(FOLDER_TREE_INDEX)
+            .batch_size(FOLDER_TREE_BATCH_SIZE)
+        )
+        for doc in await cursor.to_list(None):
+            child_id = str(doc["_id"])
+            if child_id not in seen:
+                seen.add(child_id)
+                children.append(child_id)
+                if oids is not None:
+                    oids.append(doc["_id"])
+        return children
+
     async def get_all_children_folders(self, folder_id: str) -> List[str]:
         """
-        Recursively get all descendant folder IDs.
+        Get all descendant folder IDs.
         
         Args:
             folder_id: The parent folder identifier
@@ -705,17 +1616,8 @@ class MongoFolderRepository(IFolderRepository):
         Returns:
             List of all descendant folder IDs
         """
-        children = []
         try:
-            # Get direct children
-            cursor = self.collection.find({"parent_id": folder_id})
-            async for doc in cursor:
-                child_id = str(doc["_id"])
-                children.append(child_id)
-                # Recursively get descendants
-                descendants = await self.get_all_children_folders(child_id)
-                children.extend(descendants)
-            return children
+            return await self._collect_subtree_ids(folder_id)
         except Exception as e:
             logger.error(f"Failed to get children for {folder_id}: {e}")
             return []
@@ -723,7 +1625,6 @@ class MongoFolderRepository(IFolderRepository):
     async def get_folder_tree_size(self, folder_id: str) -> int:
         """
         Calculate the total size of all files in the folder AND its subfolders.
-        Uses MongoDB aggregation pipeline with $graphLookup for efficiency.
         
         Args:
             folder_id: The folder identifier
@@ -732,52 +1633,21 @@ class MongoFolderRepository(IFolderRepository):
             Total size in bytes of all files in the folder tree
         """
         try:
-            # Convert to ObjectId for matching
-            oid = self._to_object_id(folder_id)
-            if not oid:
+            if not self._to_object_id(folder_id):
                 return 0
 
-            # 1. Use $graphLookup to find all descendant folders efficiently
-            pipeline = [
-                {"$match": {"_id": oid}},
-                {
-                    "$graphLookup": {
-                        "from": "folders",
-                        "startWith": "$_id",
-                        "connectFromField": "_id",
-                        "connectToField": "parent_id",
-                        "as": "descendants"
-                    }
-                },
-                {
-                    "$project": {
-                        "all_ids": {
-                            "$map": {
-                                "input": {"$concatArrays": [["$$ROOT"], "$descendants"]},
-                                "as": "item",
-                                "in": {"$toString": "$$item._id"}  # Convert to string to match metadata.folderId
-                            }
-                        }
-                    }
-                }
-            ]
-            
-            cursor = self.collection.aggregate(pipeline)
-            result = await cursor.to_list(1)
-            if not result:
-                return 0
-                
-            all_folder_ids = result[0]['all_ids']
-
-            # 2. Sum file sizes in all these folders
-            fs_files = self.db["fs.files"]
-            size_cursor = fs_files.aggregate([
-                {"$match": {"metadata.folderId": {"$in": all_folder_ids}}},
-                {"$group": {"_id": None, "total": {"$sum": "$length"}}}
-            ])
-            
-            size_result = await size_cursor.to_list(1)
-            total_size = size_result[0]['total'] if size_result else 0
+            # Walk the tree level by level; each level's sizes are summed
+            # concurrently with the query for the next level, so the sum
+            # costs no extra round trip
+            total_size = 0
+            seen = {folder_id}
+            frontier = [folder_id]
+            while frontier:
+                sizes, frontier = await asyncio.gather(
+                    self.get_folder_contents_sizes(frontier),
+                    self._next_level(frontier, seen),
+                )
+                total_size += sum(sizes.values())
             
             logger.info(f"✓ Calculated folder tree size: {folder_id} = {total_size} bytes")
             return total_size
@@ -786,10 +1656,72 @@ class MongoFolderRepository(IFolderRepository):
             logger.error(f"Failed to calculate tree size for {folder_id}: {e}")
             return 0
 
+    async def tree_delete(self, folder_id: str, owner_id: str) -> Tuple[int, int]:
+        """
+        Delete a folder subtree with bulk operations: one query per tree
+        level to collect folder IDs, then one delete_many each for
+        fs.files, fs.chunks and folders (the folder delete runs
+        concurrently with the file deletes).
+        
+        Args:
+            folder_id: Root of the subtree to delete
+            owner_id: The owner (for verification)
+            
+        Returns:
+            Tuple of (files_deleted, bytes_freed); (0, 0) if not found/not owned
+        """
+        folder = await self.get_folder(folder_id, owner_id)
+        if not folder:
+            return 0, 0
+
+        # Keep the ObjectIds the walk reads so the folder delete below
+        # doesn't parse every ID string back
+        folder_oids = [self._to_object_id(folder_id)]
+        folder_ids = [folder_id] + await self._collect_subtree_ids(folder_id, owner_id, folder_oids)
+
+        # 1. Collect file ids and sizes in one pass
+        fs_files = self.db["fs.files"]
+        file_oids = []
+        bytes_freed = 0
+        cursor = fs_files.find(
+            {"metadata.folder_id": {"$in": folder_ids}},
+            {"_id": 1, "length": 1},
+        )
+        for doc in await cursor.to_list(None):
+            file_oids.append(doc["_id"])
+            bytes_freed += doc.get("length", 0)
+
+        # 2. Files before chunks: an interruption leaves unreachable chunks,
+        # never visible files without content
+        async def delete_files() -> None:
+            if file_oids:
+                try:
+                    await fs_files.delete_many({"_id": {"$in": file_oids}})
+                finally:
+                    file_metadata_cache.invalidate(str(oid) for oid in file_oids)
+                await self.db["fs.chunks"].delete_many({"files_id": {"$in": file_oids}})
+
+        # 3. Folders (independent of the file deletes, so run concurrently)
+        try:
+            _, result = await asyncio.gather(
+                delete_files(),
+                self.collection.delete_many({
+                    "_id": {"$in": folder_oids},
+                    "owner_id": owner_id,
+                }),
+            )
+        finally:
+            folder_metadata_cache.invalidate(folder_ids)
+
+        logger.info(
+            f"✓ Tree-deleted folder {folder_id}: {result.deleted_count} folders, "
+            f"{len(file_oids)} files, {bytes_freed} bytes"
+        )
+        return len(file_oids), bytes_freed
+
     async def delete_folder_recursive(self, folder_id: str, owner_id: str) -> bool:
         """
         Delete folder and all its contents (files and subfolders).
-        Optimized with batch operations to avoid N+1 database calls.
         
         Args:
             folder_id: The folder identifier
@@ -804,26 +1736,7 @@ class MongoFolderRepository(IFolderRepository):
             if not folder:
                 return False
 
-            # 1. Get all descendant folders
-            all_folders_to_delete = [folder_id]
-            descendants = await self.get_all_children_folders(folder_id)
-            all_folders_to_delete.extend(descendants)
-
-            # 2. Delete all files in these folders (BATCH operation with $in)
-            # Instead of deleting files one by one, delete all matching in single query
-            fs = self.db.get_collection("fs.files")
-            if all_folders_to_delete:
-                result = await fs.delete_many({"metadata.folderId": {"$in": all_folders_to_delete}})
-                logger.info(f"✓ Deleted {result.deleted_count} files from {len(all_folders_to_delete)} folders")
-
-            # 3. Delete all folders (BATCH operation with $in)
-            # Convert to ObjectIds once
-            folder_oids = [self._to_object_id(fid) for fid in all_folders_to_delete if self._to_object_id(fid)]
-            if folder_oids:
-                result = await self.collection.delete_many({"_id": {"$in": folder_oids}})
-                logger.info(f"✓ Deleted {result.deleted_count} folders")
-
-            logger.info(f"✓ Recursively deleted folder {folder_id} and all contents")
+            await self.tree_delete(folder_id, owner_id)
             return True
 
         except Exception as e:
@@ -831,67 +1744,9 @@ class MongoFolderRepository(IFolderRepository):
             return False
 
     # ========================================================================
-    # FILE QUERIES BY FOLDER
+    # SUBFOLDER QUERIES
     # ========================================================================
 
-    async def list_files_in_folder(
-        self,
-        folder_id: Optional[str],
-        owner_id: Optional[str] = None,
-    ) -> List[File]:
-        """
-        List all files in a specific folder (root if folder_id is None).
-        
-        Args:
-            folder_id: The folder identifier (None = root)
-            owner_id: The owner identifier (None = no owner restriction)
-            
-        Returns:
-            List of File entities
-        """
-        try:
-            fs = self.db.get_collection("fs.files")
-            query = {}
-            
-            if owner_id:
-                query["metadata.owner"] = owner_id
-            
-            if folder_id is None:
-                # Root files have no folder_id
-                query["metadata.folder_id"] = {"$in": [None, ""]}
-            else:
-                # Files in specific folder
-                query["metadata.folder_id"] = folder_id
-
-            cursor = fs.find(query).sort("uploadDate", -1)
-            files = []
-
-            async for doc in cursor:
-                meta = doc.get("metadata", {})
-                file = File(
-                    id=str(doc["_id"]),
-                    filename=doc.get("filename", ""),
-                    content_type=meta.get("contentType", "application/octet-stream"),
-                    size=doc.get("length", 0),
-                    owner_id=meta.get("owner", ""),
-                    folder_id=meta.get("folderId"),
-                    upload_date=doc.get("uploadDate"),
-                    encrypted=meta.get("encrypted", False),
-                    nonce=meta.get("nonce", ""),
-                    encrypted_key=meta.get("encryptedKey", ""),
-                    is_infected=meta.get("isInfected", False),
-                    is_deleted=meta.get("is_deleted", False),  # Soft delete status
-                    deleted_at=meta.get("deleted_at"),  # Deletion timestamp
-                    metadata=meta,
-                )
-                files.append(file)
-
-            return files
-
-        except Exception as e:
-            logger.error(f"Failed to list files in folder {folder_id}: {e}")
-            return []
-
     async def list_subfolders(
         self,
         parent_id: Optional[str],
@@ -905,34 +1760,24 @@ class MongoFolderRepository(IFolderRepository):
             owner_id: The owner identifier (None = no owner restriction)
             
         Returns:
-            List of Folder entities
+            List of Folder entities (metadata is not loaded)
         """
         try:
-            query = {}
+            # parent_id None matches root folders (null or missing) as a
+            # plain equality bound on the index
+            query = {"parent_id": parent_id}
             if owner_id:
                 query["owner_id"] = owner_id
-                
-            if parent_id is None:
-                query["parent_id"] = {"$in": [None]}
-            else:
-                query["parent_id"] = parent_id
-
-            cursor = self.collection.find(query).sort("created_at", -1)
-            folders = []
-
-            async for doc in cursor:
-                folder = Folder(
-                    id=str(doc["_id"]),
-                    name=doc.get("name", ""),
-                    owner_id=doc.get("owner_id", ""),
-                    parent_id=doc.get("parent_id"),
-                    created_at=doc.get("created_at"),
-                    updated_at=doc.get("updated_at"),
-                    metadata=doc.get("metadata", {}),
-                )
-                folders.append(folder)
 
-            return folders
+            cursor = (
+                self.collection.find(query, FOLDER_LIST_PROJECTION)
+                .sort("created_at", -1)
+                .batch_size(FOLDER_LIST_BATCH_SIZE)
+            )
+            if owner_id:
+                cursor = cursor.hint(FOLDER_LISTING_INDEX)
+
+            return [_folder_from_doc(doc) for doc in await cursor.to_list(None)]
 
         except Exception as e:
             logger.error(f"Failed to list subfolders for {parent_id}: {e}")
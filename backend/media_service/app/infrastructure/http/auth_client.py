@@ -3,9 +3,17 @@ HTTP client for communicating with the Auth Service.
 Implements IQuotaRepository using direct HTTP calls instead of messaging.
 """
 
+import asyncio
 import httpx
 import logging
+from typing import Dict
 from app.domain.interfaces import IQuotaRepository
+from app.infrastructure.http.clients import get_http_client
+from app.infrastructure.http.concurrency import (
+    AUTH_SERVICE_MAX_CONCURRENCY,
+    get_circuit_breaker,
+    get_request_semaphore,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -15,17 +23,23 @@ class HttpQuotaRepository(IQuotaRepository):
     Updates user storage quota via HTTP calls to the Auth Service.
     
     This is a synchronous, simpler alternative to RabbitMQ messaging.
-    Requests fail fast if the Auth Service is unreachable.
+    Requests fail fast if the Auth Service is unreachable: after repeated
+    failures a process-wide circuit breaker skips the call entirely.
     """
 
-    def __init__(self, auth_service_url: str):
+    def __init__(self, auth_service_url: str, max_concurrency: int = AUTH_SERVICE_MAX_CONCURRENCY):
         """
         Initialize the HTTP quota client.
         
         Args:
             auth_service_url: Base URL of the Auth Service (e.g., http://auth_service:8000)
+            max_concurrency: Max in-flight requests to the Auth Service (process-wide)
         """
-        self.url = auth_service_url
+        self.url = auth_service_url.rstrip("/")
+        self._slots = get_request_semaphore(self.url, max_concurrency)
+        # Shared keep-alive pool: no TCP/TLS setup per quota update
+        self._client = get_http_client(self.url, max_concurrency)
+        self._breaker = get_circuit_breaker(self.url)
 
     async def update_usage(self, user_id: str, size_delta: int) -> None:
         """
@@ -38,24 +52,63 @@ class HttpQuotaRepository(IQuotaRepository):
         Note:
             - Does not raise exceptions on failure, only logs them
             - This prevents upload/delete failures from cascade failures in Auth Service
+            - While the circuit breaker is open the update is skipped
         """
+        await self._send_update(user_id, size_delta)
+
+    async def _send_update(self, user_id: str, size_delta: int) -> bool:
+        """
+        POST one quota update, logging (not raising) failures.
+        
+        Args:
+            user_id: The user whose quota should be updated
+            size_delta: The change in storage
+            
+        Returns:
+            True if the update never reached the Auth Service (circuit open,
+            connection refused or not established), so retrying it cannot
+            apply it twice; False if it was applied or may have been
+        """
+        if self._breaker.is_open:
+            logger.warning(f"⚠️ Skipped quota update for user {user_id}: Auth Service circuit open")
+            return True
+
         try:
-            async with httpx.AsyncClient() as client:
+            async with self._slots:
                 # POST to the internal quota endpoint
-                response = await client.post(
-                    f"{self.url}/internal/quota/update",
+                response = await self._client.post(
+                    "/internal/quota/update",
                     json={"user_id": user_id, "size_delta": size_delta},
                     timeout=5.0,  # Fail fast if auth service is down
                 )
                 response.raise_for_status()
+                self._breaker.record_success()
                 logger.info(f"✅ Updated quota for user {user_id}: {size_delta:+d} bytes")
 
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+            # The request was never sent
+            self._breaker.record_failure()
+            logger.error(
+                f"❌ Could not reach Auth Service to update quota for user {user_id}: {e!r}"
+            )
+            return True
         except httpx.TimeoutException:
+            self._breaker.record_failure()
             logger.error(
                 f"❌ Timeout updating quota for user {user_id}: "
                 f"Auth Service did not respond within 5 seconds"
             )
+        except httpx.HTTPStatusError as e:
+            # A 4xx means the service is up and rejected this update
+            if e.response.status_code >= 500:
+                self._breaker.record_failure()
+            else:
+                self._breaker.record_success()
+            logger.error(
+                f"❌ Failed to update quota for user {user_id}: HTTP error {e}"
+            )
         except httpx.HTTPError as e:
+            self._breaker.record_failure()
             logger.error(
                 f"❌ Failed to update quota for user {user_id}: HTTP error {e}"
             )
@@ -63,3 +116,24 @@ class HttpQuotaRepository(IQuotaRepository):
             logger.error(
                 f"❌ Unexpected error updating quota for user {user_id}: {str(e)}"
             )
+        return False
+
+    async def batch_update_usage(self, deltas: Dict[str, int]) -> Dict[str, int]:
+        """
+        Apply quota changes for several users (one concurrent update each).
+        
+        Args:
+            deltas: user_id -> size change in bytes
+            
+        Returns:
+            The deltas that were not delivered (circuit open or connection
+            failures); nothing of them was applied, so the caller may retry
+            them later
+        """
+        if self._breaker.is_open:
+            return {user_id: size_delta for user_id, size_delta in deltas.items() if size_delta}
+        items = [(user_id, size_delta) for user_id, size_delta in deltas.items() if size_delta]
+        unsent = await asyncio.gather(*(
+            self._send_update(user_id, size_delta) for user_id, size_delta in items
+        ))
+        return {user_id: size_delta for (user_id, size_delta), failed in zip(items, unsent) if failed}
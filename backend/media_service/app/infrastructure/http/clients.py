@@ -0,0 +1,47 @@
+"""
+Process-wide HTTP clients for outbound service calls.
+HTTP clients are built per request, so each call used to open (and tear
+down) its own connection pool; sharing one httpx.AsyncClient per target
+service keeps connections alive across requests instead.
+"""
+
+from typing import Dict
+
+import httpx
+
+from app.infrastructure.http.concurrency import AUTH_SERVICE_MAX_CONCURRENCY
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def get_http_client(target: str, max_connections: int = AUTH_SERVICE_MAX_CONCURRENCY) -> httpx.AsyncClient:
+    """
+    Return the shared client for a target service, creating it on first use.
+
+    Args:
+        target: Base URL of the service being called (requests use paths
+            relative to it; a trailing slash does not make a separate pool)
+        max_connections: Pool size used when the client is first created
+
+    Returns:
+        httpx.AsyncClient shared by every caller of that target
+    """
+    target = target.rstrip("/")
+    client = _clients.get(target)
+    if client is None or client.is_closed:
+        client = _clients[target] = httpx.AsyncClient(
+            base_url=target,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+    return client
+
+
+async def close_http_clients() -> None:
+    """Close every shared client (call on shutdown)."""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
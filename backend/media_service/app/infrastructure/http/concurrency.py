@@ -0,0 +1,90 @@
+"""
+Process-wide concurrency limits and circuit breakers for outbound HTTP calls.
+HTTP clients are built per request, so a per-instance semaphore or breaker
+would not cap anything; both are shared per target service instead.
+"""
+
+import asyncio
+import time
+from typing import Dict
+
+AUTH_SERVICE_MAX_CONCURRENCY = 32  # In-flight requests to the Auth Service per process
+CIRCUIT_FAIL_MAX = 5  # Consecutive failures before a target's breaker opens
+CIRCUIT_RESET_TIMEOUT = 30.0  # Seconds an open breaker short-circuits calls
+
+_semaphores: Dict[str, asyncio.Semaphore] = {}
+_breakers: Dict[str, "CircuitBreaker"] = {}
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+    Opens after fail_max failures in a row; while open, callers should fail
+    fast instead of waiting on timeouts. Once reset_timeout has passed calls
+    are let through again: a success closes the breaker, a failure re-opens
+    it for another reset_timeout.
+    """
+
+    def __init__(self, fail_max: int = CIRCUIT_FAIL_MAX, reset_timeout: float = CIRCUIT_RESET_TIMEOUT):
+        """
+        Initialize a closed breaker.
+
+        Args:
+            fail_max: Consecutive failures that open the breaker
+            reset_timeout: Seconds to stay open before letting calls through
+        """
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls should be short-circuited."""
+        return (
+            self._failures >= self.fail_max
+            and time.monotonic() - self._opened_at < self.reset_timeout
+        )
+
+    def record_success(self) -> None:
+        """Close the breaker."""
+        self._failures = 0
+
+    def record_failure(self) -> None:
+        """Count a failure, (re-)opening the breaker at fail_max."""
+        self._failures += 1
+        if self._failures >= self.fail_max:
+            self._opened_at = time.monotonic()
+
+
+def get_request_semaphore(target: str, max_concurrency: int) -> asyncio.Semaphore:
+    """
+    Return the shared semaphore capping concurrent calls to a target.
+    
+    Args:
+        target: Base URL of the service being called
+        max_concurrency: Limit used when the semaphore is first created
+        
+    Returns:
+        asyncio.Semaphore shared by every client calling that target
+    """
+    semaphore = _semaphores.get(target)
+    if semaphore is None:
+        semaphore = _semaphores[target] = asyncio.Semaphore(max_concurrency)
+    return semaphore
+
+
+def get_circuit_breaker(target: str) -> CircuitBreaker:
+    """
+    Return the shared circuit breaker for a target.
+    
+    Args:
+        target: Base URL of the service being called
+        
+    Returns:
+        CircuitBreaker shared by every client calling that target
+    """
+    breaker = _breakers.get(target)
+    if breaker is None:
+        breaker = _breakers[target] = CircuitBreaker()
+    return breaker
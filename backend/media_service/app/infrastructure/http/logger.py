@@ -7,9 +7,12 @@ for logging activities and updating storage quotas.
 
 import httpx
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Union
 
+from app.domain.entities import ActivityDetails
 from app.domain.interfaces import IActivityLogger, IQuotaRepository
+from app.infrastructure.http.clients import get_http_client
+from app.infrastructure.http.concurrency import AUTH_SERVICE_MAX_CONCURRENCY, get_request_semaphore
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +23,13 @@ class HttpActivityLogger(IActivityLogger):
     Sends logs to Auth Service via HTTP POST with API key authentication.
     """
 
-    def __init__(self, auth_service_url: str, api_key: str, timeout: float = 2.0):
+    def __init__(
+        self,
+        auth_service_url: str,
+        api_key: str,
+        timeout: float = 2.0,
+        max_concurrency: int = AUTH_SERVICE_MAX_CONCURRENCY,
+    ):
         """
         Initialize the HTTP activity logger.
 
@@ -28,16 +37,19 @@ class HttpActivityLogger(IActivityLogger):
             auth_service_url: Base URL of Auth Service (e.g., "http://auth_service:8000")
             api_key: Internal API key for authentication with Auth Service
             timeout: HTTP request timeout in seconds (default 2.0)
+            max_concurrency: Max in-flight requests to the Auth Service (process-wide)
         """
         self.auth_service_url = auth_service_url.rstrip("/")
         self.api_key = api_key
         self.timeout = timeout
+        self._slots = get_request_semaphore(self.auth_service_url, max_concurrency)
+        self._client = get_http_client(self.auth_service_url, max_concurrency)
 
     async def log_activity(
         self,
         user_id: str,
         action: str,
-        details: Dict[str, Any] = None,
+        details: Union[ActivityDetails, Dict[str, Any], None] = None,
         ip_address: Optional[str] = None,
     ) -> None:
         """
@@ -49,20 +61,20 @@ class HttpActivityLogger(IActivityLogger):
         Args:
             user_id: The user who performed the action
             action: Action type (e.g., "FILE_UPLOAD", "FILE_DELETE")
-            details: Optional context data (filename, size, etc.)
+            details: Optional context data (ActivityDetails or dict)
             ip_address: Optional client IP address
         """
-        async with httpx.AsyncClient() as client:
+        async with self._slots:
             try:
                 payload = {
                     "user_id": user_id,
                     "action": action,
-                    "details": details or {},
+                    "details": details.to_dict() if isinstance(details, ActivityDetails) else details or {},
                     "ip_address": ip_address,
                 }
 
-                response = await client.post(
-                    f"{self.auth_service_url}/logs/internal",
+                response = await self._client.post(
+                    "/logs/internal",
                     json=payload,
                     headers={"X-API-Key": self.api_key},
                     timeout=self.timeout,
@@ -89,7 +101,13 @@ class HttpQuotaRepository(IQuotaRepository):
     Updates storage quota in Auth Service via HTTP POST with API key authentication.
     """
 
-    def __init__(self, auth_service_url: str, api_key: str, timeout: float = 5.0):
+    def __init__(
+        self,
+        auth_service_url: str,
+        api_key: str,
+        timeout: float = 5.0,
+        max_concurrency: int = AUTH_SERVICE_MAX_CONCURRENCY,
+    ):
         """
         Initialize the HTTP quota repository.
 
@@ -97,10 +115,13 @@ class HttpQuotaRepository(IQuotaRepository):
             auth_service_url: Base URL of Auth Service (e.g., "http://auth_service:8000")
             api_key: Internal API key for authentication with Auth Service
             timeout: HTTP request timeout in seconds (default 5.0)
+            max_concurrency: Max in-flight requests to the Auth Service (process-wide)
         """
         self.auth_service_url = auth_service_url.rstrip("/")
         self.api_key = api_key
         self.timeout = timeout
+        self._slots = get_request_semaphore(self.auth_service_url, max_concurrency)
+        self._client = get_http_client(self.auth_service_url, max_concurrency)
 
     async def update_usage(self, user_id: str, size_delta: int) -> None:
         """
@@ -112,10 +133,10 @@ class HttpQuotaRepository(IQuotaRepository):
             user_id: The user whose quota should be updated
             size_delta: The change in storage (positive for upload, negative for delete)
         """
-        async with httpx.AsyncClient() as client:
+        async with self._slots:
             try:
-                response = await client.post(
-                    f"{self.auth_service_url}/users/internal/quota/update",
+                response = await self._client.post(
+                    "/users/internal/quota/update",
                     json={"user_id": user_id, "size_delta": size_delta},
                     headers={"X-API-Key": self.api_key},
                     timeout=self.timeout,
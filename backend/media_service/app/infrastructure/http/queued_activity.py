@@ -0,0 +1,118 @@
+"""
+Fire-and-forget decorator for IActivityLogger.
+log_activity only enqueues the entry; a few background workers send the
+queued entries through the wrapped logger, so the Auth Service round trip
+never adds to upload, download or delete latency.
+"""
+
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from app.domain.entities import ActivityDetails
+from app.domain.interfaces import IActivityLogger
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_QUEUE_SIZE = 10_000  # Entries buffered before new ones are dropped
+ACTIVITY_WORKERS = 4  # Concurrent senders per queue
+
+_shared: Dict[str, "QueuedActivityLogger"] = {}
+
+
+class QueuedActivityLogger(IActivityLogger):
+    """
+    Queues activity entries in memory and sends them from background workers.
+
+    Activity logging is best-effort: when the queue is full the entry is
+    dropped (and logged) instead of making the caller wait. Use one instance
+    per process (see get_queued_activity_logger) and call close() on
+    shutdown to flush pending entries.
+    """
+
+    def __init__(
+        self,
+        inner: IActivityLogger,
+        max_queue: int = ACTIVITY_QUEUE_SIZE,
+        workers: int = ACTIVITY_WORKERS,
+    ):
+        """
+        Initialize the queue around another activity logger.
+
+        Args:
+            inner: Logger that actually sends the entries
+            max_queue: Maximum number of queued entries
+            workers: Number of background sender tasks
+        """
+        self.inner = inner
+        self.workers = workers
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._workers: List[asyncio.Task] = []
+
+    async def _work(self) -> None:
+        """Send queued entries one at a time until cancelled."""
+        while True:
+            user_id, action, details, ip_address = await self._queue.get()
+            try:
+                await self.inner.log_activity(user_id, action, details, ip_address)
+            except Exception as e:
+                logger.error(f"Failed to send queued activity {action} for user {user_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def log_activity(
+        self,
+        user_id: str,
+        action: str,
+        details: Union[ActivityDetails, Dict[str, Any], None] = None,
+        ip_address: Optional[str] = None,
+    ) -> None:
+        """Queues an activity entry (dropped if the queue is full)."""
+        if len(self._workers) < self.workers or any(task.done() for task in self._workers):
+            self._workers = [task for task in self._workers if not task.done()]
+            while len(self._workers) < self.workers:
+                self._workers.append(asyncio.create_task(self._work()))
+
+        # Snapshot the details now: callers may reuse them after returning
+        payload = details.to_dict() if isinstance(details, ActivityDetails) else dict(details or {})
+        try:
+            self._queue.put_nowait((user_id, action, payload, ip_address))
+        except asyncio.QueueFull:
+            logger.warning(f"Activity queue full; dropped {action} for user {user_id}")
+
+    async def close(self) -> None:
+        """Flush pending entries and stop the workers (call on shutdown)."""
+        if any(not task.done() for task in self._workers):
+            await self._queue.join()
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+
+def get_queued_activity_logger(
+    target: str,
+    make_inner: Callable[[], IActivityLogger],
+) -> QueuedActivityLogger:
+    """
+    Return the process-wide queue for an activity target, creating it on first use.
+
+    Args:
+        target: Base URL of the service the entries go to
+        make_inner: Builds the logger to wrap (called once per target)
+
+    Returns:
+        QueuedActivityLogger shared by every request
+    """
+    activity_logger = _shared.get(target)
+    if activity_logger is None:
+        activity_logger = _shared[target] = QueuedActivityLogger(make_inner())
+    return activity_logger
+
+
+async def close_queued_activity_loggers() -> None:
+    """Flush and stop every shared queue (call on shutdown)."""
+    activity_loggers = list(_shared.values())
+    _shared.clear()
+    for activity_logger in activity_loggers:
+        await activity_logger.close()
@@ -0,0 +1,165 @@
+"""
+Fire-and-forget decorator for IQuotaRepository.
+update_usage only enqueues the delta; a background task drains the queue,
+sums the deltas per user and hands them to the wrapped repository in one
+batch_update_usage call, so Auth Service latency never adds to upload or
+delete latency and a burst of N files costs one update per user.
+Deltas the wrapped repository reports as not delivered (circuit open,
+connection failures) are held and retried with exponential backoff instead
+of being dropped.
+"""
+
+import asyncio
+import logging
+from typing import Callable, Dict, Optional, Tuple
+
+from app.domain.interfaces import IQuotaRepository
+
+logger = logging.getLogger(__name__)
+
+QUOTA_QUEUE_SIZE = 10_000  # Deltas buffered before callers start waiting
+QUOTA_COALESCE_WINDOW = 0.05  # Seconds to gather more deltas after the first one
+QUOTA_RETRY_DELAY = 1.0  # First retry delay for deltas the target did not receive
+QUOTA_RETRY_MAX_DELAY = 30.0  # Backoff cap (matches the breaker reset timeout)
+
+_shared: Dict[str, "QueuedQuotaRepository"] = {}
+
+
+class QueuedQuotaRepository(IQuotaRepository):
+    """
+    Queues quota deltas in memory and applies them from a background task.
+
+    Back-pressure: update_usage returns as soon as the delta is queued and
+    only waits when the queue is full. Use one instance per process (see
+    get_queued_quota_repository) and call close() on shutdown to flush
+    pending deltas.
+    """
+
+    def __init__(
+        self,
+        inner: IQuotaRepository,
+        max_queue: int = QUOTA_QUEUE_SIZE,
+        coalesce_window: float = QUOTA_COALESCE_WINDOW,
+    ):
+        """
+        Initialize the queue around another quota repository.
+
+        Args:
+            inner: Repository that actually applies the updates
+            max_queue: Maximum number of queued deltas
+            coalesce_window: Seconds to wait for more deltas before flushing
+        """
+        self.inner = inner
+        self.coalesce_window = coalesce_window
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._drainer: Optional[asyncio.Task] = None
+        # Coalesced deltas the inner repository reported as not delivered
+        self._held: Dict[str, int] = {}
+        # Set by close(): wakes a backoff wait for the final attempt
+        self._closing = asyncio.Event()
+
+    async def _drain(self) -> None:
+        """Apply queued deltas, coalesced per user, until close() asks it to stop."""
+        retry_delay = QUOTA_RETRY_DELAY
+        while True:
+            if self._held:
+                # Retry the held deltas (plus anything queued meanwhile);
+                # close() cuts the backoff short for one final attempt
+                try:
+                    await asyncio.wait_for(self._closing.wait(), retry_delay)
+                except asyncio.TimeoutError:
+                    pass
+                retry_delay = min(retry_delay * 2, QUOTA_RETRY_MAX_DELAY)
+                batch = []
+            else:
+                batch = [await self._queue.get()]
+                if self.coalesce_window > 0 and not self._closing.is_set():
+                    await asyncio.sleep(self.coalesce_window)
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            stop = False
+            deltas, self._held = self._held, {}
+            for item in batch:
+                if item is None:
+                    # close()'s sentinel: this is the final attempt
+                    stop = True
+                    continue
+                user_id, size_delta = item
+                deltas[user_id] = deltas.get(user_id, 0) + size_delta
+            try:
+                # Unsent deltas were not applied, so replaying cannot double-count
+                if deltas:
+                    self._held = await self.inner.batch_update_usage(deltas) or {}
+                if self._held and not stop:
+                    logger.warning(
+                        f"Quota target unavailable; holding updates for {len(self._held)} users, "
+                        f"retrying in {retry_delay:g}s"
+                    )
+                elif not self._held:
+                    retry_delay = QUOTA_RETRY_DELAY
+            except Exception as e:
+                logger.error(f"Failed to apply {len(batch)} queued quota updates: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+            if stop:
+                if self._held:
+                    logger.error(f"Dropping held quota updates for {len(self._held)} users on shutdown")
+                    self._held = {}
+                return
+
+    async def update_usage(self, user_id: str, size_delta: int) -> None:
+        """Queues a quota delta."""
+        if self._drainer is None or self._drainer.done():
+            self._drainer = asyncio.create_task(self._drain())
+        item: Tuple[str, int] = (user_id, size_delta)
+        await self._queue.put(item)
+
+    async def close(self) -> None:
+        """
+        Flush pending deltas and stop the background task (call on shutdown).
+        Held deltas get one final attempt right away instead of waiting out
+        the backoff; whatever still cannot be delivered is dropped.
+        """
+        if self._drainer is not None and not self._drainer.done():
+            self._closing.set()
+            await self._queue.put(None)
+            await self._drainer
+        self._drainer = None
+        self._closing.clear()
+        if self._held:
+            logger.error(f"Dropping held quota updates for {len(self._held)} users on shutdown")
+            self._held = {}
+
+
+def get_queued_quota_repository(
+    target: str,
+    make_inner: Callable[[], IQuotaRepository],
+) -> QueuedQuotaRepository:
+    """
+    Return the process-wide queue for a quota target, creating it on first use.
+
+    Args:
+        target: Base URL of the service the deltas go to
+        make_inner: Builds the repository to wrap (called once per target)
+
+    Returns:
+        QueuedQuotaRepository shared by every request
+    """
+    repo = _shared.get(target)
+    if repo is None:
+        repo = _shared[target] = QueuedQuotaRepository(make_inner())
+    return repo
+
+
+async def close_queued_quota_repositories() -> None:
+    """Flush and stop every shared queue (call on shutdown)."""
+    repos = list(_shared.values())
+    _shared.clear()
+    for repo in repos:
+        await repo.close()
@@ -4,6 +4,7 @@ Used when we don't need to publish events (messaging disabled).
 """
 
 import logging
+from typing import List, Tuple
 from app.domain.interfaces import IEventPublisher
 
 logger = logging.getLogger(__name__)
@@ -28,3 +29,7 @@ class NoOpEventPublisher(IEventPublisher):
     async def publish_download(self, user_id: str, file_id: str) -> None:
         """Discards download events."""
         logger.debug(f"[NoOp] Would publish download event for {file_id}")
+
+    async def publish_batch(self, events: List[Tuple[str, str, str, int]]) -> None:
+        """Discards a batch of events."""
+        logger.debug(f"[NoOp] Would publish {len(events)} batched events")
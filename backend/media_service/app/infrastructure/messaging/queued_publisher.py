@@ -0,0 +1,97 @@
+"""
+Fire-and-forget decorator for IEventPublisher.
+publish_* calls only enqueue the event; a background task drains the queue
+and hands events to the wrapped publisher in batches (publish_batch), so
+broker latency never adds to request latency.
+"""
+
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+
+from app.domain.interfaces import IEventPublisher
+
+logger = logging.getLogger(__name__)
+
+EVENT_QUEUE_SIZE = 10_000  # Events buffered before publishers start waiting
+EVENT_BATCH_SIZE = 100  # Max events handed to the wrapped publisher at once
+
+
+class QueuedEventPublisher(IEventPublisher):
+    """
+    Queues events in memory and publishes them from a background task.
+
+    Back-pressure: publish_* return as soon as the event is queued and only
+    wait when the queue is full. Create one instance per process (e.g. at
+    startup) and call close() on shutdown to flush pending events.
+    """
+
+    def __init__(
+        self,
+        inner: IEventPublisher,
+        max_queue: int = EVENT_QUEUE_SIZE,
+        batch_size: int = EVENT_BATCH_SIZE,
+    ):
+        """
+        Initialize the queue around another publisher.
+
+        Args:
+            inner: Publisher that actually delivers the events
+            max_queue: Maximum number of queued events
+            batch_size: Maximum events per publish_batch call
+        """
+        self.inner = inner
+        self.batch_size = batch_size
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._drainer: Optional[asyncio.Task] = None
+
+    async def _enqueue(self, event: Tuple[str, str, str, int]) -> None:
+        """Queue one event, starting the drain task on first use."""
+        if self._drainer is None or self._drainer.done():
+            self._drainer = asyncio.create_task(self._drain())
+        await self._queue.put(event)
+
+    async def _drain(self) -> None:
+        """Publish queued events in batches until cancelled."""
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            try:
+                await self.inner.publish_batch(batch)
+            except Exception as e:
+                logger.error(f"Failed to publish {len(batch)} queued events: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def publish_upload(self, user_id: str, file_id: str, file_size: int) -> None:
+        """Queues an upload event."""
+        await self._enqueue(("upload", user_id, file_id, file_size))
+
+    async def publish_delete(self, user_id: str, file_id: str, file_size: int) -> None:
+        """Queues a delete event."""
+        await self._enqueue(("delete", user_id, file_id, file_size))
+
+    async def publish_download(self, user_id: str, file_id: str) -> None:
+        """Queues a download event."""
+        await self._enqueue(("download", user_id, file_id, 0))
+
+    async def publish_batch(self, events: List[Tuple[str, str, str, int]]) -> None:
+        """Queues several events."""
+        for event in events:
+            await self._enqueue(event)
+
+    async def close(self) -> None:
+        """Flush pending events and stop the background task (call on shutdown)."""
+        if self._drainer is not None and not self._drainer.done():
+            await self._queue.join()
+            self._drainer.cancel()
+            try:
+                await self._drainer
+            except asyncio.CancelledError:
+                pass
+        self._drainer = None
@@ -3,9 +3,12 @@ AES encryption service implementing ICryptoService.
 Handles envelope encryption with AES-CTR mode.
 """
 
+import asyncio
 import os
 import logging
-from typing import AsyncGenerator, Tuple
+from concurrent.futures import Executor
+from functools import lru_cache
+from typing import AsyncIterable, AsyncIterator, List, Optional, Tuple
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.backends import default_backend
 
@@ -13,7 +16,102 @@ from app.domain.interfaces import ICryptoService
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
-CHUNK_SIZE = 64 * 1024  # 64KB chunks
+
+# Blocks at least this large are ciphered in a worker thread (OpenSSL releases
+# the GIL); smaller ones stay inline where dispatch would cost more than AES
+CIPHER_OFFLOAD_MIN_BYTES = 256 * 1024
+
+
+async def _transform_stream(
+    stream: AsyncIterable[bytes],
+    context,
+    chunk_size: Optional[int],
+    operation: str,
+    executor: Optional[Executor] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Run a chunk stream through a single cipher context.
+    
+    Args:
+        stream: Input async iterable yielding chunks
+        context: Cipher encryptor/decryptor reused for the whole stream
+        chunk_size: If set, chunks smaller than this are coalesced so each
+            cipher call processes at least chunk_size bytes
+        operation: Label for error logs ("Encryption"/"Decryption")
+        executor: Executor for large blocks (None = the loop's default executor)
+        
+    Yields:
+        Transformed chunks
+    """
+    loop = asyncio.get_running_loop()
+    update = context.update
+
+    async def transform(block) -> bytes:
+        if len(block) >= CIPHER_OFFLOAD_MIN_BYTES:
+            return await loop.run_in_executor(executor, update, block)
+        return update(block)
+
+    try:
+        if not chunk_size:
+            async for chunk in stream:
+                yield await transform(chunk)
+        else:
+            pending = bytearray()
+            async for chunk in stream:
+                if not pending and len(chunk) >= chunk_size:
+                    yield await transform(chunk)
+                    continue
+                pending += chunk
+                if len(pending) >= chunk_size:
+                    yield await transform(pending)
+                    pending.clear()
+            if pending:
+                yield await transform(pending)
+        # Finalize
+        final = context.finalize()
+        if final:
+            yield final
+    except Exception as e:
+        logger.error(f"{operation} error: {e}")
+        raise
+
+
+_AES_BLOCK = 16
+
+
+def _ctr_counter_at(nonce: bytes, offset: int) -> bytes:
+    """Counter block covering ciphertext byte offset (OpenSSL increments all 128 bits)."""
+    if not offset:
+        return nonce
+    counter = (int.from_bytes(nonce, "big") + offset // _AES_BLOCK) % (1 << 128)
+    return counter.to_bytes(_AES_BLOCK, "big")
+
+
+@lru_cache(maxsize=1)
+def _master_cipher(master_key: bytes) -> Cipher:
+    """AES-ECB key-wrapping cipher for the master key, built once per process."""
+    return Cipher(
+        algorithms.AES(master_key),
+        modes.ECB(),
+        backend=default_backend()
+    )
+
+
+def _ecb_batch(context, blocks: List[bytes]) -> List[bytes]:
+    """
+    Run several block-aligned values through one ECB context.
+    ECB handles each 16-byte block independently, so the joined result can
+    be split back at the original boundaries.
+    """
+    if any(len(block) % 16 for block in blocks):
+        raise ValueError("Keys must be a multiple of the AES block size (16 bytes)")
+    out = context.update(b"".join(blocks)) + context.finalize()
+    results = []
+    offset = 0
+    for block in blocks:
+        results.append(out[offset:offset + len(block)])
+        offset += len(block)
+    return results
 
 
 class AESCryptoService(ICryptoService):
@@ -25,6 +123,11 @@ class AESCryptoService(ICryptoService):
     def __init__(self):
         """Initialize with master key from config"""
         self.master_key = self._get_master_key()
+        self._master_cipher = _master_cipher(self.master_key)
+
+    def prepare(self) -> None:
+        """Build the process-wide master key cipher ahead of the first request."""
+        _master_cipher(self.master_key)
 
     def _get_master_key(self) -> bytes:
         """
@@ -33,10 +136,8 @@ class AESCryptoService(ICryptoService):
         Returns:
             32-byte key for AES-256
         """
-        key_hex = settings.encryption_master_key
-        if not key_hex:
-            raise ValueError("encryption_master_key is missing in .env")
-        return bytes.fromhex(key_hex)
+        # Decoded and validated once when settings are loaded
+        return settings.master_key_bytes
 
     def generate_key_pair(self) -> Tuple[bytes, bytes]:
         """
@@ -51,17 +152,21 @@ class AESCryptoService(ICryptoService):
 
     def encrypt_stream(
         self,
-        stream: AsyncGenerator,
+        stream: AsyncIterable[bytes],
         file_key: bytes,
         nonce: bytes,
-    ) -> AsyncGenerator:
+        chunk_size: Optional[int] = None,
+        executor: Optional[Executor] = None,
+    ) -> AsyncIterator[bytes]:
         """
         Create async generator that encrypts chunks with AES-CTR.
         
         Args:
-            stream: Input async generator yielding plaintext chunks
+            stream: Input async iterable yielding plaintext chunks
             file_key: File-specific encryption key
             nonce: Nonce for CTR mode
+            chunk_size: Optional minimum block size per cipher call
+            executor: Executor for large blocks (None = default executor)
             
         Yields:
             Encrypted chunks
@@ -71,59 +176,43 @@ class AESCryptoService(ICryptoService):
             modes.CTR(nonce),
             backend=default_backend()
         )
-        encryptor = cipher.encryptor()
-
-        async def _encrypt_gen():
-            try:
-                async for chunk in stream:
-                    yield encryptor.update(chunk)
-                # Finalize
-                final = encryptor.finalize()
-                if final:
-                    yield final
-            except Exception as e:
-                logger.error(f"Encryption error: {e}")
-                raise
-
-        return _encrypt_gen()
+        return _transform_stream(stream, cipher.encryptor(), chunk_size, "Encryption", executor)
 
     def decrypt_stream(
         self,
-        stream: AsyncGenerator,
+        stream: AsyncIterable[bytes],
         file_key: bytes,
         nonce: bytes,
-    ) -> AsyncGenerator:
+        chunk_size: Optional[int] = None,
+        executor: Optional[Executor] = None,
+        offset: int = 0,
+    ) -> AsyncIterator[bytes]:
         """
         Create async generator that decrypts chunks with AES-CTR.
+        CTR is seekable: a range starting at offset only needs the counter
+        advanced by offset // 16 blocks, not the preceding bytes decrypted.
         
         Args:
-            stream: Input async generator yielding ciphertext chunks
+            stream: Input async iterable yielding ciphertext chunks
             file_key: File-specific decryption key
             nonce: Nonce for CTR mode
+            chunk_size: Optional minimum block size per cipher call
+            executor: Executor for large blocks (None = default executor)
+            offset: Ciphertext position of the stream's first byte
             
         Yields:
             Decrypted chunks
         """
         cipher = Cipher(
             algorithms.AES(file_key),
-            modes.CTR(nonce),
+            modes.CTR(_ctr_counter_at(nonce, offset)),
             backend=default_backend()
         )
         decryptor = cipher.decryptor()
-
-        async def _decrypt_gen():
-            try:
-                async for chunk in stream:
-                    yield decryptor.update(chunk)
-                # Finalize
-                final = decryptor.finalize()
-                if final:
-                    yield final
-            except Exception as e:
-                logger.error(f"Decryption error: {e}")
-                raise
-
-        return _decrypt_gen()
+        if offset % _AES_BLOCK:
+            # Burn the keystream bytes that precede offset in its block
+            decryptor.update(bytes(offset % _AES_BLOCK))
+        return _transform_stream(stream, decryptor, chunk_size, "Decryption", executor)
 
     def wrap_key(self, file_key: bytes) -> bytes:
         """
@@ -135,12 +224,7 @@ class AESCryptoService(ICryptoService):
         Returns:
             Encrypted key
         """
-        cipher = Cipher(
-            algorithms.AES(self.master_key),
-            modes.ECB(),
-            backend=default_backend()
-        )
-        encryptor = cipher.encryptor()
+        encryptor = self._master_cipher.encryptor()
         return encryptor.update(file_key) + encryptor.finalize()
 
     def unwrap_key(self, encrypted_key: bytes) -> bytes:
@@ -153,10 +237,29 @@ class AESCryptoService(ICryptoService):
         Returns:
             Decrypted file key
         """
-        cipher = Cipher(
-            algorithms.AES(self.master_key),
-            modes.ECB(),
-            backend=default_backend()
-        )
-        decryptor = cipher.decryptor()
+        decryptor = self._master_cipher.decryptor()
         return decryptor.update(encrypted_key) + decryptor.finalize()
+
+    def wrap_keys(self, file_keys: List[bytes]) -> List[bytes]:
+        """
+        Wrap several file keys with one master-key encryptor.
+        
+        Args:
+            file_keys: File-specific keys to wrap
+            
+        Returns:
+            Encrypted keys, in the same order
+        """
+        return _ecb_batch(self._master_cipher.encryptor(), file_keys)
+
+    def unwrap_keys(self, encrypted_keys: List[bytes]) -> List[bytes]:
+        """
+        Unwrap several file keys with one master-key decryptor.
+        
+        Args:
+            encrypted_keys: Encrypted file keys
+            
+        Returns:
+            Decrypted file keys, in the same order
+        """
+        return _ecb_batch(self._master_cipher.decryptor(), encrypted_keys)
@@ -14,6 +14,10 @@ from app.presentation.api import public as public_router
 from app.presentation.api import folder_sharing as folder_sharing_router
 from app.presentation.api import public_folder_links as public_folder_links_router
 from app.database import connect_to_mongo, close_mongo_connection, init_db
+from app.infrastructure.security.encryption import AESCryptoService
+from app.infrastructure.http.clients import close_http_clients
+from app.infrastructure.http.queued_activity import close_queued_activity_loggers
+from app.infrastructure.http.queued_quota import close_queued_quota_repositories
 from app.core.config import settings
 # Import models to register them with SQLAlchemy Base
 from app.models import share
@@ -46,6 +50,9 @@ async def lifespan(app: FastAPI):
         # Connect to MongoDB
         await connect_to_mongo()
         
+        # One-time crypto setup (master key cipher)
+        AESCryptoService().prepare()
+        
         logger.info("=" * 70)
         logger.info(f"✓ {settings.service_name} v{settings.service_version}")
         logger.info("=" * 70)
@@ -59,7 +66,12 @@ async def lifespan(app: FastAPI):
     # Shutdown
     try:
         logger.info("🛑 Shutting down Media Service...")
+        # Flush queued quota updates and activity entries while the HTTP
+        # clients are still open
+        await close_queued_quota_repositories()
+        await close_queued_activity_loggers()
         await close_mongo_connection()
+        await close_http_clients()
         logger.info("✓ Shutdown complete")
     except Exception as e:
         logger.error(f"✗ Shutdown error: {e}")
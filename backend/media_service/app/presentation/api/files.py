@@ -3,8 +3,8 @@ API endpoints for file operations with Clean Architecture and dependency injecti
 All business logic is in the application service layer.
 """
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Path, Query, Depends, Request
-from fastapi.responses import StreamingResponse, RedirectResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, Path, Query, Depends, Request, Header
+from fastapi.responses import Response, StreamingResponse, RedirectResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional
 import logging
@@ -21,7 +21,6 @@ from app.application.dtos import (
 )
 from app.services.sharing_service import SharingService
 from datetime import datetime, timezone
-import httpx
 import os
 from app.schemas.sharing import (
     ShareCreate,
@@ -43,6 +42,7 @@ from app.models.share import Share, ShareLink
 from sqlalchemy.orm import Session
 import uuid
 from app.database import get_db, get_mongo_db
+from app.infrastructure.http.clients import get_http_client
 
 
 logger = logging.getLogger(__name__)
@@ -260,6 +260,8 @@ async def upload_file(
 async def download_file(
     file_id: str = Path(..., description="File ID (ObjectId)"),
     token: str = Query(None, description="Download token for public links"),
+    if_none_match: Optional[str] = Header(None),
+    range_header: Optional[str] = Header(None, alias="Range"),
     current_user_id: Optional[str] = Depends(get_optional_user_id),
     service: FileService = Depends(get_file_service),
     db: Session = Depends(get_db),
@@ -276,9 +278,12 @@ async def download_file(
     Parameters:
     - **file_id**: MongoDB ObjectId of the encrypted file
     - **token**: Optional download token for public link access
+    - **If-None-Match**: Optional ETag from an earlier download (304 if unchanged)
+    - **Range**: Optional single byte range (e.g. "bytes=0-1023")
 
     Returns:
-    - Decrypted binary file stream
+    - Decrypted binary file stream (304 Not Modified when the ETag matches,
+      206 Partial Content for a range)
     """
     try:
         is_authorized = False
@@ -359,21 +364,46 @@ async def download_file(
             file_id=file_id,
             requester_user_id=requester_user_id,
             allow_shared=allow_shared,
+            if_none_match=if_none_match,
+            range_header=range_header,
         )
 
         if not success:
+            if error == "Range not satisfiable":
+                raise HTTPException(
+                    status_code=416,
+                    detail=error,
+                    headers={"Content-Range": f"bytes */{metadata['size']}"},
+                )
             if error == "Access denied":
                 logger.warning(f"[download] Access denied for user {requester_user_id} on file_id={file_id}")
                 raise HTTPException(status_code=403, detail=error)
             logger.error(f"[download] Download failed for file_id={file_id}, error={error}")
             raise HTTPException(status_code=404, detail=error)
 
+        if metadata.get("not_modified"):
+            logger.info(f"[download] NOT MODIFIED: file_id={file_id}, access_type={access_type}")
+            return Response(status_code=304, headers={"ETag": metadata["etag"]})
+
         logger.info(f"[download] SUCCESS: file_id={file_id}, filename='{metadata['filename']}', size={metadata.get('size', 'unknown')}, access_type={access_type}")
         
+        headers = {
+            "Content-Disposition": f"attachment; filename={metadata['filename']}",
+            "ETag": metadata["etag"],
+            "Accept-Ranges": "bytes",
+        }
+        status_code = 200
+        if metadata.get("range"):
+            start, end = metadata["range"]
+            headers["Content-Range"] = f"bytes {start}-{end}/{metadata['size']}"
+            headers["Content-Length"] = str(end - start + 1)
+            status_code = 206
+
         return StreamingResponse(
             file_stream,
+            status_code=status_code,
             media_type=metadata["content_type"],
-            headers={"Content-Disposition": f"attachment; filename={metadata['filename']}"}
+            headers=headers,
         )
 
     except HTTPException:
@@ -639,8 +669,16 @@ async def get_trash(
                 "metadata.owner": user_id,
                 "metadata.is_deleted": True
             }
+            # Only the fields the trash listing shows
+            projection = {
+                "filename": 1,
+                "length": 1,
+                "uploadDate": 1,
+                "metadata.deleted_at": 1,
+                "metadata.contentType": 1,
+            }
             # Use await to convert async cursor to list
-            cursor = fs_files.find(query).sort("uploadDate", -1)
+            cursor = fs_files.find(query, projection).sort("uploadDate", -1)
             docs = await cursor.to_list(None)
             
             trash_files = []
@@ -733,7 +771,6 @@ async def empty_trash(
         
         if mongo_db is not None:
             fs_files = mongo_db.get_collection("fs.files")
-            fs_chunks = mongo_db.get_collection("fs.chunks")
             
             query = {
                 "metadata.owner": user_id,
@@ -741,26 +778,12 @@ async def empty_trash(
             }
             
             # Get list of file IDs to delete
-            cursor = fs_files.find(query)
-            file_ids = []
-            async for doc in cursor:
-                file_ids.append(doc["_id"])
-            
-            deleted_count = 0
-            failed_count = 0
+            cursor = fs_files.find(query, {"_id": 1})
+            file_ids = [str(doc["_id"]) async for doc in cursor]
             
-            # Delete each file and its chunks
-            for file_id in file_ids:
-                try:
-                    # Delete file metadata
-                    await fs_files.delete_one({"_id": file_id})
-                    # Delete associated chunks
-                    await fs_chunks.delete_many({"files_id": file_id})
-                    deleted_count += 1
-                    logger.info(f"[trash] Deleted file {file_id} from trash")
-                except Exception as e:
-                    failed_count += 1
-                    logger.error(f"[trash] Error deleting file {file_id}: {str(e)}")
+            # Delete all files and their chunks in bulk
+            deleted_count = await service.repo.delete_batch(file_ids)
+            failed_count = len(file_ids) - deleted_count
             
             logger.info(f"[trash] Emptied trash for user {user_id}: {deleted_count} deleted, {failed_count} failed")
             
@@ -1005,16 +1028,19 @@ async def get_files_shared_with_user(
 
         shares = db.query(Share).filter(Share.shared_with_user_id == uid).all()
 
+        # Fetch all file metadata in one query to get actual file names
+        try:
+            files_by_id = await file_service.repo.get_files_metadata([share.file_id for share in shares])
+        except Exception as e:
+            logger.warning(f"Failed to fetch metadata for shared files: {e}")
+            files_by_id = {}
+
         result = []
         for share in shares:
-            # Fetch file metadata to get actual file name
             file_name = "Unknown"
-            try:
-                ok, metadata, err = await file_service.get_file_metadata(share.file_id, requester_user_id=current_user_id, allow_shared=True)
-                if ok and metadata:
-                    file_name = metadata.get("filename", "Unknown")
-            except Exception as e:
-                logger.warning(f"Failed to fetch metadata for file {share.file_id}: {e}")
+            file_meta = files_by_id.get(share.file_id)
+            if file_meta:
+                file_name = file_meta.filename
             
             result.append({
                 "share_id": str(share.id),
@@ -1061,16 +1087,19 @@ async def get_files_shared_by_user(
 
         shares = db.query(Share).filter(Share.shared_by_user_id == uid).all()
 
+        # Fetch all file metadata in one query to get actual file names
+        try:
+            files_by_id = await file_service.repo.get_files_metadata([share.file_id for share in shares])
+        except Exception as e:
+            logger.warning(f"Failed to fetch metadata for shared files: {e}")
+            files_by_id = {}
+
         result = []
         for share in shares:
-            # Fetch file metadata to get actual file name
             file_name = "Unknown"
-            try:
-                ok, metadata, err = await file_service.get_file_metadata(share.file_id, requester_user_id=current_user_id)
-                if ok and metadata:
-                    file_name = metadata.get("filename", "Unknown")
-            except Exception as e:
-                logger.warning(f"Failed to fetch metadata for file {share.file_id}: {e}")
+            file_meta = files_by_id.get(share.file_id)
+            if file_meta and file_meta.owner_id == current_user_id:
+                file_name = file_meta.filename
             
             result.append({
                 "share_id": str(share.id),
@@ -1160,10 +1189,10 @@ async def share_file_with_user(
         auth_service_url = os.getenv("AUTH_SERVICE_URL", "http://localhost:8001")
         owner_email = None
         try:
-            async with httpx.AsyncClient() as client:
-                r = await client.get(f"{auth_service_url}/api/users/{current_user_id}", timeout=5.0)
-                if r.status_code == 200:
-                    owner_email = r.json().get("email")
+            client = get_http_client(auth_service_url)
+            r = await client.get(f"/api/users/{current_user_id}", timeout=5.0)
+            if r.status_code == 200:
+                owner_email = r.json().get("email")
         except Exception:
             owner_email = None
 
@@ -4,10 +4,10 @@ Handles sharing folders with users/groups and managing permissions.
 """
 
 from fastapi import APIRouter, HTTPException, Path, Depends, Request, Body
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, FileResponse
+from starlette.background import BackgroundTask
 from typing import Optional, List
 import logging
-import httpx
 import os
 
 from app.application.folder_sharing_service import FolderSharingService
@@ -17,7 +17,7 @@ from app.application.dtos import (
     FolderShareListResponse,
     FolderUnshareRequest,
 )
-from app.application.services import FileService
+from app.application.services import FileService, remove_archive
 from app.utils.security import (
     get_current_user_id,
 )
@@ -25,6 +25,7 @@ from app.database import get_mongo_db
 from app.infrastructure.database.mongo_repository import MongoFolderRepository
 from app.presentation.dependencies import get_folder_service, get_file_service
 from app.core.config import settings
+from app.infrastructure.http.clients import get_http_client
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -75,20 +76,20 @@ async def share_folder(
             if "@" in target:
                 # Target is an email, try to resolve to UUID
                 try:
-                    async with httpx.AsyncClient() as client:
-                        # Call auth service to lookup user by email
-                        # Assuming endpoint: GET /api/users/by-email/{email}
-                        resp = await client.get(
-                            f"{auth_service_url}/api/users/by-email/{target}",
-                            timeout=5.0
-                        )
-                        if resp.status_code == 200:
-                            user_data = resp.json()
-                            resolved_targets.append(user_data.get('id', target))
-                            logger.info(f"[share-folder] Resolved email {target} to UUID {user_data.get('id')}")
-                        else:
-                            logger.warning(f"[share-folder] Could not resolve email {target} (status {resp.status_code})")
-                            resolved_targets.append(target)  # Fallback
+                    client = get_http_client(auth_service_url)
+                    # Call auth service to lookup user by email
+                    # Assuming endpoint: GET /api/users/by-email/{email}
+                    resp = await client.get(
+                        f"/api/users/by-email/{target}",
+                        timeout=5.0
+                    )
+                    if resp.status_code == 200:
+                        user_data = resp.json()
+                        resolved_targets.append(user_data.get('id', target))
+                        logger.info(f"[share-folder] Resolved email {target} to UUID {user_data.get('id')}")
+                    else:
+                        logger.warning(f"[share-folder] Could not resolve email {target} (status {resp.status_code})")
+                        resolved_targets.append(target)  # Fallback
                 except Exception as e:
                     logger.error(f"[share-folder] Auth lookup failed for {target}: {e}")
                     resolved_targets.append(target)  # Fallback to email
@@ -219,11 +220,11 @@ async def list_shared_folders(
         # Try to get user email from auth service (optional, for email-based shares)
         user_email = None
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"http://auth_service:8000/api/users/{current_user_id}")
-                if response.status_code == 200:
-                    user_data = response.json()
-                    user_email = user_data.get("email")
+            client = get_http_client(settings.auth_service_url)
+            response = await client.get(f"/api/users/{current_user_id}")
+            if response.status_code == 200:
+                user_data = response.json()
+                user_email = user_data.get("email")
         except Exception as e:
             logger.warning(f"[list-shared] Could not fetch user email: {e}")
             # Continue without email - will still find ID-based shares
@@ -411,11 +412,11 @@ async def download_shared_folder_zip(
         # Try to get user email from auth service (optional, for email-based shares)
         user_email = None
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"http://auth_service:8000/api/users/{current_user_id}")
-                if response.status_code == 200:
-                    user_data = response.json()
-                    user_email = user_data.get("email")
+            client = get_http_client(settings.auth_service_url)
+            response = await client.get(f"/api/users/{current_user_id}")
+            if response.status_code == 200:
+                user_data = response.json()
+                user_email = user_data.get("email")
         except Exception as e:
             logger.warning(f"[download-zip] Could not fetch user email: {e}")
         
@@ -425,17 +426,19 @@ async def download_shared_folder_zip(
             raise HTTPException(status_code=403, detail="Access denied to folder")
         
         # Archive the folder
-        success, stream, filename, error = await folder_service.archive_folder(
+        success, zip_path, filename, error = await folder_service.archive_folder(
             folder_id, current_user_id
         )
         
         if not success:
             raise HTTPException(status_code=400, detail=error)
         
-        return StreamingResponse(
-            stream,
+        # FileResponse sends the archive with sendfile; the temp file is removed afterwards
+        return FileResponse(
+            zip_path,
             media_type="application/zip",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
+            headers={"Content-Disposition": f"attachment; filename={filename}"},
+            background=BackgroundTask(remove_archive, zip_path),
         )
     
     except HTTPException:
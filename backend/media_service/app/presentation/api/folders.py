@@ -4,11 +4,12 @@ Supports hierarchical folder structure with parent_id pattern.
 """
 
 from fastapi import APIRouter, HTTPException, Path, Query, Depends, Request
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse
+from starlette.background import BackgroundTask
 from typing import Optional
 import logging
 
-from app.application.services import FolderService
+from app.application.services import FolderService, remove_archive
 from app.presentation.dependencies import get_folder_service
 from app.application.dtos import (
     FolderCreateRequest,
@@ -361,7 +362,7 @@ async def download_folder_zip(
     **Parameters**:
     - **folder_id**: MongoDB ObjectId of the folder
     
-    **Returns**: ZIP file stream with all folder contents
+    **Returns**: ZIP file with all folder contents
     
     **Notes**: 
     - Files are organized in the zip with full folder hierarchy
@@ -371,15 +372,17 @@ async def download_folder_zip(
     try:
         folder_id = folder_id.strip()
         
-        success, stream, filename, error = await service.archive_folder(folder_id, current_user_id)
+        success, zip_path, filename, error = await service.archive_folder(folder_id, current_user_id)
         
         if not success:
             raise HTTPException(status_code=400, detail=error)
 
-        return StreamingResponse(
-            stream,
+        # FileResponse sends the archive with sendfile; the temp file is removed afterwards
+        return FileResponse(
+            zip_path,
             media_type="application/zip",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
+            headers={"Content-Disposition": f"attachment; filename={filename}"},
+            background=BackgroundTask(remove_archive, zip_path),
         )
     except HTTPException:
         raise
@@ -4,14 +4,15 @@ Allows unauthenticated users to download files via share token.
 """
 
 from fastapi import APIRouter, HTTPException, Path, Query, Depends
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, FileResponse
+from starlette.background import BackgroundTask
 import logging
 from datetime import datetime, timezone
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.models.share import ShareLink
-from app.application.services import FileService, FolderService
+from app.application.services import FileService, FolderService, remove_archive
 from app.application.public_folder_links_service import PublicFolderLinksService
 from app.presentation.dependencies import get_file_service, get_folder_service, get_public_folder_link_service
 
@@ -278,18 +279,25 @@ async def download_public_folder_zip(
         folder_id = link.folder_id
         
         # 3. Archive the folder (use system context for public access)
-        success, stream, filename, error = await folder_service.archive_folder_public(folder_id)
+        success, zip_path, filename, error = await folder_service.archive_folder_public(folder_id)
         
         if not success:
             raise HTTPException(status_code=400, detail=error)
         
-        # Increment download count
-        await service.increment_download_count(share_token)
-        
-        return StreamingResponse(
-            stream,
+        # Increment download count (the archive has no owner until the
+        # FileResponse below exists, so remove it if this fails)
+        try:
+            await service.increment_download_count(share_token)
+        except BaseException:
+            remove_archive(zip_path)
+            raise
+
+        # FileResponse sends the archive with sendfile; the temp file is removed afterwards
+        return FileResponse(
+            zip_path,
             media_type="application/zip",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
+            headers={"Content-Disposition": f"attachment; filename={filename}"},
+            background=BackgroundTask(remove_archive, zip_path),
         )
     
     except HTTPException:
@@ -888,7 +888,9 @@ async def download_file_from_public_folder(
                 try:
                     file_key = folder_service.crypto.unwrap_key(bytes.fromhex(file_meta.encrypted_key))
                     nonce = bytes.fromhex(file_meta.nonce)
-                    stream = folder_service.crypto.decrypt_stream(stream, file_key, nonce)
+                    stream = folder_service.crypto.decrypt_stream(
+                        stream, file_key, nonce, chunk_size=settings.gridfs_chunk_size
+                    )
                 except Exception as e:
                     logger.error(f"Decryption failed for file {file_id}: {e}")
                     raise HTTPException(status_code=500, detail="Failed to decrypt file")
@@ -953,20 +955,24 @@ async def download_public_folder_as_zip(
         folder_id = link.folder_id
         
         # Use folder_service to download as ZIP (with public access)
-        from fastapi.responses import StreamingResponse
+        from fastapi.responses import FileResponse
+        from starlette.background import BackgroundTask
+        from app.application.services import remove_archive
         try:
             # Archive folder with public access (no ownership check)
-            success, stream, filename, error = await folder_service.archive_folder_public(folder_id)
+            success, zip_path, filename, error = await folder_service.archive_folder_public(folder_id)
             
             if not success:
                 raise HTTPException(status_code=400, detail=error or "Failed to create archive")
             
-            return StreamingResponse(
-                stream,
+            # FileResponse sends the archive with sendfile; the temp file is removed afterwards
+            return FileResponse(
+                zip_path,
                 media_type="application/zip",
                 headers={
                     "Content-Disposition": f"attachment; filename={filename}"
-                }
+                },
+                background=BackgroundTask(remove_archive, zip_path),
             )
         except HTTPException:
             raise
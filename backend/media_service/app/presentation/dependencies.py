@@ -6,19 +6,32 @@ Constructs the service object graph for endpoints to use.
 import logging
 from fastapi import Depends
 
-from app.core.config import settings
+from app.core.config import get_settings
 from app.database import get_fs, get_mongo_db
 from app.application.services import FileService, FolderService
 from app.application.public_folder_links_service import PublicFolderLinksService
 from app.infrastructure.database.mongo_repository import MongoGridFSRepository, MongoFolderRepository
+from app.domain.interfaces import IActivityLogger, IQuotaRepository
 from app.infrastructure.security.encryption import AESCryptoService
 from app.infrastructure.messaging.no_op_publisher import NoOpEventPublisher
 from app.infrastructure.http.auth_client import HttpQuotaRepository
+from app.infrastructure.http.queued_quota import get_queued_quota_repository
 from app.infrastructure.http.logger import HttpActivityLogger
+from app.infrastructure.http.queued_activity import get_queued_activity_logger
 
 logger = logging.getLogger(__name__)
 
 
+def _get_quota_repo(auth_service_url: str) -> IQuotaRepository:
+    """Process-wide quota queue: handlers enqueue deltas instead of waiting on the Auth Service."""
+    return get_queued_quota_repository(auth_service_url, lambda: HttpQuotaRepository(auth_service_url))
+
+
+def _get_activity_logger(auth_service_url: str, api_key: str) -> IActivityLogger:
+    """Process-wide activity queue: handlers enqueue log entries instead of waiting on the Auth Service."""
+    return get_queued_activity_logger(auth_service_url, lambda: HttpActivityLogger(auth_service_url, api_key))
+
+
 async def get_file_service() -> FileService:
     """
     Factory function for FastAPI dependency injection.
@@ -30,17 +43,18 @@ async def get_file_service() -> FileService:
             ...
     """
     try:
-        # Infrastructure layer implementations
+        settings = get_settings()
+
+        # Infrastructure layer implementations (one handle lookup, shared by both repositories)
         fs = get_fs()
-        db = get_mongo_db()
-        repo = MongoGridFSRepository(fs, db)
+        mongo_db = get_mongo_db()
+        repo = MongoGridFSRepository(fs, mongo_db)
         crypto = AESCryptoService()
         publisher = NoOpEventPublisher()  # No-op since we removed RabbitMQ
-        quota_repo = HttpQuotaRepository(settings.auth_service_url)
-        activity_logger = HttpActivityLogger(settings.auth_service_url, settings.internal_api_key)
+        quota_repo = _get_quota_repo(settings.auth_service_url)
+        activity_logger = _get_activity_logger(settings.auth_service_url, settings.internal_api_key)
 
         # Infrastructure for folder operations
-        mongo_db = get_mongo_db()
         folder_repo = MongoFolderRepository(mongo_db)
         
         # Application service with injected dependencies
@@ -80,8 +94,9 @@ async def get_folder_service() -> FolderService:
         file_repo = MongoGridFSRepository(fs, mongo_db)
         
         # [FIX] Inject crypto and quota services
+        settings = get_settings()
         crypto = AESCryptoService()
-        quota_repo = HttpQuotaRepository(settings.auth_service_url)
+        quota_repo = _get_quota_repo(settings.auth_service_url)
 
         # Application service with injected dependencies
         service = FolderService(
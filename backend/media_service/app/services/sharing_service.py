@@ -10,6 +10,7 @@ import asyncio
 
 from app.models.share import Share, ShareLink
 from app.schemas.sharing import ShareCreate, ShareLinkCreate
+from app.infrastructure.http.clients import get_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -72,28 +73,29 @@ class SharingService:
         last_error = None
         for attempt in range(max_retries):
             try:
-                async with httpx.AsyncClient(timeout=5.0) as client:
-                    response = await client.get(
-                        f"{auth_service_url}/api/users/by-email/{data.target_email}"
+                client = get_http_client(auth_service_url)
+                response = await client.get(
+                    f"/api/users/by-email/{data.target_email}",
+                    timeout=5.0,
+                )
+                if response.status_code == 404:
+                    raise HTTPException(
+                        status_code=404,
+                        detail="User not found"
+                    )
+                if response.status_code != 200:
+                    if attempt < max_retries - 1:
+                        logger.warning(f"Auth Service returned {response.status_code}, retrying...")
+                        await asyncio.sleep(retry_delay)
+                        continue
+                    raise HTTPException(
+                        status_code=500,
+                        detail="Failed to look up user"
                     )
-                    if response.status_code == 404:
-                        raise HTTPException(
-                            status_code=404,
-                            detail="User not found"
-                        )
-                    if response.status_code != 200:
-                        if attempt < max_retries - 1:
-                            logger.warning(f"Auth Service returned {response.status_code}, retrying...")
-                            await asyncio.sleep(retry_delay)
-                            continue
-                        raise HTTPException(
-                            status_code=500,
-                            detail="Failed to look up user"
-                        )
                     
-                    user_data = response.json()
-                    target_user_id = user_data.get("id")
-                    break
+                user_data = response.json()
+                target_user_id = user_data.get("id")
+                break
                     
             except httpx.RequestError as e:
                 last_error = e
@@ -0,0 +1,59 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.application.services import FolderService
+from app.domain.entities import Folder
+from app.domain.interfaces import IFolderRepository
+
+HOME = {"folder_id": None, "name": "Home"}
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def repo():
+    repo = AsyncMock(spec=IFolderRepository)
+    repo.get_folder.return_value = Folder(
+        id="c", name="Child", owner_id="u", parent_id="b", tree_path="/a/b/c"
+    )
+    return repo
+
+
+@pytest.mark.anyio
+async def test_breadcrumbs_follow_the_materialized_path(repo):
+    repo.get_folders_by_ids.return_value = {
+        "a": Folder(id="a", name="Root", owner_id="u"),
+        "b": Folder(id="b", name="Middle", owner_id="u", parent_id="a"),
+    }
+
+    breadcrumbs = await FolderService(repo).get_breadcrumbs("c", "u")
+
+    assert breadcrumbs == [
+        HOME,
+        {"folder_id": "a", "name": "Root"},
+        {"folder_id": "b", "name": "Middle"},
+        {"folder_id": "c", "name": "Child"},
+    ]
+    repo.get_folders_by_ids.assert_awaited_once_with(["a", "b"], "u")
+
+
+@pytest.mark.anyio
+async def test_breadcrumbs_keep_current_folder_when_ancestors_fail(repo):
+    repo.get_folders_by_ids.side_effect = RuntimeError("lookup failed")
+
+    breadcrumbs = await FolderService(repo).get_breadcrumbs("c", "u")
+
+    assert breadcrumbs == [HOME, {"folder_id": "c", "name": "Child"}]
+
+
+@pytest.mark.anyio
+async def test_breadcrumbs_for_root_or_missing_folder(repo):
+    service = FolderService(repo)
+    assert await service.get_breadcrumbs(None, "u") == [HOME]
+
+    repo.get_folder.return_value = None
+    assert await service.get_breadcrumbs("gone", "u") == [HOME]
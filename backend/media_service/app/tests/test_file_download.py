@@ -0,0 +1,90 @@
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.application.services import FileService
+from app.domain.entities import File
+from app.domain.interfaces import (
+    ICryptoService,
+    IEventPublisher,
+    IFileRepository,
+    IQuotaRepository,
+)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def stored_file():
+    return File(
+        id="65f000000000000000000001",
+        filename="report.pdf",
+        content_type="application/pdf",
+        size=1234,
+        owner_id="user-1",
+        upload_date=datetime(2026, 1, 2, 3, 4, 5),
+    )
+
+
+@pytest.fixture
+def service(stored_file):
+    repo = AsyncMock(spec=IFileRepository)
+    repo.get_file_metadata.return_value = stored_file
+
+    async def content():
+        yield b"data"
+
+    repo.get_file_stream.return_value = (stored_file, content())
+    publisher = AsyncMock(spec=IEventPublisher)
+    # Nothing listens on port 1, so the virus scanner stays detached
+    return FileService(
+        repo=repo,
+        crypto=MagicMock(spec=ICryptoService),
+        event_publisher=publisher,
+        quota_repo=AsyncMock(spec=IQuotaRepository),
+        clamav_host="127.0.0.1",
+        clamav_port=1,
+    )
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("header_format", ["{}", "W/{}", '"stale", {}', "*"])
+async def test_matching_etag_skips_stream_and_publish(service, stored_file, header_format):
+    if_none_match = header_format.format(stored_file.etag())
+
+    success, stream, metadata, error = await service.download_file(
+        stored_file.id, "user-1", if_none_match=if_none_match
+    )
+
+    assert (success, stream, error) == (True, None, None)
+    assert metadata["not_modified"] is True
+    assert metadata["etag"] == stored_file.etag()
+    service.repo.get_file_stream.assert_not_awaited()
+    service.repo.get_file_range.assert_not_awaited()
+    service.publisher.publish_download.assert_not_awaited()
+
+
+@pytest.mark.anyio
+async def test_stale_etag_streams_and_publishes(service, stored_file):
+    success, stream, metadata, error = await service.download_file(
+        stored_file.id, "user-1", if_none_match='"stale"'
+    )
+
+    assert success and error is None
+    assert "not_modified" not in metadata
+    assert [chunk async for chunk in stream] == [b"data"]
+    service.repo.get_file_stream.assert_awaited_once_with(stored_file.id)
+    service.publisher.publish_download.assert_awaited_once_with("user-1", stored_file.id)
+
+
+@pytest.mark.anyio
+async def test_matching_etag_still_checks_ownership(service, stored_file):
+    success, stream, metadata, error = await service.download_file(
+        stored_file.id, "someone-else", if_none_match=stored_file.etag()
+    )
+
+    assert (success, stream, metadata, error) == (False, None, None, "Access denied")
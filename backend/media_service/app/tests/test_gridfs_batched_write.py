@@ -0,0 +1,127 @@
+import pytest
+
+from app.core.config import settings
+from app.infrastructure.database import mongo_repository
+from app.infrastructure.database.mongo_repository import MongoGridFSRepository
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+class _FakeCollection:
+    def __init__(self, log: list, name: str, fail_inserts: bool = False):
+        self.log = log
+        self.name = name
+        self.fail_inserts = fail_inserts
+        self.docs = []
+
+    async def insert_many(self, docs, ordered=True):
+        if self.fail_inserts:
+            raise RuntimeError("insert failed")
+        self.log.append((self.name, "insert_many", len(docs)))
+        self.docs.extend(docs)
+
+    async def insert_one(self, doc):
+        self.log.append((self.name, "insert_one"))
+        self.docs.append(doc)
+
+    async def delete_many(self, query):
+        self.log.append((self.name, "delete_many", query))
+
+
+class _FakeDb:
+    def __init__(self, fail_inserts: bool = False):
+        self.log = []
+        self.collections = {
+            "fs.chunks": _FakeCollection(self.log, "fs.chunks", fail_inserts),
+            "fs.files": _FakeCollection(self.log, "fs.files"),
+        }
+
+    def __getitem__(self, name):
+        return self.collections[name]
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    # 4-byte chunks, two chunks per insert_many batch
+    monkeypatch.setattr(mongo_repository, "settings", settings.model_copy(update={"gridfs_chunk_size": 4}))
+    monkeypatch.setattr(mongo_repository, "GRIDFS_INSERT_BATCH_BYTES", 8)
+
+
+async def _write(db: _FakeDb, pieces) -> str:
+    async def stream():
+        for piece in pieces:
+            yield piece
+
+    repo = MongoGridFSRepository(fs=None, db=db)
+    return await repo._write_gridfs_batched("name.bin", {"owner": "u"}, stream())
+
+
+def _stored(db: _FakeDb):
+    return [(doc["n"], doc["data"]) for doc in sorted(db["fs.chunks"].docs, key=lambda d: d["n"])]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "pieces, expected",
+    [
+        # Partial pieces are joined into whole chunks
+        ([b"ab", b"c", b"defgh", b"ij"], [b"abcd", b"efgh", b"ij"]),
+        # A carried-over partial chunk is completed by the next piece
+        ([b"abcdef", b"gh", b"ijklm"], [b"abcd", b"efgh", b"ijkl", b"m"]),
+        # Pieces spanning several chunks are cut at chunk boundaries
+        ([b"abcdefghijkl"], [b"abcd", b"efgh", b"ijkl"]),
+        ([bytearray(b"abcd"), memoryview(b"efghi")], [b"abcd", b"efgh", b"i"]),
+        ([b"", b"abcd", b""], [b"abcd"]),
+        ([], []),
+    ],
+)
+async def test_pieces_are_cut_into_chunks(small_chunks, pieces, expected):
+    db = _FakeDb()
+
+    file_id = await _write(db, pieces)
+
+    assert _stored(db) == list(enumerate(expected))
+    assert all(type(data) is bytes for _, data in _stored(db))
+    assert all(str(doc["files_id"]) == file_id for doc in db["fs.chunks"].docs)
+    file_doc = db["fs.files"].docs[0]
+    assert file_doc["length"] == sum(len(piece) for piece in pieces)
+    assert file_doc["chunkSize"] == 4
+    assert file_doc["uploadDate"].tzinfo is None
+
+
+@pytest.mark.anyio
+async def test_exact_chunk_bytes_piece_is_stored_without_copy(small_chunks):
+    db = _FakeDb()
+    piece = b"wxyz"
+
+    await _write(db, [piece, b"ab"])
+
+    assert db["fs.chunks"].docs[0]["data"] is piece
+
+
+@pytest.mark.anyio
+async def test_chunks_are_batched_and_file_document_written_last(small_chunks):
+    db = _FakeDb()
+
+    await _write(db, [b"abcd"] * 5)
+
+    assert db.log == [
+        ("fs.chunks", "insert_many", 2),
+        ("fs.chunks", "insert_many", 2),
+        ("fs.chunks", "insert_many", 1),
+        ("fs.files", "insert_one"),
+    ]
+
+
+@pytest.mark.anyio
+async def test_failed_insert_removes_partial_chunks(small_chunks):
+    db = _FakeDb(fail_inserts=True)
+
+    with pytest.raises(RuntimeError):
+        await _write(db, [b"abcdefgh"])
+
+    assert db["fs.files"].docs == []
+    assert [entry[:2] for entry in db.log] == [("fs.chunks", "delete_many")]
@@ -0,0 +1,207 @@
+import asyncio
+import uuid
+
+import httpx
+import pytest
+
+from app.infrastructure.http import concurrency, queued_quota
+from app.infrastructure.http.auth_client import HttpQuotaRepository
+from app.infrastructure.http.concurrency import CircuitBreaker
+from app.infrastructure.http.queued_quota import QueuedQuotaRepository
+from app.domain.interfaces import IQuotaRepository
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(concurrency.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_breaker_opens_after_fail_max(clock):
+    breaker = CircuitBreaker(fail_max=3, reset_timeout=10)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert not breaker.is_open
+    breaker.record_failure()
+    assert breaker.is_open
+
+
+def test_breaker_success_resets_failure_count(clock):
+    breaker = CircuitBreaker(fail_max=2, reset_timeout=10)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert not breaker.is_open
+
+
+def test_breaker_half_opens_then_closes_on_success(clock):
+    breaker = CircuitBreaker(fail_max=1, reset_timeout=10)
+    breaker.record_failure()
+    assert breaker.is_open
+    clock[0] += 10
+    assert not breaker.is_open  # half-open: calls are let through
+    breaker.record_success()
+    breaker.record_failure()  # a single failure after closing re-opens at fail_max=1
+    assert breaker.is_open
+
+
+def test_breaker_half_open_failure_reopens_for_full_timeout(clock):
+    breaker = CircuitBreaker(fail_max=2, reset_timeout=10)
+    breaker.record_failure()
+    breaker.record_failure()
+    clock[0] += 10
+    assert not breaker.is_open
+    breaker.record_failure()
+    assert breaker.is_open
+    clock[0] += 9
+    assert breaker.is_open
+    clock[0] += 1
+    assert not breaker.is_open
+
+
+def _quota_repo(handler) -> HttpQuotaRepository:
+    repo = HttpQuotaRepository(f"http://auth-{uuid.uuid4().hex}")
+    repo._client = httpx.AsyncClient(base_url=repo.url, transport=httpx.MockTransport(handler))
+    return repo
+
+
+@pytest.mark.anyio
+async def test_batch_update_returns_only_undelivered_deltas():
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = request.read().decode()
+        if '"refused"' in body:
+            raise httpx.ConnectError("connection refused", request=request)
+        if '"timeout"' in body:
+            raise httpx.ReadTimeout("no response", request=request)
+        if '"rejected"' in body:
+            return httpx.Response(400)
+        return httpx.Response(200)
+
+    repo = _quota_repo(handler)
+    unsent = await repo.batch_update_usage(
+        {"ok": 5, "refused": 7, "timeout": 9, "rejected": 11, "zero": 0}
+    )
+
+    # A read timeout may have been applied server-side, so it is not replayed
+    assert unsent == {"refused": 7}
+
+
+@pytest.mark.anyio
+async def test_batch_update_returns_everything_while_circuit_open():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200)
+
+    repo = _quota_repo(handler)
+    for _ in range(repo._breaker.fail_max):
+        repo._breaker.record_failure()
+
+    assert await repo.batch_update_usage({"a": 1, "b": -2, "c": 0}) == {"a": 1, "b": -2}
+    assert calls == []
+
+
+class _FlakyQuota(IQuotaRepository):
+    """Reports the first `failures` batches as undelivered."""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.batches = []
+        self.applied = {}
+
+    async def update_usage(self, user_id: str, size_delta: int) -> None:
+        raise AssertionError("the queue only sends batches")
+
+    async def batch_update_usage(self, deltas):
+        self.batches.append(dict(deltas))
+        if self.failures:
+            self.failures -= 1
+            return dict(deltas)
+        for user_id, size_delta in deltas.items():
+            self.applied[user_id] = self.applied.get(user_id, 0) + size_delta
+        return {}
+
+
+@pytest.mark.anyio
+async def test_queue_holds_undelivered_deltas_and_replays_them(monkeypatch):
+    monkeypatch.setattr(queued_quota, "QUOTA_RETRY_DELAY", 0.01)
+    inner = _FlakyQuota(failures=2)
+    queue = QueuedQuotaRepository(inner, coalesce_window=0)
+
+    await queue.update_usage("u1", 10)
+    for _ in range(100):
+        if len(inner.batches) >= 1:
+            break
+        await asyncio.sleep(0.005)
+    # Queued while the first batch is held: coalesced into the replay
+    await queue.update_usage("u1", 5)
+    await queue.update_usage("u2", -3)
+
+    for _ in range(200):
+        if inner.applied:
+            break
+        await asyncio.sleep(0.005)
+    await queue.close()
+
+    assert inner.applied == {"u1": 15, "u2": -3}
+    assert len(inner.batches) == 3
+    assert queue._held == {}
+
+
+@pytest.mark.anyio
+async def test_queue_does_not_hold_delivered_deltas():
+    inner = _FlakyQuota(failures=0)
+    queue = QueuedQuotaRepository(inner, coalesce_window=0)
+
+    await queue.update_usage("u1", 4)
+    await queue.update_usage("u1", 6)
+    await queue.close()
+
+    assert inner.applied == {"u1": 10}
+    assert queue._held == {}
+
+
+async def _wait_for_batches(inner: _FlakyQuota, count: int) -> None:
+    for _ in range(200):
+        if len(inner.batches) >= count:
+            return
+        await asyncio.sleep(0.005)
+
+
+@pytest.mark.anyio
+async def test_close_cuts_backoff_short_for_a_final_attempt(monkeypatch):
+    monkeypatch.setattr(queued_quota, "QUOTA_RETRY_DELAY", 30)
+    inner = _FlakyQuota(failures=1)
+    queue = QueuedQuotaRepository(inner, coalesce_window=0)
+
+    await queue.update_usage("u1", 10)
+    await _wait_for_batches(inner, 1)
+    await queue.update_usage("u2", 2)
+
+    await asyncio.wait_for(queue.close(), timeout=1)
+
+    assert inner.applied == {"u1": 10, "u2": 2}
+    assert len(inner.batches) == 2
+
+
+@pytest.mark.anyio
+async def test_close_drops_deltas_still_undelivered_after_final_attempt(monkeypatch):
+    monkeypatch.setattr(queued_quota, "QUOTA_RETRY_DELAY", 30)
+    inner = _FlakyQuota(failures=10)
+    queue = QueuedQuotaRepository(inner, coalesce_window=0)
+
+    await queue.update_usage("u1", 10)
+    await _wait_for_batches(inner, 1)
+
+    await asyncio.wait_for(queue.close(), timeout=1)
+
+    assert inner.batches == [{"u1": 10}, {"u1": 10}]
+    assert inner.applied == {}
+    assert queue._held == {}
@@ -0,0 +1,99 @@
+import os
+
+import pytest
+
+from app.infrastructure.security.encryption import AESCryptoService
+from app.utils.validators import etag_matches, parse_range_header
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.mark.parametrize(
+    "header, size, expected",
+    [
+        (None, 100, None),
+        ("", 100, None),
+        ("bytes=0-0", 100, (0, 0)),
+        ("bytes=0-99", 100, (0, 99)),
+        ("bytes=10-", 100, (10, 99)),
+        ("bytes=10-1000", 100, (10, 99)),  # end clamped to the last byte
+        ("bytes=-30", 100, (70, 99)),
+        ("bytes=-500", 100, (0, 99)),  # suffix longer than the file
+        ("bytes=99-99", 100, (99, 99)),
+        ("  Bytes = 5-9 ", 100, (5, 9)),
+        ("bytes=9-3", 100, None),  # last < first: invalid, serve the whole file
+        ("bytes=0-1,5-9", 100, None),  # multi-range: serve the whole file
+        ("bytes=-", 100, None),
+        ("bytes=5", 100, None),
+        ("bytes=a-b", 100, None),
+        ("bytes=-3-5", 100, None),
+        ("items=0-5", 100, None),
+    ],
+)
+def test_parse_range_header(header, size, expected):
+    assert parse_range_header(header, size) == expected
+
+
+@pytest.mark.parametrize(
+    "header, size",
+    [
+        ("bytes=100-", 100),  # start == size
+        ("bytes=150-200", 100),  # start > size
+        ("bytes=-0", 100),  # empty suffix
+        ("bytes=0-", 0),  # zero-length file
+        ("bytes=0-0", 0),
+        ("bytes=-10", 0),
+    ],
+)
+def test_parse_range_header_unsatisfiable(header, size):
+    with pytest.raises(ValueError):
+        parse_range_header(header, size)
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, False),
+        ("", False),
+        ("*", True),
+        (" * ", True),
+        ('"abc"', True),
+        ('W/"abc"', True),
+        ('"xyz", W/"abc"', True),
+        ('"xyz" ,"abc" ', True),
+        ('"xyz"', False),
+        ("abc", False),  # unquoted tags never match
+        ('"ABC"', False),
+    ],
+)
+def test_etag_matches(header, expected):
+    assert etag_matches(header, '"abc"') is expected
+
+
+async def _collect(stream) -> bytes:
+    return b"".join([chunk async for chunk in stream])
+
+
+async def _chunks(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("offset", [0, 1, 15, 16, 17, 31, 100, 4095, 4097])
+@pytest.mark.parametrize("nonce", [None, b"\xff" * 16])  # random, and one that wraps
+async def test_decrypt_stream_from_offset(offset, nonce):
+    crypto = AESCryptoService()
+    file_key, random_nonce = crypto.generate_key_pair()
+    nonce = nonce or random_nonce
+    plaintext = os.urandom(5000)
+
+    ciphertext = await _collect(crypto.encrypt_stream(_chunks(plaintext, 1000), file_key, nonce))
+    decrypted = await _collect(
+        crypto.decrypt_stream(_chunks(ciphertext[offset:], 333), file_key, nonce, offset=offset)
+    )
+
+    assert decrypted == plaintext[offset:]
@@ -0,0 +1,143 @@
+import struct
+import threading
+
+import clamd
+import pytest
+
+from app.application import virus_scan_service
+from app.application.virus_scan_service import VirusScanService, _ChunkReader, _instream
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.mark.parametrize(
+    "chunks, sizes, expected",
+    [
+        ([b"abc", b"", b"de", b"fghij"], [2, 2, 4, 10], [b"ab", b"cd", b"efgh", b"ij"]),
+        ([b"", b"", b"xyz"], [5, 5], [b"xyz", b""]),
+        ([b"abc", b"def"], [0, 6, 1], [b"", b"abcdef", b""]),
+        ([], [4], [b""]),
+        ([b"", b""], [1], [b""]),
+    ],
+)
+def test_chunk_reader_sized_reads(chunks, sizes, expected):
+    reader = _ChunkReader(chunks)
+    assert [reader.read(size) for size in sizes] == expected
+
+
+def test_chunk_reader_read_all_after_partial_read():
+    reader = _ChunkReader([b"ab", b"", b"cde", bytearray(b"f")])
+    assert reader.read(3) == b"abc"
+    assert reader.read(-1) == b"def"
+    assert reader.read(-1) == b""
+
+
+def test_chunk_reader_read_all_defaults_to_everything():
+    assert _ChunkReader([b"12", b"", b"345"]).read() == b"12345"
+    assert _ChunkReader([]).read() == b""
+
+
+class _FakeSocket:
+    """Records what is sent and replies with a canned clamd response."""
+
+    def __init__(self, reply: bytes):
+        self.sent = bytearray()
+        self._reply = reply
+        self.thread = threading.get_ident()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def sendall(self, data: bytes) -> None:
+        self.sent += data
+
+    def recv(self, size: int) -> bytes:
+        reply, self._reply = self._reply[:size], self._reply[size:]
+        return reply
+
+
+@pytest.fixture
+def fake_clamd(monkeypatch):
+    sockets = []
+    reply = [b"stream: OK\0"]
+
+    def create_connection(address, timeout=None):
+        sock = _FakeSocket(reply[0])
+        sockets.append(sock)
+        return sock
+
+    monkeypatch.setattr(virus_scan_service.socket, "create_connection", create_connection)
+    return sockets, reply
+
+
+def _frames(sent: bytes):
+    """Split an INSTREAM request into its length-prefixed payloads."""
+    assert sent.startswith(b"zINSTREAM\0")
+    offset = len(b"zINSTREAM\0")
+    frames = []
+    while True:
+        (length,) = struct.unpack("!L", sent[offset:offset + 4])
+        offset += 4
+        if length == 0:
+            break
+        frames.append(bytes(sent[offset:offset + length]))
+        offset += length
+    assert offset == len(sent)
+    return frames
+
+
+def test_instream_frames_payload_and_terminates(fake_clamd):
+    sockets, _ = fake_clamd
+    conn = clamd.ClamdNetworkSocket(host="clamav", port=3310)
+
+    result = _instream(conn, _ChunkReader([b"abcd", b"", b"efghij"]), frame_size=4)
+
+    assert result == {"stream": ("OK", None)}
+    assert _frames(sockets[0].sent) == [b"abcd", b"efgh", b"ij"]
+
+
+def test_instream_empty_stream_sends_only_terminator(fake_clamd):
+    sockets, _ = fake_clamd
+    conn = clamd.ClamdNetworkSocket(host="clamav", port=3310)
+
+    _instream(conn, _ChunkReader([]))
+
+    assert sockets[0].sent == b"zINSTREAM\0" + struct.pack("!L", 0)
+
+
+def test_instream_parses_found_and_size_limit(fake_clamd):
+    _, reply = fake_clamd
+    conn = clamd.ClamdNetworkSocket(host="clamav", port=3310)
+
+    reply[0] = b"stream: Eicar-Test-Signature FOUND\0"
+    assert _instream(conn, _ChunkReader([b"x"])) == {"stream": ("FOUND", "Eicar-Test-Signature")}
+
+    reply[0] = b"INSTREAM size limit exceeded. ERROR\0"
+    with pytest.raises(clamd.BufferTooLongError):
+        _instream(conn, _ChunkReader([b"x"]))
+
+
+@pytest.mark.anyio
+async def test_passthrough_scan_runs_off_the_event_loop(fake_clamd, monkeypatch):
+    sockets, _ = fake_clamd
+    monkeypatch.setattr(virus_scan_service._ClamdEndpoint, "check", lambda self: None)
+
+    async def stream():
+        yield b"hello "
+        yield b"world"
+
+    service = VirusScanService("clamav-test", 3310)
+    passthrough, _, status, infected, _ = await service.scan_and_hash_with_stream_passthrough(
+        stream(), "hello.txt"
+    )
+
+    assert (status, infected) == ("clean", False)
+    assert _frames(sockets[0].sent) == [b"hello world"]
+    assert sockets[0].thread != threading.get_ident()
+    assert [chunk async for chunk in passthrough] == [b"hello ", b"world"]
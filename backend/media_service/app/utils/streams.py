@@ -0,0 +1,66 @@
+"""
+Utility functions for async byte streams
+"""
+
+import asyncio
+import logging
+from contextlib import suppress
+from typing import AsyncIterable, AsyncIterator
+
+logger = logging.getLogger(__name__)
+
+_END = object()  # Queue sentinel: source exhausted
+
+
+async def prefetch_stream(stream: AsyncIterable[bytes], depth: int) -> AsyncIterator[bytes]:
+    """
+    Read ahead up to depth chunks from a stream in a background task
+
+    The producer (e.g. GridFS read, upload read + encrypt) keeps working
+    while the consumer is busy (decrypting, writing to the client or the
+    database), so the two overlap instead of taking turns. Errors from the
+    source are re-raised to the consumer; stopping early cancels the
+    producer and closes the source.
+
+    Args:
+        stream: Source async iterable
+        depth: Maximum chunks buffered ahead (0 or less = no prefetching)
+
+    Yields:
+        The source chunks, in order
+    """
+    if depth <= 0:
+        async for chunk in stream:
+            yield chunk
+        return
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=depth)
+
+    async def fill() -> None:
+        try:
+            async for chunk in stream:
+                await queue.put(chunk)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await queue.put(e)
+            return
+        await queue.put(_END)
+
+    producer = asyncio.create_task(fill())
+    try:
+        while True:
+            item = await queue.get()
+            if item is _END:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        producer.cancel()
+        with suppress(asyncio.CancelledError):
+            await producer
+        aclose = getattr(stream, "aclose", None)
+        if aclose is not None:
+            with suppress(Exception):
+                await aclose()
@@ -3,8 +3,9 @@ Utility functions for file validation and error handling
 """
 
 import logging
+import sys
 from typing import Optional, AsyncGenerator, Tuple
-from app.core.config import settings
+from app.core.config import settings, ALLOWED_EXTENSIONS
 
 logger = logging.getLogger(__name__)
 
@@ -38,7 +39,23 @@ def validate_file_type(content_type: Optional[str]) -> bool:
     """
     if not content_type:
         return False
-    return content_type in settings.allowed_mimes
+    return sys.intern(content_type) in settings.allowed_mimes
+
+
+def get_mime_type_for_filename(filename: str) -> Optional[str]:
+    """
+    Look up the allowed MIME type for a filename by its extension
+    
+    Args:
+        filename: File name (e.g. "photo.JPG")
+    
+    Returns:
+        MIME type, or None if the extension is not an allowed upload type
+    """
+    _, dot, ext = filename.rpartition(".")
+    if not dot:
+        return None
+    return ALLOWED_EXTENSIONS.get(ext.lower())
 
 
 async def validate_file_type_by_magic_bytes(
@@ -159,6 +176,71 @@ def format_file_size(size_bytes: int) -> str:
     return f"{size_bytes:.2f} TB"
 
 
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an entity tag (weak comparison)
+    
+    Args:
+        if_none_match: Raw header value ("*" or a comma-separated tag list)
+        etag: Current entity tag, including quotes
+    
+    Returns:
+        True if the client's cached copy is still current
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def parse_range_header(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range HTTP Range header against a resource size
+    
+    Args:
+        range_header: Raw header value (e.g. "bytes=0-1023", "bytes=500-", "bytes=-500")
+        size: Resource size in bytes
+    
+    Returns:
+        (start, end) inclusive, or None if the header is absent, malformed
+        or asks for several ranges (serve the whole file)
+    
+    Raises:
+        ValueError: If the range cannot be satisfied (answer 416)
+    """
+    if not range_header:
+        return None
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        elif last:
+            start = max(size - int(last), 0)
+            end = size - 1
+        else:
+            return None
+    except ValueError:
+        return None
+    if start >= size:
+        raise ValueError(f"Range start {start} beyond size {size}")
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
 def get_allowed_mimes_description() -> str:
     """Get comma-separated list of allowed MIME types"""
-    return ", ".join(settings.allowed_mimes)
+    return ", ".join(sorted(settings.allowed_mimes))
@@ -76,6 +76,12 @@ def create_test_file(file_id: str, name: str, folder_id: Optional[str] = None, u
     )
 
 
+async def async_iter(items):
+    """Yield items from an async generator (stands in for repository iterators)"""
+    for item in items:
+        yield item
+
+
 # ============================================================================
 # TEST: Circular Dependency Prevention
 # ============================================================================
@@ -178,8 +184,8 @@ async def test_recursive_delete_empty_folder(folder_service, mock_folder_repo, m
     # Mock: folder exists
     mock_folder_repo.get_folder.return_value = folder_a
     
-    # Mock: recursive delete succeeds
-    mock_folder_repo.delete_folder_recursive.return_value = True
+    # Mock: tree delete succeeds (nothing to delete)
+    mock_folder_repo.tree_delete.return_value = (0, 0)
     
     # Test
     success, error = await folder_service.delete_folder_recursive(
@@ -190,7 +196,7 @@ async def test_recursive_delete_empty_folder(folder_service, mock_folder_repo, m
     # Verify
     assert success is True
     assert error is None
-    mock_folder_repo.delete_folder_recursive.assert_called_once_with(folder_id, user_id)
+    mock_folder_repo.tree_delete.assert_called_once_with(folder_id, user_id)
 
 
 @pytest.mark.asyncio
@@ -211,8 +217,8 @@ async def test_recursive_delete_with_files(folder_service, mock_folder_repo, moc
     # Mock: folder exists
     mock_folder_repo.get_folder.return_value = folder_a
     
-    # Mock: recursive delete succeeds
-    mock_folder_repo.delete_folder_recursive.return_value = True
+    # Mock: tree delete removes both files
+    mock_folder_repo.tree_delete.return_value = (2, 2048)
     
     # Test
     success, error = await folder_service.delete_folder_recursive(
@@ -223,7 +229,7 @@ async def test_recursive_delete_with_files(folder_service, mock_folder_repo, moc
     # Verify
     assert success is True
     assert error is None
-    mock_folder_repo.delete_folder_recursive.assert_called_once()
+    mock_folder_repo.tree_delete.assert_called_once()
 
 
 @pytest.mark.asyncio
@@ -268,8 +274,8 @@ async def test_recursive_delete_with_subfolders(folder_service, mock_folder_repo
     }
     mock_file_repo.list_files_in_folder.side_effect = lambda fid: files_by_folder.get(fid, [])
     
-    # Mock: recursive delete succeeds
-    mock_folder_repo.delete_folder_recursive.return_value = True
+    # Mock: tree delete removes all four files
+    mock_folder_repo.tree_delete.return_value = (4, 4096)
     
     # Test
     success, error = await folder_service.delete_folder_recursive(
@@ -345,7 +351,7 @@ async def test_get_folder_contents_empty(folder_service, mock_folder_repo, mock_
     
     # Mock
     mock_folder_repo.get_folder.return_value = folder_a
-    mock_file_repo.list_files_in_folder.return_value = []
+    mock_file_repo.iter_files_in_folder = MagicMock(return_value=async_iter([]))
     mock_folder_repo.list_subfolders.return_value = []
     
     # Test
@@ -376,7 +382,7 @@ async def test_get_folder_contents_with_files_and_folders(folder_service, mock_f
     
     # Mock
     mock_folder_repo.get_folder.return_value = folder_a
-    mock_file_repo.list_files_in_folder.return_value = [file1, file2]
+    mock_file_repo.iter_files_in_folder = MagicMock(return_value=async_iter([file1, file2]))
     mock_folder_repo.list_subfolders.return_value = [subfolder_b, subfolder_c]
     
     # Test